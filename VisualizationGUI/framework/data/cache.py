@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Binary sidecar cache of parsed evaluations
+
+The parsed columns are stored next to Results.txt in an uncompressed .npz
+file, described by a small json manifest. Both are keyed by size,
+modification time and content hash of Results.txt. If only the modification
+time differs (e.g. after copying an evaluation), the content hash decides.
+The grid loader derives the parameter columns from EvaluationParameterSet.json,
+so the content hash of that file is part of the key as well.
+"""
+
+from . import grid
+from . import parser
+from .. import trace
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 2
+# lock files of crashed processes are ignored after this time [s]
+STALE_LOCK_AGE = 600
+
+def get_cache_paths(objectives_file):
+    stem = objectives_file.stem + ".cache"
+    return (objectives_file.with_name(stem + ".npz"),
+            objectives_file.with_name(stem + ".json"),
+            objectives_file.with_name(stem + ".lock"))
+
+def get_file_key(objectives_file):
+    stat = objectives_file.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def get_content_hash(objectives_file, block_size=1 << 20):
+    content_hash = hashlib.blake2b(digest_size=16)
+    with objectives_file.open("rb") as results:
+        for block in iter(lambda: results.read(block_size), b""):
+            content_hash.update(block)
+    return content_hash.hexdigest()
+
+def get_parameter_hash(objectives_file):
+    """ Content hash of the parameter set of an evaluation, None if it has none. """
+    try:
+        return get_content_hash(grid.get_path_to_parameter_file(objectives_file))
+    except OSError:
+        return None
+
+def matches_key(stored_key, key, objectives_file):
+    """ Compare a stored key with the current key of Results.txt. """
+    if stored_key["size"] != key["size"]:
+        return False
+    if stored_key["mtime_ns"] != key["mtime_ns"]:
+        return get_content_hash(objectives_file) == stored_key["hash"]
+    return True
+
+@trace.traced()
+def parse_cached(objectives_file, use_cache=True, rebuild=False,
+                 parse_function=parser.parse_file):
+    """ Same return value as parser.parse_file, served from cache if valid. """
+    if not use_cache:
+        return parse_function(objectives_file)
+
+    if not rebuild:
+        cached = load(objectives_file)
+        if cached is not None:
+            return cached
+
+    key = get_file_key(objectives_file)
+    parsed = parse_function(objectives_file)
+    # do not cache a file that was modified while parsing it
+    if get_file_key(objectives_file) == key:
+        store(objectives_file, key, *parsed)
+    return parsed
+
+def load(objectives_file, lazy_arrays=False):
+    """
+    Cached results of Results.txt, None if there are none. If lazy_arrays,
+    the elements of array variables are not read, see load_columns.
+    """
+    manifest = read_manifest(objectives_file)
+    if manifest is None:
+        return None
+    names = manifest["columns"]
+    if lazy_arrays:
+        elements = set(element for array_name in manifest["array_names"]
+                       for element in parser.find_element_names(array_name, names))
+        names = [name for name in names if name not in elements]
+    columns = read_columns(manifest, get_cache_paths(objectives_file)[0], names)
+    if columns is None:
+        return None
+
+    data = pd.DataFrame(columns)
+    dims = tuple(manifest["dims"])
+    data_names = tuple(manifest["data_names"])
+    return dims, data_names, manifest["array_names"], data
+
+def load_columns(objectives_file, names):
+    """ Dictionary of the given cached columns, None if the cache is invalid. """
+    manifest = read_manifest(objectives_file)
+    if manifest is None:
+        return None
+    return read_columns(manifest, get_cache_paths(objectives_file)[0], names)
+
+def read_manifest(objectives_file):
+    _, manifest_path, _ = get_cache_paths(objectives_file)
+    try:
+        with manifest_path.open(encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+        key = get_file_key(objectives_file)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != CACHE_VERSION:
+        return None
+    if not matches_key(manifest["key"], key, objectives_file):
+        return None
+    if manifest.get("parameter_hash") != get_parameter_hash(objectives_file):
+        return None
+    if manifest["key"]["mtime_ns"] != key["mtime_ns"]:
+        manifest["key"].update(key)
+        try:
+            write_atomic(manifest_path, json.dumps(manifest).encode("utf-8"))
+        except OSError:
+            pass
+    return manifest
+
+def read_columns(manifest, npz_path, names):
+    # only the requested members of the npz archive are read
+    try:
+        with np.load(str(npz_path), allow_pickle=False) as npz:
+            # npz and manifest of two concurrent writers must not be mixed
+            if str(npz["manifest_hash"]) != manifest["key"]["hash"]:
+                return None
+            positions = dict((name, i) for i, name in enumerate(manifest["columns"]))
+            return dict((name, npz["c{}".format(positions[name])])
+                        for name in names)
+    except (OSError, KeyError, ValueError):
+        return None
+
+def store(objectives_file, key, dims, data_names, array_names, data):
+    if not all(pd.api.types.is_numeric_dtype(data[col]) for col in data.columns):
+        return False
+
+    npz_path, manifest_path, lock_path = get_cache_paths(objectives_file)
+    if not acquire_lock(lock_path):
+        # another instance is building the cache right now
+        return False
+    try:
+        key = dict(key, hash=get_content_hash(objectives_file))
+        manifest = {"version": CACHE_VERSION, "key": key,
+                    "parameter_hash": get_parameter_hash(objectives_file),
+                    "dims": list(dims), "data_names": list(data_names),
+                    "array_names": list(array_names),
+                    "columns": list(data.columns)}
+        arrays = dict(("c{}".format(i), data[col].to_numpy())
+                      for i, col in enumerate(data.columns))
+        arrays["manifest_hash"] = np.array(key["hash"])
+
+        write_atomic(npz_path, lambda f: np.savez(f, **arrays))
+        write_atomic(manifest_path, json.dumps(manifest).encode("utf-8"))
+        return True
+    except OSError:
+        return False
+    finally:
+        release_lock(lock_path)
+
+def write_atomic(path, content):
+    # write into a temporary file next to the target and rename it, so
+    # readers never see partially written files
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent),
+                                    prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            if callable(content):
+                content(tmp_file)
+            else:
+                tmp_file.write(content)
+        os.replace(tmp_path, str(path))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def acquire_lock(lock_path):
+    for _ in range(2):
+        try:
+            fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode("ascii"))
+            os.close(fd)
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - lock_path.stat().st_mtime < STALE_LOCK_AGE:
+                    return False
+                lock_path.unlink()
+            except OSError:
+                return False
+        except OSError:
+            return False
+    return False
+
+def release_lock(lock_path):
+    try:
+        lock_path.unlink()
+    except OSError:
+        pass
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Memory-mapped column store for evaluations larger than RAM
+
+Results.txt is parsed in chunks into one raw binary file per column next to
+it (folder Results.columns), described by a json schema. Columns are mapped
+into memory with np.memmap, so only the pages of columns in use are read.
+"""
+
+from . import parser
+from . import cache
+from .frame import LazyFrame
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 2
+SCHEMA_FILE = "schema.json"
+
+class ColumnStore:
+    def __init__(self, directory):
+        self.directory = directory
+        with (directory / SCHEMA_FILE).open(encoding="utf-8") as schema_file:
+            self.schema = json.load(schema_file)
+        self.num_rows = self.schema["rows"]
+        self.dims = tuple(self.schema["dims"])
+        self.data_names = tuple(self.schema["data_names"])
+        self.array_names = self.schema["array_names"]
+        self.column_info = dict((col["name"], col) for col in self.schema["columns"])
+        self.column_names = [col["name"] for col in self.schema["columns"]]
+        self.maps = {}
+
+    def get_column(self, name):
+        if name not in self.maps:
+            info = self.column_info[name]
+            if self.num_rows == 0:
+                self.maps[name] = np.empty(0, dtype=info["dtype"])
+            else:
+                self.maps[name] = np.memmap(str(self.directory / info["file"]),
+                                            dtype=info["dtype"], mode="r",
+                                            shape=(self.num_rows,))
+        return self.maps[name]
+
+    def get_frame(self):
+        return LazyFrame(self.column_names, self.get_column, self.num_rows)
+
+def get_store_path(objectives_file):
+    return objectives_file.with_name(objectives_file.stem + ".columns")
+
+def open_store(objectives_file, rebuild=False):
+    directory = get_store_path(objectives_file)
+    lock_path = directory.with_name(directory.name + ".lock")
+    if not rebuild:
+        store = load(objectives_file, directory)
+        if store is not None:
+            return store
+
+    while not cache.acquire_lock(lock_path):
+        # another instance is building the store, use it once it is done
+        time.sleep(0.5)
+        store = load(objectives_file, directory)
+        if store is not None:
+            return store
+    try:
+        build(objectives_file, directory)
+    finally:
+        cache.release_lock(lock_path)
+    return ColumnStore(directory)
+
+def load(objectives_file, directory):
+    try:
+        with (directory / SCHEMA_FILE).open(encoding="utf-8") as schema_file:
+            schema = json.load(schema_file)
+        key = cache.get_file_key(objectives_file)
+    except (OSError, ValueError):
+        return None
+
+    if schema.get("version") != STORE_VERSION:
+        return None
+    if not cache.matches_key(schema["key"], key, objectives_file):
+        return None
+    return ColumnStore(directory)
+
+def build(objectives_file, directory):
+    key = cache.get_file_key(objectives_file)
+    key["hash"] = cache.get_content_hash(objectives_file)
+    evaluation_parameter_names, objective_value_names = parser.read_header(objectives_file)
+
+    tmp_dir = tempfile.mkdtemp(dir=str(directory.parent),
+                               prefix=directory.name, suffix=".tmp")
+    files = []
+    columns = []
+    num_rows = 0
+    try:
+        for param_names, array_names, data, _ in parser.iter_chunks(objectives_file):
+            if not columns:
+                for i, name in enumerate(data.columns):
+                    dtype = data[name].to_numpy().dtype
+                    columns.append({"name": name, "dtype": dtype.str,
+                                    "file": "c{}.bin".format(i)})
+                    files.append(open(os.path.join(tmp_dir, "c{}.bin".format(i)), "wb"))
+            for col, column_file in zip(columns, files):
+                if not pd.api.types.is_numeric_dtype(data[col["name"]]):
+                    raise ValueError("Column {} is not numeric".format(col["name"]))
+                values = data[col["name"]].to_numpy()
+                # e.g. NaN of a failed execution in a column of integers so far
+                dtype = np.result_type(col["dtype"], values.dtype)
+                if dtype != np.dtype(col["dtype"]):
+                    promote(column_file, col["dtype"], dtype)
+                    col["dtype"] = dtype.str
+                np.asarray(values, dtype=col["dtype"]).tofile(column_file)
+            num_rows += len(data.index)
+
+        for column_file in files:
+            column_file.close()
+        schema = {"version": STORE_VERSION, "key": key, "rows": num_rows,
+                  "dims": [num_rows, len(evaluation_parameter_names),
+                           len(objective_value_names)],
+                  "data_names": list(param_names), "array_names": array_names,
+                  "columns": columns}
+        with open(os.path.join(tmp_dir, SCHEMA_FILE), "w", encoding="utf-8") as schema_file:
+            json.dump(schema, schema_file)
+
+        # swap in the new store, an old one may still be mapped by others
+        if directory.exists():
+            old_dir = tempfile.mkdtemp(dir=str(directory.parent),
+                                       prefix=directory.name, suffix=".old")
+            os.replace(str(directory), os.path.join(old_dir, "store"))
+            shutil.rmtree(old_dir, ignore_errors=True)
+        os.replace(tmp_dir, str(directory))
+    except BaseException:
+        for column_file in files:
+            column_file.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+def promote(column_file, old_dtype, new_dtype):
+    """ Rewrite the values written to a column file with a wider type. """
+    column_file.flush()
+    values = np.fromfile(column_file.name, dtype=old_dtype)
+    column_file.seek(0)
+    column_file.truncate()
+    values.astype(new_dtype).tofile(column_file)
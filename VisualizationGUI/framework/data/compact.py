@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Compact column representation
+
+Evaluation parameters stem from a cartesian grid and only take a handful of
+distinct values. They are dictionary-encoded as ordered pandas Categoricals,
+i.e. a sorted table of values plus int8/int16 codes (-1 marks missing
+values). Objective values can be downcast to float32.
+"""
+
+import numpy as np
+import pandas as pd
+
+# columns with more distinct values are not worth encoding
+MAX_LEVELS = 2**15 - 1
+
+def compact_frame(data, param_names, objective_names=(), float32=False):
+    columns = dict((name, compact_column(data[name], name in param_names,
+                                         float32 and name in objective_names))
+                   for name in data.columns)
+    return pd.DataFrame(columns, index=data.index)
+
+def compact_column(column, is_param, float32=False):
+    if is_param and not is_encoded(column):
+        levels = pd.unique(column.dropna())
+        if len(levels) <= MAX_LEVELS:
+            column = pd.Series(pd.Categorical(column, categories=np.sort(levels),
+                                              ordered=True),
+                               index=column.index, name=column.name)
+    elif float32 and not is_param and column.dtype == np.float64:
+        column = column.astype(np.float32)
+    return column
+
+def set_values(column, positions, values):
+    """
+    Copy of a column with values at positions. Encoded columns stay encoded,
+    new values extend their levels; float32 columns stay float32.
+    """
+    values = np.asarray(values)
+    if is_encoded(column):
+        levels = column.cat.categories
+        categories = levels.union(pd.Index(pd.unique(values[~pd.isna(values)])))
+        if len(categories) <= MAX_LEVELS:
+            codes = categories.get_indexer(column).astype(np.int64)
+            codes[positions] = categories.get_indexer(values)
+            return pd.Series(pd.Categorical.from_codes(codes, categories, ordered=True),
+                             index=column.index, name=column.name)
+        column = column.astype(np.result_type(levels.dtype, values.dtype))
+    array = column.to_numpy()
+    if array.dtype.kind == "f" and values.dtype.kind in "fiub":
+        dtype = array.dtype
+    else:
+        # e.g. NaN of a failed execution in a column of integers
+        dtype = np.result_type(array.dtype, values.dtype)
+    array = np.array(array, dtype=dtype)
+    array[positions] = values
+    return pd.Series(array, index=column.index, name=column.name)
+
+def is_encoded(column):
+    return isinstance(column.dtype, pd.CategoricalDtype)
+
+def get_levels(column):
+    """ Sorted value table of an encoded column. """
+    return column.cat.categories.tolist()
+
+def get_codes(column):
+    """ Positions of the values in the sorted value table, -1 if missing. """
+    return column.cat.codes.to_numpy()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Side-by-side comparison of several evaluations
+
+The results are parsed concurrently in a process pool and joined on the
+evaluation parameters shared by all evaluations (a hash join of pandas). All
+other columns are prefixed with the label of their evaluation, e.g.
+"Demo:Time [s]", and objective values present in every evaluation are
+compared with derived delta columns, e.g. "(Other-Demo):Time [s]", which
+are only computed on demand.
+"""
+
+from . import parser
+from . import cache
+from . import grid
+from . import overlay
+
+import os
+import concurrent.futures
+import numpy as np
+import pandas as pd
+
+ROS_PREFIX = "ROS:"
+
+def parse_evaluation_spec(spec, use_ROS=False):
+    """ (name, use_ROS) of an evaluation given as "name" or "ROS:name". """
+    if spec.startswith(ROS_PREFIX):
+        return spec[len(ROS_PREFIX):], True
+    return spec, use_ROS
+
+def get_labels(evaluations):
+    names = [name for name, _ in evaluations]
+    labels = []
+    for name, use_ROS in evaluations:
+        # spaces would break the "name [unit]" format of the columns
+        label = name.replace(" ", "_")
+        if use_ROS and names.count(name) > 1:
+            label += "(ROS)"
+        labels.append(label)
+    if len(set(labels)) != len(labels):
+        raise ValueError("Evaluations must be distinct")
+    return labels
+
+def load_results(objectives_file, use_cache=True, rebuild_cache=False):
+    return cache.parse_cached(objectives_file, use_cache, rebuild_cache,
+                              grid.parse_file)
+
+def load_evaluations(evaluations, use_cache=True, rebuild_cache=False):
+    """ Parsed results of all evaluations, parsing them concurrently. """
+    files = [parser.get_path_to_objectives(name, use_ROS) / "Results.txt"
+             for name, use_ROS in evaluations]
+    results = [None]*len(files)
+    if use_cache and not rebuild_cache:
+        # cache hits are cheaper to load than to send between processes
+        results = [cache.load(objectives_file) for objectives_file in files]
+    missing = [i for i, result in enumerate(results) if result is None]
+    workers = min(len(missing), os.cpu_count() or 1)
+    if workers <= 1:
+        for i in missing:
+            results[i] = load_results(files[i], use_cache, rebuild_cache)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = dict((i, pool.submit(load_results, files[i], use_cache,
+                                           rebuild_cache)) for i in missing)
+            for i, future in futures.items():
+                results[i] = future.result()
+    # re-evaluated rows replace those of Results.txt
+    for objectives_file, (_, (param_names, objective_names), array_names, 
+                          data) in zip(files, results):
+        overlay.apply(data, overlay.get_rows(objectives_file, array_names,
+                                             list(param_names) + 
+                                             list(objective_names)))
+    return results
+
+def join_evaluations(labels, results):
+    """
+    Join parsed results on their shared evaluation parameters. Returns the
+    tuple (dims, data_names, array_names, data) like parser.parse_file, the
+    parameterIDs of every evaluation for the rows of data and the derived
+    delta columns (name, minuend, subtrahend), which are not part of data.
+    """
+    all_param_names = [param_names for _, (param_names, _), _, _ in results]
+    shared = [name for name in all_param_names[0]
+              if all(name in param_names for param_names in all_param_names[1:])]
+    if not shared:
+        raise ValueError("Evaluations do not share any evaluation parameter")
+
+    joined = None
+    param_names = list(shared)
+    objective_names = []
+    array_names = [name for name in results[0][2]
+                   if name in shared or parser.find_element_names(name, shared)]
+    for label, (_, (params, objectives), arrays, data) in zip(labels, results):
+        renamed = dict((name, get_column_name(label, name))
+                       for name in data.columns if name not in shared)
+        frame = data.rename(columns=renamed)
+        frame[get_id_column(label)] = np.arange(len(data.index))
+        param_names.extend(renamed[name] for name in params if name not in shared)
+        objective_names.extend(renamed[name] for name in objectives)
+        array_names.extend(get_column_name(label, name) for name in arrays
+                           if name not in array_names)
+        if joined is None:
+            joined = frame
+        else:
+            joined = joined.merge(frame, how="inner", on=shared, sort=False)
+
+    # objective values of the other evaluations relative to the first one
+    all_objectives = [objectives for _, (_, objectives), _, _ in results]
+    compared = [name for name in all_objectives[0]
+                if all(name in objectives for objectives in all_objectives[1:])]
+    deltas = []
+    for label in labels[1:]:
+        delta_label = "({}-{})".format(label, labels[0])
+        for name in compared:
+            deltas.append((get_column_name(delta_label, name),
+                           get_column_name(label, name),
+                           get_column_name(labels[0], name)))
+        array_names.extend(get_column_name(delta_label, name)
+                           for name in results[0][2]
+                           if parser.find_element_names(name, compared))
+
+    parameter_ids = dict((label, joined.pop(get_id_column(label)).to_numpy())
+                         for label in labels)
+    joined = joined[param_names + objective_names]
+    objective_names.extend(name for name, _, _ in deltas)
+    joined.index = pd.RangeIndex(len(joined.index))
+    dims = (len(joined.index), len(param_names), len(objective_names))
+    return ((dims, (param_names, objective_names), array_names, joined),
+            parameter_ids, deltas)
+
+def get_column_name(label, name):
+    return "{}:{}".format(label, name)
+
+def get_id_column(label):
+    return "parameterID {}".format(label)
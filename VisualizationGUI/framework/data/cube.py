@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Marginal summaries of the objectives per parameter level
+
+For the objective shown and every parameter asked for, the cube holds the
+count and the sum over the selected rows of each level (slider position),
+built on the first request and dropped when another objective is shown. When
+the selection changes, only the added and removed rows are added to or
+subtracted from it.
+Minima and maxima cannot be subtracted, so for an objective they are kept as
+positions in the rows sorted by level and value: the smallest selected row of
+a level only moves on when it is removed itself, and then only up to the next
+selected row.
+Missing objective values (failed executions) are left out of all summaries.
+"""
+
+import numpy as np
+
+class SortedLevels:
+    """ Selected rows with the smallest and largest value of every level. """
+    def __init__(self, codes, values, num_levels, mask):
+        valid = np.flatnonzero(~np.isnan(values))
+        # rows of level i are order[offsets[i]:offsets[i+1]], sorted by value
+        self.order = valid[np.lexsort((values[valid], codes[valid]))]
+        self.offsets = np.zeros(num_levels + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes[valid], minlength=num_levels),
+                  out=self.offsets[1:])
+        self.rank = np.full(len(values), -1, dtype=np.int64)
+        self.rank[self.order] = np.arange(len(self.order))
+        self.codes = codes
+        self.values = values
+        # positions of the first and last selected row (past the level if none)
+        positions = np.flatnonzero(mask[self.order])
+        starts, stops = self.offsets[:-1], self.offsets[1:]
+        after = np.append(positions, len(self.order))
+        self.first = after[np.searchsorted(after, starts)]
+        self.first = np.where(self.first < stops, self.first, stops)
+        before = np.insert(positions, 0, -1)
+        self.last = before[np.searchsorted(before, stops) - 1]
+        self.last = np.where(self.last >= starts, self.last, starts - 1)
+
+    def add(self, rows):
+        positions = self.rank[rows]
+        positions = positions[positions >= 0]
+        levels = self.codes[self.order[positions]]
+        np.minimum.at(self.first, levels, positions)
+        np.maximum.at(self.last, levels, positions)
+
+    def remove(self, rows, mask):
+        positions = self.rank[rows]
+        positions = positions[positions >= 0]
+        levels = self.codes[self.order[positions]]
+        for level in np.unique(levels[self.first[levels] == positions]):
+            self.first[level] = self.scan(mask, self.first[level] + 1,
+                                          self.offsets[level + 1], 1)
+        for level in np.unique(levels[self.last[levels] == positions]):
+            self.last[level] = self.scan(mask, self.last[level] - 1,
+                                         self.offsets[level] - 1, -1)
+
+    def scan(self, mask, start, stop, step, chunk_size=64):
+        """ Position of the next selected row from start to stop (exclusive). """
+        while start != stop:
+            if step > 0:
+                end = min(start + chunk_size, stop)
+                selected = mask[self.order[start:end]]
+            else:
+                end = max(start - chunk_size, stop)
+                selected = mask[self.order[end+1:start+1]][::-1]
+            if selected.any():
+                return start + step*int(np.argmax(selected))
+            start = end
+            chunk_size *= 2
+        return stop
+
+    def get_extrema(self):
+        """ Smallest and largest selected value of every level (NaN if none). """
+        starts, stops = self.offsets[:-1], self.offsets[1:]
+        found = self.first < stops
+        minimum = np.full(len(starts), np.nan)
+        maximum = np.full(len(starts), np.nan)
+        minimum[found] = self.values[self.order[self.first[found]]]
+        maximum[found] = self.values[self.order[self.last[found]]]
+        return minimum, maximum
+
+class MarginalCube:
+    """
+    Summaries of the objective shown beside the sliders, built per parameter
+    on request and dropped when another objective is shown.
+    """
+    def __init__(self, data, selection):
+        self.data = data
+        self.selection = selection
+        self.objective = None
+        self.values = None
+        # parameter -> count, sum and SortedLevels of the objective per level
+        self.counts = {}
+        self.sums = {}
+        self.sorted_levels = {}
+
+    def set_objective(self, objective):
+        if objective == self.objective:
+            return
+        self.objective = objective
+        self.values = np.asarray(self.data[objective].to_numpy(), dtype=np.float64)
+        self.counts, self.sums, self.sorted_levels = {}, {}, {}
+
+    def accumulate(self, param, rows, sign):
+        if len(rows) == 0:
+            return
+        index = self.selection.get_index(param)
+        codes = index.get_codes()[rows]
+        values = self.values[rows]
+        valid = ~np.isnan(values)
+        counts = np.bincount(codes, valid, minlength=index.num_levels)
+        sums = np.bincount(codes, np.where(valid, values, 0),
+                           minlength=index.num_levels)
+        self.counts[param] += sign*counts.astype(np.int64)
+        self.sums[param] += sign*sums
+        # no rounding errors are left behind by empty levels
+        self.sums[param][self.counts[param] == 0] = 0
+
+    def update(self, added, removed):
+        """ Apply the rows added to and removed from the selection. """
+        mask = self.selection.get_mask()
+        for param in self.counts:
+            self.accumulate(param, added, 1)
+            self.accumulate(param, removed, -1)
+            if len(added):
+                self.sorted_levels[param].add(added)
+            if len(removed):
+                self.sorted_levels[param].remove(removed, mask)
+
+    def get_summary(self, param, objective):
+        """
+        Count, mean, minimum and maximum of an objective over the selected
+        rows of every level of a parameter.
+        """
+        self.set_objective(objective)
+        if param not in self.counts:
+            index = self.selection.get_index(param)
+            self.counts[param] = np.zeros(index.num_levels, dtype=np.int64)
+            self.sums[param] = np.zeros(index.num_levels)
+            self.accumulate(param, self.selection.get_selected(), 1)
+            self.sorted_levels[param] = SortedLevels(index.get_codes(), self.values,
+                                                     index.num_levels,
+                                                     self.selection.get_mask())
+        count = self.counts[param]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.sums[param]/count
+        minimum, maximum = self.sorted_levels[param].get_extrema()
+        return count, mean, minimum, maximum
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from . import parser
+
+import os
+
+# upper bound of bytes parsed per poll, keeps the GUI responsive
+MAX_TAIL_SIZE = 16*2**20
+
+class ResultsFollower:
+    """
+    Parses rows appended to Results.txt while an evaluation is running. The
+    byte offset of the first unparsed byte is remembered, so every poll only
+    reads the new tail of the file. Incomplete last lines are left for the
+    next poll.
+    """
+    def __init__(self, objectives_file, max_tail_size=MAX_TAIL_SIZE):
+        self.objectives_file = objectives_file
+        self.max_tail_size = max_tail_size
+        self.position = 0
+        self.num_rows = 0
+        self.header = None
+        self.array_widths = {}
+        self.columns = None
+        self.file_id = None
+        # set if the file was replaced or truncated, e.g. by a new evaluation
+        self.restarted = False
+
+    def poll(self):
+        """ Return the chunks (param_names, array_names, data, position) of new rows. """
+        if self.restarted:
+            return []
+        try:
+            stat = os.stat(str(self.objectives_file))
+        except FileNotFoundError:
+            return []
+        file_id = (stat.st_dev, stat.st_ino)
+        if self.file_id is not None and (file_id != self.file_id or
+                                         stat.st_size < self.position):
+            self.restarted = True
+            return []
+        self.file_id = file_id
+        if stat.st_size == self.position:
+            # nothing appended, no need to open the file
+            return []
+
+        with self.objectives_file.open("rb") as results:
+            results.seek(self.position)
+            if self.header is None:
+                line = results.readline()
+                if not line.endswith(b"\n"):
+                    return []
+                self.header = parser.parse_header(line)
+                self.position = results.tell()
+            tail = results.read(min(stat.st_size - self.position,
+                                    self.max_tail_size))
+        # only parse complete lines
+        end = tail.rfind(b"\n") + 1
+        if end == 0:
+            return []
+        self.position += end
+
+        evaluation_parameter_names, objective_value_names = self.header
+        param_names, array_names, data = parser.parse_body(tail[:end],
+                                                           evaluation_parameter_names,
+                                                           objective_value_names,
+                                                           self.num_rows,
+                                                           self.array_widths)
+        if self.columns is None:
+            self.columns = list(data.columns)
+        elif list(data.columns) != self.columns:
+            raise ValueError("Columns of {} changed after row {}".format(
+                self.objectives_file, self.num_rows))
+        self.num_rows += len(data.index)
+        return [(param_names, array_names, data, self.position)]
+
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pandas as pd
+
+class LazyFrame:
+    """
+    Read-only view on columns that are only loaded on access, supporting the
+    part of the pandas DataFrame interface used by the GUI. The loader
+    returns the values of a column as numpy array.
+    """
+    def __init__(self, columns, loader, num_rows):
+        self.columns = pd.Index(columns)
+        self.index = pd.RangeIndex(num_rows)
+        self.loader = loader
+        # row labels equal row positions for a RangeIndex
+        self.iloc = RowIndexer(self)
+        self.loc = self.iloc
+
+    def __getitem__(self, name):
+        if name not in self.columns:
+            raise KeyError(name)
+        return pd.Series(self.loader(name), index=self.index, name=name,
+                         copy=False)
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def shape(self):
+        return (len(self.index), len(self.columns))
+
+    @property
+    def empty(self):
+        return len(self.index) == 0 or len(self.columns) == 0
+
+    def get_row(self, ind):
+        return pd.Series([self.loader(name)[ind] for name in self.columns],
+                         index=self.columns, name=ind, dtype=object)
+
+    def to_frame(self, columns=None):
+        if columns is None:
+            columns = self.columns
+        return pd.DataFrame(dict((name, self.loader(name)) for name in columns),
+                            index=self.index)
+
+class RowIndexer:
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __getitem__(self, ind):
+        return self.frame.get_row(ind)
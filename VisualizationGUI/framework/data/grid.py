@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Grid-aware loading of evaluation results
+
+Row i of Results.txt is combination i of the cartesian product of the
+evaluation parameters (the parameterID), with the last parameter varying
+fastest. The parameter columns are therefore generated from
+ParameterFiles/EvaluationParameterSet.json with mixed radix arithmetic,
+treating every element of an array parameter as a digit of its own, and
+only the objective values are parsed from Results.txt.
+"""
+
+from . import parser
+from .. import trace
+
+import json
+import numpy as np
+import pandas as pd
+
+PARAMETER_FILE = "EvaluationParameterSet.json"
+
+class ParameterGrid:
+    def __init__(self, parameters):
+        self.parameters = parameters
+        # digits of the mixed radix representation of a parameterID
+        self.digit_names = []
+        self.digit_values = []
+        # parameter the digit belongs to
+        self.digit_fields = []
+        self.array_names = []
+        for param in parameters:
+            name = "{} [{}]".format(param["selectedVariable"],
+                                    param["selectedVariableUnit"])
+            type_string = param["selectedVariableTypeString"]
+            settings = param["variableSettings"]
+            if type_string == "System.Boolean":
+                self.add_digit(name, ["True", "False"], name)
+            elif type_string in ("System.Int32", "System.Single"):
+                self.add_digit(name, get_range(settings, type_string), name)
+            elif type_string in ("System.Int32[]", "System.Single[]"):
+                element_type = type_string[:-2]
+                size = param["selectedVariableSize"]
+                self.array_names.append(name)
+                for element_name, element_settings in zip(
+                        parser.get_element_names(name, size), settings[:size]):
+                    self.add_digit(element_name, get_range(element_settings,
+                                                           element_type), name)
+            else:
+                raise ValueError("Unknown parameter type {}".format(type_string))
+
+        self.names = ["{} [{}]".format(param["selectedVariable"],
+                                       param["selectedVariableUnit"])
+                      for param in parameters]
+        self.radices = np.array([len(values) for values in self.digit_values],
+                                dtype=np.int64)
+        # number of rows until a digit changes its value
+        self.strides = np.ones(len(self.radices), dtype=np.int64)
+        for i in range(len(self.radices) - 2, -1, -1):
+            self.strides[i] = self.strides[i+1]*self.radices[i+1]
+        self.num_combinations = int(np.prod(self.radices))
+
+    def add_digit(self, name, strings, field):
+        self.digit_names.append(name)
+        self.digit_values.append(strings)
+        self.digit_fields.append(field)
+
+    def get_level_indices(self, row_id):
+        """ Level of every parameter column of the given parameterID. """
+        levels = (row_id // self.strides) % self.radices
+        return dict(zip(self.digit_names, levels.tolist()))
+
+    def get_parameter_strings(self, row_id):
+        """ Fields of the given parameterID as written to Results.txt. """
+        levels = self.get_level_indices(row_id)
+        fields = dict((name, []) for name in self.names)
+        for name, values, field in zip(self.digit_names, self.digit_values,
+                                       self.digit_fields):
+            fields[field].append(values[levels[name]])
+        return [",".join(fields[name]) for name in self.names]
+
+    def get_row_id(self, level_indices):
+        return int(sum(level_indices[name]*stride for name, stride
+                       in zip(self.digit_names, self.strides.tolist())))
+
+    def get_column(self, i):
+        """ Column of the i-th digit for all combinations. """
+        strings = self.digit_values[i]
+        if strings == ["True", "False"]:
+            values = np.array([True, False])
+        elif self.digit_names[i] not in self.names:
+            # array elements are always parsed as floats
+            values = np.array(strings, dtype=np.float64)
+        else:
+            # same dtype inference as parsing the file, e.g. int for "1"
+            values = pd.to_numeric(pd.Series(strings)).to_numpy()
+        stride = int(self.strides[i])
+        repeats = self.num_combinations // (stride*len(strings))
+        return np.tile(np.repeat(values, stride), repeats)
+
+    def get_columns(self):
+        return dict((name, self.get_column(i))
+                    for i, name in enumerate(self.digit_names))
+
+def get_path_to_parameter_file(objectives_file):
+    return objectives_file.parents[1] / "ParameterFiles" / PARAMETER_FILE
+
+def load_parameter_grid(objectives_file):
+    """ ParameterGrid of an evaluation, None if it cannot be determined. """
+    try:
+        with get_path_to_parameter_file(objectives_file).open(encoding="utf-8-sig") as param_file:
+            return ParameterGrid(json.load(param_file))
+    except (OSError, ValueError, KeyError, TypeError, IndexError):
+        return None
+
+def get_range(settings, type_string):
+    # mirrors RangeArray of the Evaluation Framework (EvaluationData.cs),
+    # including the accumulation in single precision for floats
+    if type_string == "System.Int32":
+        minimum, maximum, step = (int(val) for val in settings)
+        to_string = str
+    else:
+        minimum, maximum, step = (np.float32(val) for val in settings)
+        to_string = lambda val: np.format_float_positional(val, unique=True,
+                                                           trim='-')
+    if not step > 0:
+        raise ValueError("Step of parameter range must be positive")
+
+    values = []
+    i = minimum
+    while i <= maximum:
+        values.append(to_string(i))
+        i = i + step
+    # maximum is always the last value
+    if i != maximum + step:
+        values.append(to_string(maximum))
+    return values
+
+@trace.traced()
+def parse_file(objectives_file):
+    """
+    Same return value as parser.parse_file. Falls back to parsing the whole
+    file if the parameter grid does not match the results.
+    """
+    parameter_grid = load_parameter_grid(objectives_file)
+    if parameter_grid is None:
+        return parser.parse_file(objectives_file)
+
+    with objectives_file.open("rb") as results:
+        evaluation_parameter_names, objective_value_names = \
+            parser.parse_header(results.readline())
+        body = results.read()
+    if evaluation_parameter_names != parameter_grid.names or \
+       not matches_rows(parameter_grid, body):
+        return parser.parse_file(objectives_file)
+
+    num_objectives = len(objective_value_names)
+    objectives = parser.read_body(body, evaluation_parameter_names +
+                                  objective_value_names,
+                                  usecols=objective_value_names)
+    (_, objective_value_names), array_names, objectives = parser.expand_array_columns(
+        objectives, [], objective_value_names)
+
+    columns = parameter_grid.get_columns()
+    columns.update((name, objectives[name].to_numpy()) for name in objectives.columns)
+    data = pd.DataFrame(columns, index=pd.RangeIndex(parameter_grid.num_combinations))
+
+    # expanded array parameters are listed last, as by the parser
+    param_names = ([name for name in parameter_grid.digit_names
+                    if name in parameter_grid.names] +
+                   [name for name in parameter_grid.digit_names
+                    if name not in parameter_grid.names])
+    dimensions = (len(data.index), len(evaluation_parameter_names), num_objectives)
+    return (dimensions, (param_names, objective_value_names),
+            parameter_grid.array_names + array_names, data)
+
+def matches_rows(parameter_grid, body, num_samples=64):
+    """
+    Compare the number of rows and a sample of rows spread evenly across the
+    file, including the first and the last one, with the grid.
+    """
+    body = body.rstrip(b"\r\n")
+    # start of every row, only the sampled ones are decoded
+    starts = np.flatnonzero(np.frombuffer(body, dtype=np.uint8) == ord("\n")) + 1
+    starts = np.insert(starts, 0, 0)
+    if len(starts) != parameter_grid.num_combinations:
+        return False
+    row_ids = np.unique(np.linspace(0, parameter_grid.num_combinations - 1,
+                                    num_samples).astype(np.int64))
+    for row_id in row_ids.tolist():
+        stop = starts[row_id + 1] - 1 if row_id + 1 < len(starts) else len(body)
+        line = body[starts[row_id]:stop]
+        fields = line.decode("utf-8").strip().split("|")[0].split(";")
+        if len(fields) != len(parameter_grid.names):
+            return False
+        expected = parameter_grid.get_parameter_strings(row_id)
+        for field, expected_field in zip(fields, expected):
+            values = field.split(",")
+            expected_values = expected_field.split(",")
+            if len(values) != len(expected_values) or \
+               not all(is_same_value(a, b) for a, b in zip(values, expected_values)):
+                return False
+    return True
+
+def is_same_value(a, b):
+    try:
+        return float(a) == float(b)
+    except ValueError:
+        return a == b
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Re-evaluated rows kept next to the results
+
+Results.txt belongs to the Evaluation Framework and is never rewritten.
+Lines of re-evaluated solutions are stored in Results.rerun.txt instead,
+keyed by their row (row i is parameterID i) and by the key of the
+Results.txt they were made for, so they are dropped once the evaluation is
+run again. Loaders apply their objective values on top of the parsed,
+cached or memory-mapped columns, which keep describing Results.txt alone.
+"""
+
+from . import parser
+from . import cache
+
+import json
+import numpy as np
+
+def get_overlay_path(objectives_file):
+    return objectives_file.with_name(objectives_file.stem + ".rerun.txt")
+
+def read_lines(objectives_file):
+    """ Lines {row: line} of the overlay, empty if there is none or it is stale. """
+    try:
+        with get_overlay_path(objectives_file).open("rb") as overlay:
+            key = json.loads(overlay.readline().decode("utf-8"))
+            header = overlay.readline()
+            lines = {}
+            for line in overlay:
+                row, line = line.rstrip(b"\r\n").split(b"\t", 1)
+                lines[int(row)] = line
+        if not cache.matches_key(key, cache.get_file_key(objectives_file), 
+                                 objectives_file):
+            return {}
+        with objectives_file.open("rb") as results:
+            if results.readline() != header:
+                return {}
+    except (OSError, ValueError, KeyError):
+        return {}
+    return lines
+
+def write_lines(objectives_file, lines):
+    """
+    Add the lines {row: line} to the overlay, replacing older lines of their
+    rows. The parameters of a line must match those of its row.
+    """
+    found = set()
+    with objectives_file.open("rb") as results:
+        header = results.readline()
+        for row, line in enumerate(results):
+            if row in lines:
+                if lines[row].split(b"|", 1)[0] != line.split(b"|", 1)[0]:
+                    raise ValueError("Parameters of parameterID {} differ "
+                                     "from Results.txt".format(row))
+                found.add(row)
+    missing = set(lines) - found
+    if missing:
+        raise ValueError("Results.txt has no rows {}".format(sorted(missing)))
+    
+    merged = read_lines(objectives_file)
+    merged.update(lines)
+    key = dict(cache.get_file_key(objectives_file), 
+               hash=cache.get_content_hash(objectives_file))
+    content = [json.dumps(key).encode("utf-8") + b"\n", header]
+    content.extend(b"%d\t%s\n" % (row, merged[row]) for row in sorted(merged))
+    cache.write_atomic(get_overlay_path(objectives_file), b"".join(content))
+
+def get_names(objectives_file):
+    """ Array names and column names of Results.txt, from its first row. """
+    with objectives_file.open("rb") as results:
+        header = results.readline()
+        line = results.readline()
+    (param_names, objective_names), array_names, _ = parser.parse_body(
+        line, *parser.parse_header(header))
+    return array_names, list(param_names) + list(objective_names)
+
+def parse_rows(objectives_file, lines, array_names=None, names=None):
+    """ 
+    Objective columns of the lines {row: line}, indexed by row. Arrays are
+    split into as many elements as in names.
+    """
+    if names is None:
+        array_names, names = get_names(objectives_file)
+    evaluation_parameter_names, objective_value_names = \
+        parser.read_header(objectives_file)
+    array_widths = dict((array_name, len(parser.find_element_names(array_name, 
+                                                                   names)))
+                        for array_name in array_names)
+    rows = sorted(lines)
+    body = b"\n".join(lines[row] for row in rows) + b"\n"
+    (_, objective_names), _, data = parser.parse_body(body, 
+                                                      evaluation_parameter_names,
+                                                      objective_value_names, 
+                                                      array_widths=array_widths)
+    data = data[objective_names]
+    data.index = rows
+    return data
+
+def get_rows(objectives_file, array_names=None, names=None):
+    """ Objective columns of the overlay indexed by row, None if it is empty. """
+    lines = read_lines(objectives_file)
+    if not lines:
+        return None
+    return parse_rows(objectives_file, lines, array_names, names)
+
+def apply_column(column, rows, name):
+    """ Copy of a column with the values of the overlay rows. """
+    values = rows[name].to_numpy()
+    column = np.array(column, dtype=np.result_type(np.asarray(column).dtype, 
+                                                   values.dtype))
+    column[rows.index.to_numpy()] = values
+    return column
+
+def apply(data, rows):
+    """ Replace the overlay rows of the columns of a DataFrame. """
+    if rows is not None:
+        for name in rows.columns:
+            if name in data.columns:
+                data[name] = apply_column(data[name].to_numpy(), rows, name)
+    return data
+
+def apply_columns(columns, rows):
+    """ Replace the overlay rows of a dictionary of columns. """
+    if rows is None:
+        return columns
+    return dict((name, apply_column(column, rows, name) if name in rows.columns 
+                 else column) for name, column in columns.items())
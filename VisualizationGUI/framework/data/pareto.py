@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Pareto fronts of objective values
+
+All objectives are turned into minimization (maximized ones are negated).
+For two objectives, the front is found by a sweep over the points sorted by
+the first objective. For more objectives, the points are sorted by the sum
+of their objective values, so no point can be dominated by a later one. The
+front of each block of points is final and removes all remaining points it
+dominates (blocked sort-filter skyline, O(n*front size)). Rows with missing
+objective values (failed executions) are never part of a front.
+"""
+
+import hashlib
+import collections
+import numpy as np
+
+MINIMIZE = 1
+MAXIMIZE = -1
+# points compared at once by the skyline algorithm
+BLOCK_SIZE = 256
+# number of fronts kept by a ParetoEngine
+CACHE_SIZE = 8
+
+def get_front(values):
+    """ Positions of the non-dominated rows of values (minimization). """
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.flatnonzero(~np.isnan(values).any(axis=1))
+    if values.shape[1] == 1:
+        column = values[valid, 0]
+        front = valid[column == column.min()] if len(valid) else valid
+    elif values.shape[1] == 2:
+        front = valid[get_front_2d(values[valid])]
+    else:
+        front = valid[get_front_skyline(values[valid])]
+    return np.sort(front)
+
+def get_front_2d(values):
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    # by x, ties by y (two stable sorts are faster than np.lexsort)
+    order = np.argsort(values[:, 1], kind="stable")
+    order = order[np.argsort(values[order, 0], kind="stable")]
+    x = values[order, 0]
+    y = values[order, 1]
+    # smallest y of all points before, i.e. with smaller or equal x
+    running_min = np.minimum.accumulate(y)
+    previous_min = np.concatenate([[np.inf], running_min[:-1]])
+    improves = y < previous_min
+    # duplicates of a point on the front are not dominated by it
+    owner = np.maximum.accumulate(np.where(improves, np.arange(len(y)), 0))
+    previous_owner = np.concatenate([[0], owner[:-1]])
+    duplicate = (y == previous_min) & (x == x[previous_owner])
+    return order[improves | duplicate]
+
+def get_front_skyline(values, block_size=BLOCK_SIZE):
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    sums = values.sum(axis=1)
+    order = np.argsort(sums, kind="stable")
+    remaining = values[order]
+    front = []
+    while len(order):
+        block = remaining[:block_size]
+        # earlier points cannot be dominated by later ones, so the front of
+        # the block is final
+        keep = ~dominated_by(block, block)
+        front.append(order[:block_size][keep])
+        order, remaining = order[block_size:], remaining[block_size:]
+        # each point of it removes all remaining points it dominates
+        for point in block[keep]:
+            if not len(order):
+                break
+            keep = (remaining < point).any(axis=1) | (remaining == point).all(axis=1)
+            order, remaining = order[keep], remaining[keep]
+    front = np.concatenate(front)
+    # a point may precede a point dominating it if their sums are rounded
+    # to the same value, which is only possible for points of equal sum
+    _, inverse, counts = np.unique(sums[front], return_inverse=True,
+                                   return_counts=True)
+    tied = front[counts[inverse] > 1]
+    if len(tied):
+        dominated = tied[dominated_by(values[tied], values[tied])]
+        front = np.setdiff1d(front, dominated, assume_unique=True)
+    return front
+
+def dominated_by(candidates, values, max_size=2**20):
+    """ Mask of the rows of values dominated by any row of candidates. """
+    dominated = np.zeros(len(values), dtype=bool)
+    chunk_size = max(1, max_size//max(1, len(values)*values.shape[1]))
+    for start in range(0, len(candidates), chunk_size):
+        chunk = candidates[start:start+chunk_size, None, :]
+        dominates = (chunk <= values[None]).all(axis=2) & \
+                    (chunk < values[None]).any(axis=2)
+        dominated |= dominates.any(axis=0)
+    return dominated
+
+def get_layers(values, num_layers=1):
+    """ Positions of the rows of the first num_layers non-dominated ranks. """
+    remaining = np.arange(len(values))
+    layers = []
+    for _ in range(num_layers):
+        if len(remaining) == 0:
+            break
+        front = remaining[get_front(values[remaining])]
+        if len(front) == 0:
+            break
+        layers.append(front)
+        remaining = np.setdiff1d(remaining, front, assume_unique=True)
+    return layers
+
+class ParetoEngine:
+    """
+    Rank layers of the selected rows, cached per selection, objectives and
+    directions.
+    """
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()
+
+    def get_layers(self, data, mask, directions, num_layers=1):
+        """
+        Rows of the first num_layers ranks among the rows of mask, with
+        directions mapping objective names to MINIMIZE or MAXIMIZE.
+        """
+        objectives = tuple(sorted(directions.items()))
+        key = (hashlib.blake2b(np.packbits(mask).tobytes(), digest_size=16).digest(),
+               len(mask), objectives, num_layers)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        rows = np.flatnonzero(mask)
+        values = np.column_stack([np.asarray(data[name].to_numpy()[rows],
+                                             dtype=np.float64)*direction
+                                  for name, direction in objectives])
+        layers = [rows[layer] for layer in get_layers(values, num_layers)]
+        self.cache[key] = layers
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return layers
@@ -17,10 +17,15 @@ limitations under the License.
 """
 
 import definitions
-import csv
+from .. import trace
+import io
+import itertools
 import pandas as pd
 import numpy as np
 
+# number of rows parsed at once when reading Results.txt in chunks
+CHUNK_SIZE = 100000
+
 def get_path_to_root():
     return definitions.ROOT_DIR
 
@@ -34,82 +39,162 @@ def get_path_to_objectives(evaluation_name, use_ROS):
     framework_root = parent / sub_dirs[0] / sub_dirs[1] / sub_dirs[2]
     return framework_root.joinpath("Results")
 
+@trace.traced()
 def parse_data(evaluation_name, use_ROS):
     goal_dir = get_path_to_objectives(evaluation_name, use_ROS)
     objectives_file = goal_dir / "Results.txt"
+    return parse_file(objectives_file)
+
+@trace.traced()
+def parse_file(objectives_file):
+    # single pass over the file: header line first, remaining bytes as body
+    with objectives_file.open("rb") as results:
+        evaluation_parameter_names, objective_value_names = \
+            parse_header(results.readline())
+        body = results.read()
     
-    # read first line to get headers
-    with objectives_file.open(encoding="utf-8") as csv_file: 
-        csv_reader = csv.reader(csv_file, delimiter='|')
-        columns = next(csv_reader)
-        evaluation_parameter_names = columns[0].split(";")
-        num_params = len(evaluation_parameter_names)
-        objective_value_names = columns[1].split(";")
-        num_objectives = len(objective_value_names)
-                
-    # read whole content into pandas dataframe ;|[|]
-    data = pd.read_csv(objectives_file, sep="[;|]", engine='python',
-                       encoding="utf-8")
-    num_values = len(data.index)
-        
-    # handle array variables in evaluation parameters
-    names_to_remove = []
-    for evalparam in evaluation_parameter_names:
-        if type(data[evalparam].iloc[0]) != str:
-            continue
-        else:
-            temp = pd.DataFrame([[float(idx) for idx in p.split(",")] 
-                     for p in data[evalparam]])
-            param, unit = evalparam.split(" ")
-            columns = [param+str(i+1)+" "+unit for i in range(0, len(temp.columns))]
-            temp.columns = columns
-            evaluation_parameter_names.extend(columns)
-            
-            # inserting column with static value in data frame 
-            loc = data.columns.get_loc(evalparam)
-            for i, col in enumerate(columns):
-                data.insert(loc+i, col, temp[col]) 
-            
-            # delete old series
-            del data[evalparam]
-            names_to_remove.append(evalparam)
-    
-    evaluation_parameter_names = [name for name in evaluation_parameter_names
-                                  if name not in names_to_remove]
+    num_params = len(evaluation_parameter_names)
+    num_objectives = len(objective_value_names)
     
-    array_names = names_to_remove
+    param_names, array_names, data = parse_body(body, evaluation_parameter_names,
+                                                objective_value_names)
     
-    # handle array variables in objective values
-    names_to_remove = []
-    for objval in objective_value_names:
-        if type(data[objval].iloc[0]) != str:
+    dimensions = (len(data.index), num_params, num_objectives)
+    return dimensions, param_names, array_names, data
+
+def iter_chunks(objectives_file, chunk_size=CHUNK_SIZE):
+    """ 
+    Parse Results.txt in chunks of rows. Yields the tuple (param_names, 
+    array_names, data, position) for every chunk, position being the number
+    of bytes read so far.
+    """
+    with objectives_file.open("rb") as results:
+        evaluation_parameter_names, objective_value_names = \
+            parse_header(results.readline())
+        array_widths = {}
+        columns = None
+        first_row = 0
+        while True:
+            body = b"".join(itertools.islice(results, chunk_size))
+            if not body and columns is not None:
+                return
+            param_names, array_names, data = parse_body(body, 
+                                                        evaluation_parameter_names,
+                                                        objective_value_names,
+                                                        first_row, array_widths)
+            if columns is None:
+                columns = list(data.columns)
+            elif list(data.columns) != columns:
+                raise ValueError("Columns of {} changed after row {}".format(
+                    objectives_file, first_row))
+            first_row += len(data.index)
+            yield param_names, array_names, data, results.tell()
+
+def read_header(objectives_file):
+    with objectives_file.open("rb") as results:
+        return parse_header(results.readline())
+
+def parse_header(line):
+    columns = line.decode("utf-8-sig").rstrip("\r\n").split("|")
+    evaluation_parameter_names = columns[0].split(";")
+    objective_value_names = columns[1].split(";")
+    return evaluation_parameter_names, objective_value_names
+
+def parse_body(body, evaluation_parameter_names, objective_value_names, 
+               first_row=0, array_widths=None):
+    data = read_body(body, evaluation_parameter_names + objective_value_names)
+    data.index = pd.RangeIndex(first_row, first_row + len(data.index))
+    return expand_array_columns(data, evaluation_parameter_names, 
+                                objective_value_names, array_widths)
+
+def read_body(body, names, usecols=None):
+    if not body.strip():
+        return pd.DataFrame(columns=names if usecols is None else usecols)
+    # parameters and objectives are only separated by "|", which allows
+    # the single character separator of pandas' C tokenizer
+    return pd.read_csv(io.BytesIO(body.replace(b"|", b";")), sep=";", 
+                       header=None, names=names, usecols=usecols,
+                       index_col=False, engine="c", encoding="utf-8", 
+                       float_precision="high")
+
+def expand_array_columns(data, evaluation_parameter_names, objective_value_names,
+                         array_widths=None):
+    """
+    Split array variables, i.e. comma separated values within one field, 
+    into one column per element. array_widths maps names of array columns to
+    their number of elements. It is used to split chunks of a file 
+    consistently and is filled in with newly detected array columns.
+    """
+    if array_widths is None:
+        array_widths = {}
+    columns = {}
+    expanded_params = []
+    expanded_objectives = []
+    array_names = []
+    for name in evaluation_parameter_names + objective_value_names:
+        if data.empty or (name not in array_widths and 
+                          pd.api.types.is_numeric_dtype(data[name])):
+            columns[name] = data[name]
             continue
+        
+        block = split_array_column(data[name], array_widths.get(name))
+        array_widths[name] = block.shape[1]
+        element_names = get_element_names(name, block.shape[1])
+        for i, element_name in enumerate(element_names):
+            columns[element_name] = block[:, i]
+        
+        if name in evaluation_parameter_names:
+            expanded_params.extend(element_names)
         else:
-            temp = pd.DataFrame([[float(idx) for idx in p.split(",")] 
-                      for p in data[objval]])
-            param, unit = objval.split(" ")
-            columns = [param+str(i+1)+" "+unit for i in range(0, len(temp.columns))]
-            temp.columns = columns
-            objective_value_names.extend(columns)
-            
-            # inserting column with static value in data frame 
-            loc = data.columns.get_loc(objval)
-            for i, col in enumerate(columns):
-                data.insert(loc+i, col, temp[col]) 
-            
-            # delete old series
-            del data[objval]
-            names_to_remove.append(objval)
-            
-    objective_value_names = [name for name in objective_value_names
-                             if name not in names_to_remove]
+            expanded_objectives.extend(element_names)
+        array_names.append(name)
     
-    array_names.extend(names_to_remove)
+    if array_names:
+        data = pd.DataFrame(columns, index=data.index)
     
-    # round values to 5 decimal places
-    data = data.round(8)
-        
-    dimensions = (num_values, num_params, num_objectives)
+    evaluation_parameter_names = [name for name in evaluation_parameter_names
+                                  if name not in array_names] + expanded_params
+    objective_value_names = [name for name in objective_value_names
+                             if name not in array_names] + expanded_objectives
     param_names = (evaluation_parameter_names, objective_value_names)
-    
-    return dimensions, param_names, array_names, data    
+    return param_names, array_names, data
+
+def get_element_names(array_name, width):
+    param, unit = array_name.split(" ")
+    return [param+str(i+1)+" "+unit for i in range(0, width)]
+
+def find_element_names(array_name, names):
+    """ Expanded elements of an array variable among names. """
+    param, unit = array_name.split(" ")
+    return [name for name in names if name.startswith(param) and
+            name.endswith(" " + unit) and name[len(param):-len(unit)-1].isdigit()]
+
+def read_array_column(objectives_file, array_name):
+    """ Parse the elements of a single array variable again. """
+    with objectives_file.open("rb") as results:
+        evaluation_parameter_names, objective_value_names = \
+            parse_header(results.readline())
+        body = results.read()
+    column = read_body(body, evaluation_parameter_names + objective_value_names,
+                       usecols=[array_name])[array_name]
+    return split_array_column(column)
+
+def split_array_column(column, width=None):
+    """ Split comma separated values of a column into a (rows, width) block. """
+    lines = column.fillna("NaN").astype(str).tolist()
+    text = "\n".join(lines)
+    if width is None:
+        # arrays have a fixed size, only rows of failed executions are 
+        # shorter, since they hold a single "NaN" (and are padded)
+        width = max(line.count(",") for line in lines[:1000]) + 1
+        try:
+            return read_array_block(text, width)
+        except pd.errors.ParserError:
+            width = max(line.count(",") for line in lines) + 1
+    return read_array_block(text, width)
+
+def read_array_block(text, width):
+    block = pd.read_csv(io.StringIO(text), sep=",", header=None,
+                        names=range(width), index_col=False, engine="c", 
+                        dtype=np.float64, float_precision="high")
+    return block.to_numpy()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Quantile levels of continuous columns
+
+Objective values hardly ever repeat, so one level per distinct value gives
+sliders with as many positions as rows. Columns with more distinct values
+than MAX_LEVELS get MAX_LEVELS levels starting at quantiles of their values
+instead; a value belongs to the last level starting at or below it. Both the
+sliders and the selection index use these levels, so slider positions stay
+levels of the selection index.
+"""
+
+import numpy as np
+
+# positions of a slider of a continuous column
+MAX_LEVELS = 256
+
+def get_levels(values, max_levels=MAX_LEVELS):
+    """
+    Sorted start values of the quantile levels of a numeric array, NaN
+    excluded. None if it has at most max_levels distinct values, which are
+    its levels then.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind not in "fiu":
+        return None
+    finite = np.sort(values[~np.isnan(values)])
+    if len(finite) == 0 or \
+       np.count_nonzero(finite[1:] != finite[:-1]) < max_levels:
+        return None
+    positions = np.linspace(0, len(finite) - 1, max_levels).astype(np.int64)
+    return np.unique(finite[positions])
+
+def get_codes(values, levels):
+    """ Level of every value, -1 if missing like the codes of a Categorical. """
+    values = np.asarray(values)
+    # the first level is the minimum, so every value has a level
+    codes = np.searchsorted(levels, values, side="right") - 1
+    codes[np.isnan(values)] = -1
+    return codes
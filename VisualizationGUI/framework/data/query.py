@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Queries on evaluation results without the GUI
+
+Predicates like "Time [s] <= 10" are evaluated vectorized on the columns of
+the loaded data (a DataFrame or the LazyFrame of an EvaluationStore). On
+dictionary-encoded columns, only the value table is compared and the result
+is looked up by the codes.
+"""
+
+from . import compact
+
+import re
+import operator
+import numpy as np
+import pandas as pd
+
+OPERATORS = {"<=": operator.le, ">=": operator.ge, "==": operator.eq,
+             "!=": operator.ne, "<": operator.lt, ">": operator.gt,
+             "=": operator.eq}
+PREDICATE_PATTERN = re.compile(r"^(.+?)\s*(<=|>=|==|!=|<|>|=)\s*(.+)$")
+
+class Predicate:
+    def __init__(self, name, op, value):
+        if op not in OPERATORS:
+            raise ValueError("Unknown operator {}".format(op))
+        self.name = name
+        self.op = op
+        self.value = value
+
+    def evaluate(self, column):
+        """ Boolean mask of the rows of column fulfilling the predicate. """
+        compare = OPERATORS[self.op]
+        if compact.is_encoded(column):
+            levels = np.asarray(compact.get_levels(column))
+            # last entry for missing values, i.e. code -1
+            passing = np.append(compare(levels, self.value), False)
+            return passing[compact.get_codes(column)]
+        return np.asarray(compare(column.to_numpy(), self.value), dtype=bool)
+
+    def __repr__(self):
+        return "{} {} {}".format(self.name, self.op, self.value)
+
+def parse_predicate(text):
+    """ Predicate of a string like "Time [s] <= 10" or "Active [] == True". """
+    match = PREDICATE_PATTERN.match(text.strip())
+    if match is None:
+        raise ValueError("Invalid predicate {}".format(text))
+    name, op, value = match.groups()
+    return Predicate(name.strip(), op, parse_value(value.strip()))
+
+def parse_value(text):
+    if text in ("True", "False"):
+        return text == "True"
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+def filter_rows(data, predicates):
+    """ Positions of the rows fulfilling all predicates. """
+    mask = np.ones(len(data.index), dtype=bool)
+    for predicate in predicates:
+        if predicate.name not in data.columns:
+            raise KeyError("Unknown column {}".format(predicate.name))
+        mask &= predicate.evaluate(data[predicate.name])
+    return np.flatnonzero(mask)
+
+def sort_rows(data, rows, sort_by, descending=False, limit=None):
+    """ Sort the rows by the values of the given columns, NaN last. """
+    if not sort_by:
+        return rows[:limit]
+    keys = []
+    # lexsort sorts by the last key first
+    for name in reversed(sort_by):
+        column = data[name]
+        if compact.is_encoded(column):
+            values = compact.get_codes(column)[rows].astype(np.float64)
+            values[values < 0] = np.nan
+        else:
+            values = np.asarray(column.to_numpy()[rows], dtype=np.float64)
+        if descending:
+            values = -values
+        keys.append(values)
+    if limit is not None and 0 < limit < len(rows):
+        # only rows up to the limit-th value of the first key need sorting
+        kth = np.partition(keys[-1], limit - 1)[limit - 1]
+        if not np.isnan(kth):
+            candidates = keys[-1] <= kth
+            rows = rows[candidates]
+            keys = [values[candidates] for values in keys]
+    return rows[np.lexsort(keys)][:limit]
+
+def run_query(data, predicates=(), sort_by=(), descending=False, limit=None):
+    """ Positions of the rows fulfilling all predicates, in sort order. """
+    return sort_rows(data, filter_rows(data, predicates), sort_by, descending,
+                     limit)
+
+def get_parameter_ids(rows, parameter_ids=None):
+    """ parameterIDs of rows, which are the rows themselves for one evaluation. """
+    if parameter_ids is None:
+        return rows
+    return np.asarray(parameter_ids)[rows]
+
+def get_frame(data, rows, columns=None, parameter_ids=None):
+    """ Compact frame of the given rows and columns, indexed by parameterID. """
+    if columns is None:
+        columns = list(data.columns)
+    index = pd.Index(get_parameter_ids(rows, parameter_ids), name="parameterID")
+    return pd.DataFrame(dict((name, data[name].values[rows]) for name in columns),
+                        index=index)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Selection of rows by ranges of column values
+
+Every filtered column gets an inverted index, i.e. the rows of each level
+(sorted distinct value, or quantile of continuous columns) stored
+contiguously. Missing values form the last
+level, just like NaN in np.unique. For every row, the number of filters it
+fails is counted, so changing the range of one filter only touches the rows
+of the levels entering or leaving the range.
+"""
+
+from . import compact
+from . import quantiles
+
+import numpy as np
+import pandas as pd
+
+class ColumnIndex:
+    def __init__(self, column):
+        if compact.is_encoded(column):
+            codes = compact.get_codes(column).astype(np.int64)
+            num_values = len(compact.get_levels(column))
+        else:
+            values = column.to_numpy()
+            levels = quantiles.get_levels(values)
+            if levels is not None:
+                codes = quantiles.get_codes(values, levels)
+                num_values = len(levels)
+            else:
+                categorical = pd.Categorical(column)
+                codes = np.asarray(categorical.codes, dtype=np.int64)
+                num_values = len(categorical.categories)
+        codes[codes < 0] = num_values
+        self.num_levels = num_values + 1
+        self.num_rows = len(codes)
+        self.codes = codes.astype(np.min_scalar_type(self.num_levels))
+        # posting lists: rows of level i are rows[offsets[i]:offsets[i+1]]
+        self.rows = np.argsort(codes, kind="stable")
+        self.offsets = np.zeros(self.num_levels + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=self.num_levels),
+                  out=self.offsets[1:])
+
+    def get_rows(self, lower, upper):
+        """ Rows of the levels lower to upper (inclusive). """
+        return self.rows[self.offsets[lower]:self.offsets[upper+1]]
+    
+    def get_codes(self):
+        """ Level of every row, missing values being the last level. """
+        return self.codes
+
+class SelectionEngine:
+    def __init__(self, data):
+        self.data = data
+        self.num_rows = len(data.index)
+        self.indexes = {}
+        # level range passing the filter of every filtered column
+        self.ranges = {}
+        self.fail_counts = np.zeros(self.num_rows, dtype=np.int32)
+        self.mask = np.ones(self.num_rows, dtype=bool)
+        # incremented on every change of the selection
+        self.version = 0
+
+    def get_index(self, name):
+        if name not in self.indexes:
+            self.indexes[name] = ColumnIndex(self.data[name])
+        return self.indexes[name]
+
+    def set_range(self, name, lower, upper):
+        """
+        Let the rows with the levels lower to upper of a column pass, e.g.
+        the indices of the slider positions. Returns the rows added to and
+        removed from the selection.
+        """
+        index = self.get_index(name)
+        lower, upper = sorted((lower, upper))
+        full_range = (0, index.num_levels - 1)
+        old_range = self.ranges.get(name, full_range)
+        removed = []
+        added = []
+        for levels in get_difference(old_range, (lower, upper)):
+            rows = index.get_rows(*levels)
+            removed.append(rows[self.mask[rows]])
+            self.fail_counts[rows] += 1
+            self.mask[rows] = False
+        for levels in get_difference((lower, upper), old_range):
+            rows = index.get_rows(*levels)
+            self.fail_counts[rows] -= 1
+            self.mask[rows] = self.fail_counts[rows] == 0
+            added.append(rows[self.mask[rows]])
+        if (lower, upper) == full_range:
+            self.ranges.pop(name, None)
+        else:
+            self.ranges[name] = (lower, upper)
+        if (lower, upper) != old_range:
+            self.version += 1
+        return join_rows(added), join_rows(removed)
+
+    def reset(self, name):
+        if name in self.ranges:
+            return self.set_range(name, 0, self.indexes[name].num_levels - 1)
+        return join_rows([]), join_rows([])
+
+    def get_mask(self):
+        return self.mask
+
+    def get_selected(self):
+        return np.flatnonzero(self.mask)
+
+    def get_deselected(self):
+        return np.flatnonzero(~self.mask)
+
+def join_rows(rows):
+    if not rows:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate(rows)
+
+def get_difference(range_a, range_b):
+    """ Level ranges in range_a, but not in range_b. """
+    difference = []
+    if range_a[0] < range_b[0]:
+        difference.append((range_a[0], min(range_a[1], range_b[0] - 1)))
+    if range_a[1] > range_b[1]:
+        difference.append((max(range_a[0], range_b[1] + 1), range_a[1]))
+    return difference
@@ -17,44 +17,388 @@ limitations under the License.
 """
 
 from . import parser
+from . import cache
+from . import columnstore
+from . import compact
+from . import grid
+from . import compare
+from . import overlay
+from .frame import LazyFrame
+from .stream import ChunkStream
+from .follow import ResultsFollower
+
+import time
+import collections
+import numpy as np
+import pandas as pd
+
+# bytes of lazily materialized columns kept in memory
+MEMORY_BUDGET = 512*2**20
+
+class EvaluationStore:
+    """
+    Results of an evaluation. Elements of array variables and derived
+    columns are only materialized when requested with get_column and kept in
+    a least recently used cache limited by memory_budget; all other columns
+    are held in data.
+    """
+    def __init__(self, evaluation_name, use_ROS, time_scale, float32=False,
+                 memory_budget=MEMORY_BUDGET):
+        self.evaluation_name = evaluation_name
+        self.use_ROS = use_ROS
+        self.time_scale = time_scale
+        self.float32 = float32
+        self.memory_budget = memory_budget
+        self.objectives_file = parser.get_path_to_objectives(evaluation_name, 
+                                                             use_ROS) / "Results.txt"
+        self.use_cache = False
+        self.cache_key = None
+        self.parameter_grid = None
+        self.parameter_ids = None
+        # objective values of re-evaluated rows, replacing those of Results.txt
+        self.overlay_rows = None
+        self.dims = None
+        self.data_names = None
+        self.array_names = []
+        self.data = None
+        # loaders of lazy columns, returning a dict of materialized columns
+        self.sources = {}
+        self.materialized = collections.OrderedDict()
+        self.memory_used = 0
+    
+    def load(self, use_cache=True, rebuild_cache=False, memory_map=False):
+        self.use_cache = use_cache
+        if memory_map:
+            # the column store is persistent, bypassing it means rebuilding it
+            store = columnstore.open_store(self.objectives_file, 
+                                           rebuild_cache or not use_cache)
+            self.dims = store.dims
+            self.data_names = store.data_names
+            self.array_names = store.array_names
+            self.overlay_rows = overlay.get_rows(self.objectives_file, 
+                                                 self.array_names, 
+                                                 store.column_names)
+            if self.overlay_rows is None:
+                self.data = store.get_frame()
+            else:
+                self.data = LazyFrame(store.column_names, 
+                                      self.get_overlay_loader(store), 
+                                      store.num_rows)
+        else:
+            cached = None
+            if use_cache and not rebuild_cache:
+                cached = cache.load(self.objectives_file, lazy_arrays=True)
+            if cached is None:
+                cached = cache.parse_cached(self.objectives_file, use_cache, 
+                                            rebuild_cache, grid.parse_file)
+            self.dims, self.data_names, self.array_names, data = cached
+            self.set_lazy_data(data)
+        self.set_parameter_grid()
+    
+    def start_stream(self, use_cache=True, rebuild_cache=False, 
+                     chunk_size=parser.CHUNK_SIZE):
+        """
+        Load the first chunk of the results only. Returns the stream of 
+        remaining chunks, which are added with append_data, or None if the
+        results were loaded from cache completely.
+        """
+        self.use_cache = use_cache
+        if use_cache and not rebuild_cache:
+            cached = cache.load(self.objectives_file, lazy_arrays=True)
+            if cached is not None:
+                self.dims, self.data_names, self.array_names, data = cached
+                self.set_lazy_data(data)
+                self.set_parameter_grid()
+                return None
+        if use_cache:
+            self.cache_key = cache.get_file_key(self.objectives_file)
+        
+        num_params, num_objectives = (len(names) for names in 
+                                      parser.read_header(self.objectives_file))
+        self.dims = (0, num_params, num_objectives)
+        stream = ChunkStream(self.objectives_file, chunk_size)
+        self.append_data(stream.get_chunks(block=True))
+        return stream
+    
+    def start_follow(self, poll_interval=0.5):
+        """
+        Load the rows of a running evaluation, waiting for the first one.
+        Returns the follower of Results.txt, whose new rows are added with
+        append_data. Followed results are neither cached nor encoded, since
+        they are still changing.
+        """
+        follower = ResultsFollower(self.objectives_file)
+        chunks = follower.poll()
+        if not follower.num_rows:
+            print("Waiting for results in {}".format(self.objectives_file))
+        while not follower.num_rows:
+            time.sleep(poll_interval)
+            chunks += follower.poll()
+            if follower.restarted:
+                follower = ResultsFollower(self.objectives_file)
+                chunks = []
+        num_params, num_objectives = (len(names) for names in follower.header)
+        self.dims = (0, num_params, num_objectives)
+        self.append_data(chunks)
+        return follower
+    
+    def load_comparison(self, evaluations, use_cache=True, rebuild_cache=False):
+        """
+        Load several evaluations, given as (name, use_ROS), joined on their
+        shared evaluation parameters. Solutions are launched in the first
+        evaluation, i.e. the one of this store.
+        """
+        self.use_cache = use_cache
+        labels = compare.get_labels(evaluations)
+        results = compare.load_evaluations(evaluations, use_cache, rebuild_cache)
+        joined, parameter_ids, deltas = compare.join_evaluations(labels, results)
+        self.dims, self.data_names, self.array_names, data = joined
+        self.parameter_ids = parameter_ids[labels[0]]
+        self.data = compact.compact_frame(data, self.data_names[0],
+                                          self.data_names[1], self.float32)
+        for name, minuend, subtrahend in deltas:
+            self.sources[name] = self.get_delta_loader(name, minuend, subtrahend)
+    
+    def append_data(self, chunks):
+        if not chunks:
+            return
+        frames = [data for _, _, data, _ in chunks]
+        if self.data is not None:
+            frames.insert(0, self.data)
+        self.data = pd.concat(frames) if len(frames) > 1 else frames[0]
+        self.data_names = chunks[-1][0]
+        self.array_names = chunks[-1][1]
+        self.dims = (len(self.data.index),) + tuple(self.dims[1:])
+    
+    def finish_stream(self):
+        # cache the complete results, unless they changed while streaming
+        if self.cache_key is not None and \
+           cache.get_file_key(self.objectives_file) == self.cache_key:
+            cache.store(self.objectives_file, self.cache_key, self.dims, 
+                        self.data_names, self.array_names, self.data)
+        # chunks are only encoded once their value sets are complete
+        self.set_lazy_data(self.data)
+        self.set_parameter_grid()
+
+    def set_parameter_grid(self):
+        # only valid if the results cover the complete grid
+        self.parameter_grid = grid.load_parameter_grid(self.objectives_file)
+        if self.parameter_grid is not None and \
+           self.parameter_grid.num_combinations != self.dims[0]:
+            self.parameter_grid = None
+    
+    def set_lazy_data(self, data):
+        """ Keep the elements of array variables only in the lazy cache. """
+        names = list(self.data_names[0]) + list(self.data_names[1])
+        self.overlay_rows = overlay.get_rows(self.objectives_file, 
+                                             self.array_names, names)
+        overlay.apply(data, self.overlay_rows)
+        for array_name in self.array_names:
+            elements = parser.find_element_names(array_name, names)
+            loader = self.get_array_loader(array_name, elements)
+            for name in elements:
+                self.sources[name] = loader
+                if name in data.columns:
+                    self.materialize(name, data.pop(name))
+        self.evict()
+        self.data = compact.compact_frame(data, self.data_names[0], 
+                                          self.data_names[1], self.float32)
+    
+    def get_array_loader(self, array_name, elements):
+        def load_array():
+            columns = None
+            if self.use_cache:
+                columns = cache.load_columns(self.objectives_file, elements)
+            if columns is None:
+                block = parser.read_array_column(self.objectives_file, array_name)
+                if block.shape != (self.dims[0], len(elements)):
+                    raise ValueError("{} changed since it was loaded".format(
+                        self.objectives_file))
+                columns = dict(zip(elements, block.T))
+            columns = overlay.apply_columns(columns, self.overlay_rows)
+            return dict((name, self.compact_column(name, column))
+                        for name, column in columns.items())
+        return load_array
+    
+    def get_overlay_loader(self, store):
+        """ Columns of a ColumnStore, copied once if the overlay changes them. """
+        copies = {}
+        def load_column(name):
+            if name not in self.overlay_rows.columns:
+                return store.get_column(name)
+            if name not in copies:
+                copies[name] = overlay.apply_column(store.get_column(name), 
+                                                    self.overlay_rows, name)
+            return copies[name]
+        return load_column
+    
+    def get_delta_loader(self, name, minuend, subtrahend):
+        def load_delta():
+            return {name: np.asarray(self.get_column(minuend), dtype=np.float64) - 
+                          np.asarray(self.get_column(subtrahend), dtype=np.float64)}
+        return load_delta
+    
+    def compact_column(self, name, column):
+        column = pd.Series(column, name=name)
+        return compact.compact_column(column, name in self.data_names[0], 
+                                      self.float32).values
+    
+    def materialize(self, name, column):
+        if isinstance(column, pd.Series):
+            column = self.compact_column(name, column)
+        if name in self.materialized:
+            self.memory_used -= self.materialized.pop(name).nbytes
+        self.materialized[name] = column
+        self.memory_used += column.nbytes
+    
+    def get_column(self, name):
+        """ Values of a column, i.e. a numpy array or pandas Categorical. """
+        if name in self.materialized:
+            self.materialized.move_to_end(name)
+            return self.materialized[name]
+        if name not in self.sources:
+            return self.data[name].values
+        
+        columns = self.sources[name]()
+        for other_name, column in columns.items():
+            if other_name != name:
+                self.materialize(other_name, column)
+        self.materialize(name, columns[name])
+        self.evict()
+        return self.materialized[name]
+    
+    def evict(self):
+        # least recently used columns first, but keep the latest one
+        while self.memory_used > self.memory_budget and len(self.materialized) > 1:
+            _, column = self.materialized.popitem(last=False)
+            self.memory_used -= column.nbytes
+    
+    def get_data(self):
+        if not self.sources:
+            return self.data
+        columns = list(self.data_names[0]) + list(self.data_names[1])
+        return LazyFrame(columns, self.get_column, self.dims[0])
+    
+    def get_parameter_id(self, ind):
+        """ parameterID of the given row in the evaluation to launch. """
+        if self.parameter_ids is None:
+            return ind
+        return int(self.parameter_ids[ind])
+    
+    def update_rows(self, rows):
+        """
+        Replace the values of re-evaluated rows, a DataFrame indexed by row.
+        False if the rows cannot be updated in place, i.e. when comparing or
+        browsing memory-mapped columns.
+        """
+        if self.parameter_ids is not None or not isinstance(self.data, pd.DataFrame):
+            return False
+        names = list(self.data_names[0]) + list(self.data_names[1])
+        self.overlay_rows = overlay.get_rows(self.objectives_file, 
+                                             self.array_names, names)
+        positions = rows.index.to_numpy()
+        for name in rows.columns:
+            if name in self.sources:
+                # loaded again with the updated overlay once requested
+                if name in self.materialized:
+                    self.memory_used -= self.materialized.pop(name).nbytes
+            else:
+                self.data[name] = compact.set_values(self.data[name], positions,
+                                                     rows[name].to_numpy())
+        return True
 
 class DataStorage:
+    """ 
+    Access to the EvaluationStore shown by the GUI, kept for compatibility.
+    """
+    store = None
+    
     @classmethod
-    def fill_data_storage(cls, evaluation_name, use_ROS, time_scale):
-        cls.evaluation_name = evaluation_name
-        cls.use_ROS = use_ROS
-        cls.time_scale = time_scale
-        cls.dims, cls.data_names, cls.array_names, cls.data = parser.parse_data(evaluation_name,
-                                                                                use_ROS)
+    def fill_data_storage(cls, evaluation_name, use_ROS, time_scale, 
+                          use_cache=True, rebuild_cache=False, 
+                          memory_map=False, float32=False,
+                          memory_budget=MEMORY_BUDGET):
+        cls.store = EvaluationStore(evaluation_name, use_ROS, time_scale, 
+                                    float32, memory_budget)
+        cls.store.load(use_cache, rebuild_cache, memory_map)
 
+    @classmethod
+    def stream_data_storage(cls, evaluation_name, use_ROS, time_scale,
+                            use_cache=True, rebuild_cache=False, 
+                            chunk_size=parser.CHUNK_SIZE, float32=False,
+                            memory_budget=MEMORY_BUDGET):
+        cls.store = EvaluationStore(evaluation_name, use_ROS, time_scale, 
+                                    float32, memory_budget)
+        return cls.store.start_stream(use_cache, rebuild_cache, chunk_size)
+    
+    @classmethod
+    def fill_comparison_storage(cls, evaluations, time_scale, use_cache=True,
+                                rebuild_cache=False, float32=False,
+                                memory_budget=MEMORY_BUDGET):
+        evaluation_name, use_ROS = evaluations[0]
+        cls.store = EvaluationStore(evaluation_name, use_ROS, time_scale, 
+                                    float32, memory_budget)
+        cls.store.load_comparison(evaluations, use_cache, rebuild_cache)
+    
+    @classmethod
+    def follow_data_storage(cls, evaluation_name, use_ROS, time_scale,
+                            poll_interval=0.5):
+        cls.store = EvaluationStore(evaluation_name, use_ROS, time_scale)
+        return cls.store.start_follow(poll_interval)
+    
+    @classmethod
+    def append_data(cls, chunks):
+        cls.store.append_data(chunks)
+    
+    @classmethod
+    def finish_stream(cls):
+        cls.store.finish_stream()
+        
+    @classmethod
+    def get_store(cls):
+        return cls.store
+        
     @classmethod
     def get_evaluation_name(cls):
-        return cls.evaluation_name
+        return cls.store.evaluation_name
     
     @classmethod
     def get_useROS_bool(cls):
-        return cls.use_ROS
+        return cls.store.use_ROS
     
     @classmethod
     def get_time_scale(cls):
-        return cls.time_scale
+        return cls.store.time_scale
     
     @classmethod
     def get_data_dimension(cls):
-        return cls.dims
+        return cls.store.dims
     
     @classmethod
     def get_data(cls):
-        return cls.data
+        return cls.store.get_data()
     
     @classmethod
     def get_parameter_names(cls):
-        return cls.data_names[0]
+        return cls.store.data_names[0]
     
     @classmethod
     def get_objective_names(cls):
-        return cls.data_names[1]
+        return cls.store.data_names[1]
     
     @classmethod
     def get_array_names(cls):
-        return cls.array_names
\ No newline at end of file
+        return cls.store.array_names
+
+    @classmethod
+    def get_parameter_id(cls, ind):
+        return cls.store.get_parameter_id(ind)
+    
+    @classmethod
+    def update_rows(cls, rows):
+        return cls.store.update_rows(rows)
+
+    @classmethod
+    def get_parameter_grid(cls):
+        """ ParameterGrid mapping rows to parameter levels, None if unknown. """
+        return cls.store.parameter_grid
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from . import parser
+
+import queue
+import threading
+
+class ChunkStream:
+    """
+    Parses Results.txt chunk by chunk in a background thread. The chunks
+    (param_names, array_names, data, position) are fetched with get_chunks().
+    """
+    def __init__(self, objectives_file, chunk_size=parser.CHUNK_SIZE):
+        self.objectives_file = objectives_file
+        self.chunk_size = chunk_size
+        self.total_size = objectives_file.stat().st_size
+        self.position = 0
+        self.done = False
+        self.error = None
+        # bounded, so parsing does not run far ahead of the consumer
+        self.queue = queue.Queue(maxsize=4)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            for chunk in parser.iter_chunks(self.objectives_file, self.chunk_size):
+                self.queue.put(("chunk", chunk))
+        except Exception as e:
+            self.queue.put(("error", e))
+        self.queue.put(("done", None))
+
+    def get_chunks(self, block=False):
+        """ Return all chunks parsed so far, wait for at least one if block. """
+        chunks = []
+        while not self.done:
+            try:
+                kind, item = self.queue.get(block=block and not chunks)
+            except queue.Empty:
+                break
+            if kind == "chunk":
+                chunks.append(item)
+                self.position = item[3]
+            elif kind == "error":
+                self.error = item
+            else:
+                self.done = True
+        if self.error is not None:
+            raise self.error
+        return chunks
+
+    def get_progress(self):
+        if self.done or self.total_size == 0:
+            return 1.0
+        return self.position/self.total_size
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Instrumentation of the hot paths
+
+Parsing, the GUI callbacks, the stages of a render and the jobs of the
+background worker are spans: traced functions or with-blocks recording their
+wall time and the net change of allocated memory blocks of the process
+(sys.getallocatedblocks, a few microseconds) into a ring buffer.
+Tracing is off unless enabled, then a traced function costs one attribute
+check. The spans since the last interaction began, like a slider change or
+a click, are its breakdown, and the buffer is written in the Chrome trace
+format (chrome://tracing, Perfetto) on exit.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+import collections
+
+# spans kept, the oldest are dropped first
+RING_SIZE = 100000
+# spans kept of the last interaction
+MAX_INTERACTION_SPANS = 50
+
+class NullSpan:
+    """ Span of a disabled tracer, doing nothing. """
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc_info):
+        return False
+        
+NULL_SPAN = NullSpan()
+
+class Span:
+    __slots__ = ("tracer", "name", "interaction", "start", "blocks")
+    
+    def __init__(self, tracer, name, interaction=False):
+        self.tracer = tracer
+        self.name = name
+        self.interaction = interaction
+        
+    def __enter__(self):
+        self.tracer.enter(self)
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+        
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        self.tracer.exit(self, end, sys.getallocatedblocks() - self.blocks)
+        return False
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.start = time.perf_counter()
+        self.events = collections.deque(maxlen=RING_SIZE)
+        self.thread_names = {}
+        # nesting of the spans per thread
+        self.local = threading.local()
+        # spans since the last interaction began, counted by version
+        self.interaction = []
+        self.version = 0
+        
+    def enable(self, path=None, ring_size=RING_SIZE):
+        """ Start recording, written to path on exit if given. """
+        self.events = collections.deque(maxlen=ring_size)
+        self.enabled = True
+        if path is not None:
+            atexit.register(self.finish, path)
+            
+    def span(self, name, interaction=False):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, interaction)
+        
+    def enter(self, span):
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        # an interaction only begins outside of other spans
+        if span.interaction and depth == 0:
+            self.interaction = []
+            
+    def exit(self, span, end, blocks):
+        self.local.depth -= 1
+        thread = threading.get_ident()
+        if thread not in self.thread_names:
+            self.thread_names[thread] = threading.current_thread().name
+        event = (span.name, span.start - self.start, end - span.start, blocks,
+                 thread)
+        # appending to a deque is atomic, so threads need no lock
+        self.events.append(event)
+        interaction = self.interaction
+        if len(interaction) < MAX_INTERACTION_SPANS:
+            interaction.append(event)
+            self.version += 1
+            
+    def get_interaction(self):
+        """ Version and spans of the last interaction, by start time. """
+        return self.version, sorted(self.interaction, key=lambda event: event[1])
+        
+    def get_thread_name(self, thread):
+        return self.thread_names.get(thread, str(thread))
+        
+    def format_interaction(self, events):
+        """ Lines of the breakdown of get_interaction. """
+        end = max(start + duration for _, start, duration, _, _ in events)
+        lines = ["{} {:.1f} ms until done".format(events[0][0], 
+                                                  (end - events[0][1])*1e3)]
+        for name, _, duration, blocks, thread in events:
+            lines.append("{:<30} {:<16} {:8.1f} ms {:+9d} blocks".format(
+                name, self.get_thread_name(thread)[:16], duration*1e3, blocks))
+        return "\n".join(lines)
+        
+    def dump(self, path):
+        """ Write the spans in the Chrome trace format, times in microseconds. """
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": thread,
+                   "args": {"name": name}}
+                  for thread, name in list(self.thread_names.items())]
+        for name, start, duration, blocks, thread in list(self.events):
+            events.append({"name": name, "ph": "X", "pid": pid, "tid": thread,
+                           "ts": round(start*1e6, 1), 
+                           "dur": round(duration*1e6, 1),
+                           "args": {"blocks": blocks}})
+        with open(str(path), "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, 
+                      trace_file)
+            
+    def report(self):
+        """ Print count, total and maximum milliseconds of every span name. """
+        stages = collections.OrderedDict()
+        for name, _, duration, _, _ in list(self.events):
+            count, total, maximum = stages.get(name, (0, 0, 0))
+            stages[name] = (count + 1, total + duration, max(maximum, duration))
+        if not stages:
+            return
+        width = max(len(name) for name in stages)
+        print("Trace profile:")
+        print("  {:<{}} {:>7} {:>11} {:>11}".format("span", width, "count", 
+                                                  "total ms", "max ms"))
+        for name, (count, total, maximum) in stages.items():
+            print("  {:<{}} {:7d} {:11.1f} {:11.1f}".format(name, width, count,
+                                                         total*1e3, maximum*1e3))
+            
+    def finish(self, path):
+        self.dump(path)
+        self.report()
+        print("Trace written to {}".format(path))
+
+TRACER = Tracer()
+
+def enable(path=None, ring_size=RING_SIZE):
+    TRACER.enable(path, ring_size)
+    
+def is_enabled():
+    return TRACER.enabled
+
+def span(name, interaction=False):
+    """ with span(name): times the block if tracing is enabled. """
+    return TRACER.span(name, interaction)
+
+def get_name(function):
+    """ Span name of a function, prefixed by its module like gui.plot_data. """
+    return "{}.{}".format(function.__module__.rsplit(".", 1)[-1], 
+                          function.__name__)
+
+def traced(name=None, interaction=False):
+    """
+    Decorator making every call of a function a span. An interaction starts
+    a new breakdown, unless it is called within another span.
+    """
+    def decorate(function):
+        span_name = name or get_name(function)
+        
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return function(*args, **kwargs)
+            with Span(TRACER, span_name, interaction):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -16,10 +16,17 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+from framework.data import compact
+from framework.data import quantiles
+from framework import trace
+
 import tkinter as tk
-import math
+import bisect
 import numpy as np
 
+# milliseconds between two checks for a new interaction of the trace overlay
+OVERLAY_INTERVAL = 250
+
 """
 Class NestedAxisDropdown adapted from Onkar Raut's answer on 
 https://stackoverflow.com/questions/24357256/are-there-any-tkinter-widgets-like-optionmenu-that-can-be-nested
@@ -135,12 +142,136 @@ class ValueEntry():
         self.entry.delete(0, tk.END)
         self.entry.insert(0, value)
         
+# height in pixels of a row of the slider list
+ROW_HEIGHT = 70
+
+def get_slider_values(column):
+    """
+    Sorted values of a column, the positions of its slider, and whether they
+    are quantile levels, i.e. each covers the values up to the next one.
+    """
+    if compact.is_encoded(column):
+        # slider positions equal the codes of the encoded column, missing
+        # values get the last one like in the selection index
+        missing = bool((compact.get_codes(column) < 0).any())
+        return compact.get_levels(column) + [np.nan]*missing, False
+    values = column.to_numpy()
+    # the same levels as the selection index of the column
+    levels = quantiles.get_levels(values)
+    if levels is not None:
+        return levels.tolist() + [np.nan]*bool(np.isnan(values).any()), True
+    if values.dtype.kind == "f":
+        # one position for all missing values like the selection index, 
+        # np.unique only merges NaNs from numpy 1.21 on
+        missing = np.isnan(values)
+        values = np.unique(values[~missing]).tolist()
+        return values + [np.nan]*bool(missing.any()), False
+    # sorted unique values without a python object per row
+    return np.unique(values).tolist(), False
+
+class SliderModel:
+    """
+    State of the slider of a column. Its values are only found once it is
+    shown or filtered, so columns scrolled out of view cost nothing.
+    """
+    def __init__(self, name, get_column, has_marginal=False):
+        self.name = name
+        # returns the column, which changes when rows are added
+        self.get_column = get_column
+        self.has_marginal = has_marginal
+        self.values = None
+        self.binned = False
+        # index of every value, found by bisection if binned
+        self.value_indices = None
+        # values of the cursors, None while the whole range is selected
+        self.cursor_values = None
+        # row of the current solution
+        self.current_row = None
+        # mean, minimum and maximum of the marginal plot per value
+        self.marginal = None
+        # number of selected rows per value
+        self.histogram = None
+        
+    def get_values(self):
+        if self.values is None:
+            self.values, self.binned = get_slider_values(self.get_column())
+            if not self.binned:
+                self.value_indices = dict((value, index) for index, value 
+                                          in enumerate(self.values))
+        return self.values
+        
+    def reset_values(self):
+        """ Find the values again, e.g. after rows were added. """
+        # a slider covering the whole range keeps covering it
+        if self.values is not None and not self.is_filtered():
+            self.cursor_values = None
+        self.values = None
+        self.value_indices = None
+        
+    def get_current_value(self):
+        if self.current_row is None:
+            return None
+        return self.get_column().iloc[self.current_row]
+        
+    def get_index(self, value):
+        values = self.get_values()
+        if value != value:
+            # NaN, i.e. failed executions, is sorted to the end by np.unique
+            return len(values) - 1
+        if self.binned:
+            # the level starting at or below the value
+            return max(bisect.bisect_right(values, value, 0, 
+                                           self.get_num_numbers()) - 1, 0)
+        return self.value_indices[value]
+        
+    def get_num_numbers(self):
+        """ Number of values before NaN. """
+        values = self.get_values()
+        return len(values) - (values[-1] != values[-1])
+        
+    def get_closest_index(self, value):
+        """ Index of the value closest to a number, e.g. typed into an entry. """
+        values = self.get_values()
+        index = bisect.bisect_left(values, value, 0, self.get_num_numbers())
+        if index == self.get_num_numbers() or \
+           (index > 0 and value - values[index-1] <= values[index] - value):
+            index -= 1
+        return max(index, 0)
+        
+    def get_cursor_indices(self):
+        """ Value indices of the lower and upper cursor, in this order. """
+        if self.cursor_values is None:
+            return 0, len(self.get_values()) - 1
+        return tuple(self.get_index(value) for value in self.cursor_values)
+        
+    def get_indices(self):
+        """ Sorted value indices of the cursors, levels of the selection index. """
+        return tuple(sorted(self.get_cursor_indices()))
+        
+    def get_range_values(self):
+        lower, upper = self.get_indices()
+        return self.get_values()[lower], self.get_values()[upper]
+        
+    def set_cursor(self, tag, index):
+        """ Move the cursor "cursor_l" or "cursor_u" to a value index. """
+        cursor_values = list(self.cursor_values or (self.get_values()[0], 
+                                                    self.get_values()[-1]))
+        cursor_values[tag == "cursor_u"] = self.get_values()[index]
+        self.cursor_values = tuple(cursor_values)
+        
+    def is_filtered(self):
+        return self.cursor_values is not None and \
+               self.get_indices() != (0, len(self.get_values()) - 1)
+        
 class EvaluationParameterSlider(tk.Canvas):
-    def __init__(self, master, df, evalparam, callback, c_height=50, c_width=800,
-                 s_height=25, s_width=800, **kwargs):
+    def __init__(self, master, callback, c_height=50, c_width=800,
+                 s_height=25, s_width=800, drag_callback=None, **kwargs):
         self.master = master
-        self.df = df
-        self.evalparam = evalparam
+        self.model = None
+        # called with the parameter once a cursor is released, and while
+        # a cursor is dragged to a new position
+        self.callback = callback
+        self.drag_callback = drag_callback
         
         # canvas geometry
         self.c_height = c_height
@@ -154,49 +285,39 @@ class EvaluationParameterSlider(tk.Canvas):
                 
         tk.Canvas.__init__(self, master, width=c_width, height=c_height, 
                            **kwargs)
-        
-        self.setup_vals()
-        self.draw_ticks()
-        self.draw_cursor()
+        self.tick_labels = [tk.Label(self, font='Helvetica 10 bold') 
+                            for _ in range(2)]
         
         self.tag_bind('cursor_l', '<B1-Motion>', self.on_move)
         self.tag_bind('cursor_u', '<B1-Motion>', self.on_move)
         self.tag_bind('cursor_l', '<ButtonRelease-1>', self.on_release)
         self.tag_bind('cursor_u', '<ButtonRelease-1>', self.on_release)
         
-        # link function to change dropdown
-        for tag in self.tkvar_dict.keys():
-            self.tkvar_dict[tag].trace('w', lambda tkvar,_,__: 
-                                       callback(tkvar))
-        
-    def setup_vals(self):
-        self.values = sorted(set(self.df[self.evalparam]))
-        self.min = self.values[0]
-        self.max = self.values[-1]
-        self.range = math.fabs(self.max-self.min)
-        if len(self.values) == 1:
-            self.tick = self.range
-        else:
-            self.tick = self.range/(len(self.values) - 1)
+    def show(self, model):
+        """ Draw the slider of a SliderModel. """
+        self.model = model
         # position values in pixels on canvas
         self.position_values = list(np.linspace(self.cursor_width-1, 
                                                 self.s_width-1, 
-                                                len(self.values)))
-        
-        self.tkvar_dict = {"cursor_l": tk.StringVar(), 
-                           "cursor_u": tk.StringVar()}
-        self.tkvar_values_dict = {"cursor_l": self.values[0], 
-                                  "cursor_u": self.values[-1]}
-        self.cursor_pos_dict = {"cursor_l": self.position_values[0],
-                                "cursor_u": self.position_values[-1]}
+                                                len(model.get_values())))
+        self.cursor_index_dict = dict(zip(("cursor_l", "cursor_u"),
+                                          model.get_cursor_indices()))
+        self.cursor_pos_dict = dict((tag, self.position_values[index]) 
+                                    for tag, index in self.cursor_index_dict.items())
+        self.delete("tick")
+        self.draw_ticks()
+        self.draw_cursor()
+        self.draw_histogram()
+        self.draw_current()
         
     def draw_cursor(self):
         """Draw the cursor on val."""
         self.delete("cursor_l")
         self.delete("cursor_u")
+        self.delete("rect")
         
-        x_l = self.position_values[0]
-        x_u = self.position_values[-1]
+        x_l = self.cursor_pos_dict["cursor_l"]
+        x_u = self.cursor_pos_dict["cursor_u"]
 
         self.create_rectangle(x_l, 0, x_u, self.s_height, 
                               outline="#f11", fill='#4D4D4D', width=0,
@@ -212,8 +333,36 @@ class EvaluationParameterSlider(tk.Canvas):
                          fill='white', tags="cursor_u")
         self.create_line(x_u, 0, x_u, self.s_height, width=self.cursor_width, 
                          tags="cursor_u")
-        # current solution cursor
-        self.create_line(x_l, self.s_height-10, x_l, self.s_height+10, 
+        
+    def draw_histogram(self):
+        """ Bars of the number of selected rows per value above the range. """
+        self.delete("histogram")
+        histogram = self.model.histogram
+        num_values = len(self.position_values)
+        if histogram is None or len(histogram) < num_values or \
+           histogram[:num_values].max() == 0:
+            return
+        # the selection index has a level for missing values in any case
+        counts = histogram[:num_values]
+        heights = (self.s_height - 2)*counts/counts.max()
+        width = max(1, min(4, self.s_width/num_values - 1))
+        for pos, height in zip(self.position_values, heights):
+            if height > 0:
+                self.create_line(pos, self.s_height, pos, 
+                                 self.s_height - max(height, 1), width=width, 
+                                 fill="#9FB6CD", tags="histogram")
+        # the cursors stay on top to be dragged
+        self.tag_raise("cursor_l")
+        self.tag_raise("cursor_u")
+        
+    def draw_current(self):
+        """ Draw the cursor of the current solution. """
+        self.delete("current_solution")
+        pos = self.position_values[0]
+        value = self.model.get_current_value()
+        if value is not None:
+            pos = self.position_values[self.model.get_index(value)]
+        self.create_line(pos, self.s_height-10, pos, self.s_height+10, 
                          width=self.cursor_width, 
                          fill='red', tags="current_solution")
 
@@ -223,20 +372,29 @@ class EvaluationParameterSlider(tk.Canvas):
         tag = self.gettags('current')[0]
         
         if x >= 0:
-            xpos = min(max(abs(x), self.position_values[0]), 
-                       self.position_values[-1])
-            snap_xpos = min(self.position_values, 
-                            key=lambda x:abs(x-float(xpos)))
-            self.update_cursor_pos(tag, snap_xpos)
+            index = self.get_position_index(x)
+            moved = index != self.cursor_index_dict[tag]
+            self.cursor_index_dict[tag] = index
+            self.update_cursor_pos(tag, self.position_values[index])
+            if moved:
+                self.model.set_cursor(tag, index)
+                if self.drag_callback is not None:
+                    self.drag_callback(self.model.name)
+                
+    def get_position_index(self, x):
+        """ Index of the position closest to x, in logarithmic time. """
+        positions = self.position_values
+        index = bisect.bisect_left(positions, x)
+        if index == len(positions) or \
+           (index > 0 and x - positions[index-1] <= positions[index] - x):
+            index -= 1
+        return index
                 
     def on_release(self, event):
-        """ Update variable after mouse release. """
+        """ Update the model after mouse release. """
         tag = self.gettags('current')[0]
-        pos = self.coords(self.find_withtag(tag)[0])[0]
-        
-        new_val = self.values[self.position_values.index(pos)]
-        self.tkvar_values_dict[tag] = new_val
-        self.tkvar_dict[tag].set(new_val)
+        self.model.set_cursor(tag, self.cursor_index_dict[tag])
+        self.callback(self.model.name)
     
     def update_background_col(self):
         self.coords(self.find_withtag('rect'),
@@ -248,19 +406,18 @@ class EvaluationParameterSlider(tk.Canvas):
         small_line = self.c_height - 15
         x_l = self.position_values[0]
         x_u = self.position_values[-1]
+        values = self.model.get_values()
         
         self.create_line(x_l, self.s_height, x_l, large_line, width=3, 
                          fill='black', tags="tick")
-        lbl_l = tk.Label(self, text="{}".format(self.values[0]),
-                         font='Helvetica 10 bold')
+        lbl_l, lbl_u = self.tick_labels
+        lbl_l.config(text="{}".format(values[0]))
         lbl_l.place(x=x_l+2, y=small_line)
         self.create_line(x_u, self.s_height, x_u, large_line, width=3, 
                          fill='black', tags="tick")
-        lbl_u = tk.Label(self, text="{}".format(self.values[-1]),
-                         font='Helvetica 10 bold')
-        lbl_u.place(x=x_u, y=small_line)
-        self.update_idletasks()
-        lbl_u.place(x=x_u-(lbl_u.winfo_width()+1), y=small_line)
+        lbl_u.config(text="{}".format(values[-1]))
+        # right aligned without measuring the label
+        lbl_u.place(x=x_u-1, y=small_line, anchor=tk.NE)
         
         max_ticks = 100
         length = len(self.position_values[1:-1])
@@ -273,77 +430,301 @@ class EvaluationParameterSlider(tk.Canvas):
             for val in self.position_values[1:-1:step]:
                 self.create_line(val, self.s_height, val, small_line,
                                  width=2, fill='black', tags="tick")
-                
+        
     def update_cursor_pos(self, tag, pos):
         for s in self.find_withtag(tag):
-            if tag == "current_solution":
-                self.coords(s, pos, self.s_height-10, pos, self.s_height+10)
-            else:
-                self.coords(s, pos, 0, pos, self.s_height)
-                self.cursor_pos_dict[tag] = pos
-                self.update_background_col()
+            self.coords(s, pos, 0, pos, self.s_height)
+            self.cursor_pos_dict[tag] = pos
+            self.update_background_col()
         
+class SliderRow:
+    """ Widgets of a row of the VirtualSliderList, shown for any SliderModel. """
+    def __init__(self, master, index, callback, drag_callback, entry_callback,
+                 label_width):
+        self.index = index
+        self.model = None
+        self.callback = callback
+        self.label = tk.Label(master, font='Helvetica 12 bold', bg="slate gray",
+                              width=label_width, anchor=tk.W)
+        self.slider = EvaluationParameterSlider(master, self.on_change,
+                                                drag_callback=drag_callback)
+        self.lowerentry = ValueEntry(master, entry_callback, "center", "lower", 
+                                     index, 1, None)
+        self.upperentry = ValueEntry(master, entry_callback, "center", "upper", 
+                                     index, 3, None)
+        self.current_label = tk.Label(master, font='Helvetica 12 bold', fg="red",
+                                      bg="white")
+        self.marginal_plot = MarginalPlot(master)
         
-"""
-Class VerticalScrolledFrame taken from Eugene Bakin's GitHub Gist on 
-https://gist.github.com/bakineugene/76c8f9bcec5b390e45df
-"""        
-class VerticalScrolledFrame(tk.Frame):
-    """A pure Tkinter scrollable frame that actually works!
-    * Use the 'interior' attribute to place widgets inside the scrollable frame
-    * Construct and pack/place/grid normally
-    * This frame only allows vertical scrolling
+    def show(self, model):
+        self.model = model
+        self.label.config(text=model.name)
+        self.lowerentry.param = self.upperentry.param = model.name
+        self.slider.show(model)
+        self.update_entries()
+        self.draw_current()
+        self.draw_marginal()
+        
+        self.label.grid(row=self.index, column=0, padx=10, sticky=tk.W+tk.E)
+        self.lowerentry.entry.grid()
+        self.slider.grid(row=self.index, column=2, padx=10, pady=10)
+        self.upperentry.entry.grid()
+        self.current_label.grid(row=self.index, column=4, padx=10, 
+                                sticky=tk.W+tk.E)
+        if model.has_marginal:
+            self.marginal_plot.grid(row=self.index, column=5, padx=10)
+        else:
+            self.marginal_plot.grid_remove()
+        
+    def hide(self):
+        self.model = None
+        for widget in (self.label, self.lowerentry.entry, self.slider, 
+                       self.upperentry.entry, self.current_label, 
+                       self.marginal_plot):
+            widget.grid_remove()
+            
+    def on_change(self, param):
+        self.update_entries()
+        self.callback(param)
+        
+    def update_entries(self):
+        lower, upper = self.model.get_range_values()
+        self.lowerentry.update(lower)
+        self.upperentry.update(upper)
+        
+    def draw_current(self):
+        value = self.model.get_current_value()
+        self.current_label.config(text=self.model.get_values()[0] 
+                                  if value is None else value)
+        self.slider.draw_current()
+        
+    def draw_marginal(self):
+        if self.model.marginal is None:
+            self.marginal_plot.delete("marginal")
+            return
+        # the selection index has a level for missing values in any case
+        num_values = len(self.model.get_values())
+        self.marginal_plot.draw(*(values[:num_values] 
+                                  for values in self.model.marginal))
+        
+class VirtualSliderList(tk.Frame):
     """
-    def __init__(self, parent, *args, **kw):
-        tk.Frame.__init__(self, parent, *args, **kw)            
-
-        # create a canvas object and scrollbars for scrolling it
-        vscrollbar = tk.Scrollbar(self, orient=tk.VERTICAL)
-        vscrollbar.pack(fill=tk.Y, side=tk.RIGHT, expand=tk.FALSE)
+    Scrollable list of the sliders of many columns. Only the rows in view have
+    widgets; scrolling shows other SliderModels in them instead of moving them.
+    """
+    def __init__(self, master, models, create_row, row_height=ROW_HEIGHT, 
+                 refresh_callback=None, **kw):
+        background = kw.pop("bg")
+        height = kw.pop("height")
+        width = kw.pop("width")
+        tk.Frame.__init__(self, master, bg=background, **kw)
+        self.models = models
+        # called with the master and the grid row of a new SliderRow
+        self.create_row = create_row
+        self.row_height = row_height
+        # called once other models are shown, e.g. to find their histograms
+        self.refresh_callback = refresh_callback
+        self.rows = []
+        self.first = 0
+        self.num_visible = 0
+        
+        self.vscrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, 
+                                       command=self.yview)
+        self.vscrollbar.pack(fill=tk.Y, side=tk.RIGHT, expand=tk.FALSE)
         hscrollbar = tk.Scrollbar(self, orient=tk.HORIZONTAL)
         hscrollbar.pack(fill=tk.X, side=tk.BOTTOM, expand=tk.FALSE)
-        background = kw.pop("bg")
-        canvas = tk.Canvas(self, bd=0, highlightthickness=0,
-                           yscrollcommand=vscrollbar.set,
-                           xscrollcommand=hscrollbar.set,
-                           height=kw.pop("height"),
-                           width=kw.pop("width"),
-                           bg=background)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=tk.TRUE)
-        vscrollbar.config(command=canvas.yview)
-        hscrollbar.config(command=canvas.xview)
-
-        # reset the view
-        canvas.xview_moveto(0)
-        canvas.yview_moveto(0)
-
-        # create a frame inside the canvas which will be scrolled with it
-        self.interior = interior = tk.Frame(canvas, bg=background)
-        interior_id = canvas.create_window(0, 0, window=interior,
-                                           anchor=tk.NW)
-
-        # track changes to the canvas and frame width & height and sync them,
-        # also updating the scrollbar
-        def _configure_interior(event):
-            # update the scrollbars to match the size of the inner frame
-            size = (interior.winfo_reqwidth(), interior.winfo_reqheight())
-            canvas.config(scrollregion="0 0 %s %s" % size)
-            if interior.winfo_reqwidth() != canvas.winfo_width():
-                # update the canvas's width to fit the inner frame
-                canvas.config(width=interior.winfo_reqwidth())
-            if interior.winfo_reqheight() != canvas.winfo_height():
-                # update the canvas's height to fit the inner frame
-                canvas.config(height=interior.winfo_reqheight())
-        interior.bind('<Configure>', _configure_interior)
-        
-        def _bound_to_mousewheel(event):
-            canvas.bind_all("<MouseWheel>", _on_mousewheel)
-        canvas.bind('<Enter>', _bound_to_mousewheel)
-
-        def _unbound_to_mousewheel(event):
-            canvas.unbind_all("<MouseWheel>") 
-        canvas.bind('<Leave>', _unbound_to_mousewheel)
-    
-        def _on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")  
-        
\ No newline at end of file
+        # the canvas only scrolls horizontally
+        self.canvas = tk.Canvas(self, bd=0, highlightthickness=0, 
+                                xscrollcommand=hscrollbar.set, height=height,
+                                width=width, bg=background)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=tk.TRUE)
+        hscrollbar.config(command=self.canvas.xview)
+        self.interior = tk.Frame(self.canvas, bg=background)
+        self.canvas.create_window(0, 0, window=self.interior, anchor=tk.NW)
+        
+        self.interior.bind('<Configure>', self.on_interior_change)
+        self.canvas.bind('<Configure>', self.on_resize)
+        self.canvas.bind('<Enter>', self.bind_mousewheel)
+        self.canvas.bind('<Leave>', self.unbind_mousewheel)
+        
+    def on_interior_change(self, event):
+        self.canvas.config(scrollregion="0 0 {} {}".format(
+            self.interior.winfo_reqwidth(), self.interior.winfo_reqheight()))
+        
+    def on_resize(self, event):
+        self.num_visible = max(1, min(event.height//self.row_height, 
+                                      len(self.models)))
+        while len(self.rows) < self.num_visible:
+            self.interior.grid_rowconfigure(len(self.rows), minsize=self.row_height)
+            self.rows.append(self.create_row(self.interior, len(self.rows)))
+        self.scroll_to(self.first, force=True)
+        
+    def bind_mousewheel(self, event):
+        self.canvas.bind_all("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind_all("<Button-4>", lambda event: self.scroll_to(self.first - 1))
+        self.canvas.bind_all("<Button-5>", lambda event: self.scroll_to(self.first + 1))
+        
+    def unbind_mousewheel(self, event):
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.unbind_all(sequence)
+        
+    def on_mousewheel(self, event):
+        self.scroll_to(self.first - int(event.delta/120))
+        
+    def yview(self, *args):
+        """ Command of the scrollbar, which moves by whole rows. """
+        if args[0] == "moveto":
+            self.scroll_to(int(round(float(args[1])*len(self.models))))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.num_visible
+            self.scroll_to(self.first + amount)
+            
+    def scroll_to(self, first, force=False):
+        first = max(0, min(first, len(self.models) - self.num_visible))
+        if first != self.first or force:
+            self.first = first
+            self.refresh()
+        
+    def refresh(self):
+        """ Show the models in view in the rows, e.g. after their values changed. """
+        for i, row in enumerate(self.rows):
+            if i < self.num_visible:
+                row.show(self.models[self.first + i])
+            else:
+                row.hide()
+        num_models = max(1, len(self.models))
+        self.vscrollbar.set(self.first/num_models, 
+                            (self.first + self.num_visible)/num_models)
+        if self.refresh_callback is not None:
+            self.refresh_callback()
+        
+    def get_visible_rows(self):
+        return [row for row in self.rows if row.model is not None]
+        
+    def update_model(self, model):
+        """ Show the changed state of a model, if it is in view. """
+        for row in self.get_visible_rows():
+            if row.model is model:
+                row.show(model)
+        
+class MarginalPlot(tk.Canvas):
+    """ 
+    Range (line) and mean (dot) of an objective over the selected solutions 
+    of every slider position.
+    """
+    def __init__(self, master, c_height=50, c_width=200, **kwargs):
+        self.c_height = c_height
+        self.c_width = c_width
+        self.margin = 4
+        tk.Canvas.__init__(self, master, width=c_width, height=c_height, 
+                           bg="white", highlightthickness=0, **kwargs)
+        
+    def draw(self, mean, minimum, maximum):
+        self.delete("marginal")
+        finite = np.isfinite(np.concatenate([minimum, maximum]))
+        if not finite.any():
+            return
+        values = np.concatenate([minimum, maximum])[finite]
+        low, high = values.min(), values.max()
+        scale = (self.c_height - 2*self.margin)/(high - low) if high > low else 0
+        def to_y(value):
+            return self.c_height - self.margin - (value - low)*scale
+        x_positions = np.linspace(self.margin, self.c_width - self.margin, 
+                                  len(mean))
+        for x, avg, lower, upper in zip(x_positions, mean, minimum, maximum):
+            if not np.isfinite(lower):
+                continue
+            self.create_line(x, to_y(lower), x, to_y(upper) - 1, fill="grey", 
+                             width=2, tags="marginal")
+            self.create_oval(x - 2, to_y(avg) - 2, x + 2, to_y(avg) + 2, 
+                             fill="red", outline="", tags="marginal")
+        
+class LaunchPanel(tk.Toplevel):
+    """
+    Status of the runs of a Launcher and the output of the selected one.
+    Closing the window only hides it.
+    """
+    def __init__(self, master, launcher, **kwargs):
+        tk.Toplevel.__init__(self, master, bg="white", **kwargs)
+        self.title("Launched Solutions")
+        self.launcher = launcher
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+        
+        self.run_list = tk.Listbox(self, font='Helvetica 11', width=45, height=8,
+                                   exportselection=False)
+        self.run_list.grid(row=0, column=0, columnspan=2, sticky=tk.W+tk.E, 
+                           padx=4, pady=4)
+        self.run_list.bind('<<ListboxSelect>>', lambda event: self.show_output())
+        tk.Button(self, text="Cancel", font='Helvetica 11 bold', bg="white",
+                  command=lambda: self.apply(launcher.cancel)).grid(row=1, column=0)
+        tk.Button(self, text="Kill", font='Helvetica 11 bold', bg="white",
+                  command=lambda: self.apply(launcher.kill)).grid(row=1, column=1)
+        self.output_text = tk.Text(self, font='Courier 9', width=80, height=20,
+                                   state=tk.DISABLED)
+        self.output_text.grid(row=2, column=0, columnspan=2, 
+                              sticky=tk.W+tk.E+tk.N+tk.S, padx=4, pady=4)
+        tk.Grid.rowconfigure(self, 2, weight=1)
+        tk.Grid.columnconfigure(self, 0, weight=1)
+        tk.Grid.columnconfigure(self, 1, weight=1)
+        
+    def get_selected_run(self):
+        selection = self.run_list.curselection()
+        if not selection:
+            return None
+        return self.launcher.runs[selection[0]]
+        
+    def apply(self, action):
+        run = self.get_selected_run()
+        if run is not None:
+            action(run)
+        
+    def update_run(self, run):
+        """ Show the changed state or output of a run. """
+        index = run.number - 1
+        if index == self.run_list.size():
+            self.run_list.insert(tk.END, run.get_status())
+            # follow the newest run
+            self.run_list.selection_clear(0, tk.END)
+            self.run_list.selection_set(index)
+            self.run_list.see(index)
+        else:
+            selected = index in self.run_list.curselection()
+            self.run_list.delete(index)
+            self.run_list.insert(index, run.get_status())
+            if selected:
+                self.run_list.selection_set(index)
+        self.run_list.itemconfig(index, fg="black" if run.is_active() else "grey")
+        if run is self.get_selected_run():
+            self.show_output()
+        
+    def show_output(self):
+        run = self.get_selected_run()
+        self.output_text.config(state=tk.NORMAL)
+        self.output_text.delete("1.0", tk.END)
+        if run is not None:
+            self.output_text.insert(tk.END, "\n".join(run.output))
+            self.output_text.see(tk.END)
+        self.output_text.config(state=tk.DISABLED)
+        
+class TraceOverlay(tk.Label):
+    """ Time spent in the spans of the last traced interaction. """
+    def __init__(self, master, interval=OVERLAY_INTERVAL, **kwargs):
+        tk.Label.__init__(self, master, font='Courier 9', bg="lightyellow",
+                          justify=tk.LEFT, bd=1, relief=tk.SOLID, **kwargs)
+        self.interval = interval
+        self.version = None
+        self.update_breakdown()
+        
+    def update_breakdown(self):
+        # only the Tk thread touches the label, so the tracer is polled
+        if trace.TRACER.version != self.version:
+            self.version, events = trace.TRACER.get_interaction()
+            if events:
+                self.config(text=trace.TRACER.format_interaction(events))
+        self.after_id = self.after(self.interval, self.update_breakdown)
+        
+    def destroy(self):
+        self.after_cancel(self.after_id)
+        tk.Label.destroy(self)
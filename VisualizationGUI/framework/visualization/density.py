@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Level of detail for large 2D point clouds
+
+Above a number of points in view, points are aggregated into bins of a few
+pixels and drawn as a single image, so the time to draw depends on the size
+of the axes instead of the number of points.
+"""
+
+import numpy as np
+
+# points in view above which they are drawn as an image
+DENSITY_THRESHOLD = 100000
+# edge length of a bin in pixels
+BIN_SIZE = 2
+
+def get_in_view(x, y, xlim, ylim):
+    """ Mask of the points within the limits of the axes. """
+    (x0, x1), (y0, y1) = sorted(xlim), sorted(ylim)
+    return (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+def get_shape(width, height, bin_size=BIN_SIZE):
+    """ Number of bins (rows, columns) of axes width x height pixels. """
+    return max(1, int(height//bin_size)), max(1, int(width//bin_size))
+
+def get_bins(x, y, xlim, ylim, shape):
+    """ Flat bin of every point in view, image rows from bottom to top. """
+    (x0, x1), (y0, y1) = sorted(xlim), sorted(ylim)
+    rows, columns = shape
+    # points on the upper limits belong to the last bin
+    column = ((x - x0)*(columns/((x1 - x0) or 1))).astype(np.int64)
+    row = ((y - y0)*(rows/((y1 - y0) or 1))).astype(np.int64)
+    np.clip(column, 0, columns - 1, out=column)
+    np.clip(row, 0, rows - 1, out=row)
+    return row*columns + column
+
+def get_counts(x, y, xlim, ylim, shape):
+    """ Number of points per bin, NaN for empty bins. """
+    counts = np.bincount(get_bins(x, y, xlim, ylim, shape),
+                         minlength=shape[0]*shape[1]).astype(np.float64)
+    counts[counts == 0] = np.nan
+    return counts.reshape(shape)
+
+def get_means(x, y, values, xlim, ylim, shape):
+    """ Mean of values per bin, NaN for empty bins. """
+    bins = get_bins(x, y, xlim, ylim, shape)
+    valid = ~np.isnan(values)
+    size = shape[0]*shape[1]
+    sums = np.bincount(bins[valid], values[valid], minlength=size)
+    counts = np.bincount(bins[valid], minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums/counts
+    return means.reshape(shape)
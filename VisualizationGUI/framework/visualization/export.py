@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Headless export of plots without the GUI
+
+A spec lists the figures as JSON objects like
+{"x": "Time [s]", "y": "Energy [J]", "z": ..., "color": ...,
+ "ranges": {"Speed [m/s]": [0.5, 1]}, "pareto": {"Time [s]": "minimize"},
+ "name": ...}, where all but x and y are optional; with z, the figure is a 3D
+plot. The figures are drawn by the renderers of the GUI on Agg canvases,
+spread across a process pool. The results are loaded once by the parent:
+forked workers share its memory, spawned ones load the binary cache or the
+memory-mapped column files instead of parsing the results again.
+"""
+
+from framework.data.storage import DataStorage, MEMORY_BUDGET
+from framework.data.pareto import ParetoEngine, MINIMIZE, MAXIMIZE
+from framework.data import query
+from framework.visualization import density
+from framework.visualization.options import FORMATS, OBJECTIVE_PAIRS
+from framework.visualization.renderer import (PlotRenderer2D, PlotRenderer3D,
+                                              get_view, to_float)
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+# This import registers the 3D projection, but is otherwise unused.
+from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 unused import
+
+import re
+import os
+import json
+import itertools
+import traceback
+import multiprocessing
+import numpy as np
+
+# inches and dots per inch of an exported figure
+FIGURE_SIZE = (12, 8)
+DPI = 100
+DIRECTIONS = {"minimize": MINIMIZE, "maximize": MAXIMIZE}
+
+def load_data(evaluations, time_scale, use_cache=True, rebuild_cache=False,
+              memory_map=False, float32=False, memory_budget=None):
+    """ Fill the DataStorage like run_gui, without streaming. """
+    if memory_budget is None:
+        memory_budget = MEMORY_BUDGET
+    evaluation_name, use_ROS = evaluations[0]
+    if len(evaluations) > 1:
+        DataStorage.fill_comparison_storage(evaluations, time_scale, use_cache,
+                                            rebuild_cache, float32, memory_budget)
+    else:
+        DataStorage.fill_data_storage(evaluation_name, use_ROS, time_scale,
+                                      use_cache, rebuild_cache, memory_map,
+                                      float32, memory_budget)
+
+def get_objective_pairs(objective_names):
+    """ 2D plots of all pairs of objectives, colored by another objective. """
+    figures = []
+    for x, y in itertools.combinations(objective_names, 2):
+        others = [name for name in objective_names if name not in (x, y)]
+        figures.append({"x": x, "y": y, "color": (others or [y])[0]})
+    return figures
+
+def load_spec(spec, objective_names):
+    """ Figures of a JSON file, or of all pairs of objectives. """
+    if spec == OBJECTIVE_PAIRS:
+        return get_objective_pairs(objective_names)
+    with open(spec, encoding="utf-8") as spec_file:
+        figures = json.load(spec_file)
+    if not isinstance(figures, list):
+        raise ValueError("The export spec {} is not a list of figures".format(spec))
+    for figure in figures:
+        if "x" not in figure or "y" not in figure:
+            raise ValueError("Figure without x or y in {}: {}".format(spec, figure))
+    return figures
+
+def get_file_name(figure, number, file_format):
+    if "name" in figure:
+        name = figure["name"]
+    else:
+        axes = [figure[axis] for axis in ("y", "x", "z") if axis in figure]
+        name = "{:03d}_{}".format(number, "_vs_".join(axes))
+    # units like [m/s] are no valid file names
+    return "{}.{}".format(re.sub(r"[^\w\-.]+", "_", name).strip("_"), file_format)
+
+def get_mask(data, ranges):
+    """ Rows within the inclusive ranges {name: [lower, upper]}, like the sliders. """
+    predicates = []
+    for name, (lower, upper) in ranges.items():
+        predicates.append(query.Predicate(name, ">=", lower))
+        predicates.append(query.Predicate(name, "<=", upper))
+    mask = np.zeros(len(data.index), dtype=bool)
+    mask[query.filter_rows(data, predicates)] = True
+    return mask
+
+def render_figure(data, figure, path, density_threshold=density.DENSITY_THRESHOLD,
+                  density_selected=False):
+    axis_names = {"x": figure["x"], "y": figure["y"], "z": figure.get("z"),
+                  "color": figure.get("color", figure["y"])}
+    mask = get_mask(data, figure.get("ranges", {}))
+    selected = np.flatnonzero(mask)
+    deselected = np.flatnonzero(~mask)
+    x = to_float(data[axis_names["x"]])
+    y = to_float(data[axis_names["y"]])
+    color = to_float(data[axis_names["color"]])
+
+    fig = Figure(figsize=FIGURE_SIZE, dpi=DPI)
+    canvas = FigureCanvasAgg(fig)
+    if axis_names["z"] is None:
+        renderer = PlotRenderer2D(fig, canvas, fig.add_subplot(111),
+                                  density_threshold, density_selected)
+        renderer.set_data(x, y, color, selected, deselected, get_view(x, y))
+    else:
+        renderer = PlotRenderer3D(fig, canvas, fig.add_subplot(111, projection='3d'))
+        renderer.set_data(x, y, to_float(data[axis_names["z"]]), color,
+                          selected, deselected)
+    renderer.set_labels(axis_names)
+    if "pareto" in figure:
+        directions = dict((name, DIRECTIONS[direction])
+                          for name, direction in figure["pareto"].items())
+        renderer.set_pareto(ParetoEngine().get_layers(data, mask, directions,
+                                                      figure.get("layers", 1)))
+    if axis_names["z"] is None and not path.endswith(".png"):
+        # vector files of many points are huge, only axes and text stay vectors
+        # (3D collections cannot be rasterized)
+        for artist in renderer.ax.collections + renderer.ax.images:
+            artist.set_rasterized(True)
+    fig.savefig(path)
+
+def render_task(task):
+    """ Render a figure of the DataStorage, returning its path and any error. """
+    figure, path, density_threshold, density_selected = task
+    try:
+        render_figure(DataStorage.get_data(), figure, path, density_threshold,
+                      density_selected)
+    except Exception:
+        return path, traceback.format_exc()
+    return path, None
+
+def get_pool(processes, load_args):
+    if "fork" in multiprocessing.get_all_start_methods():
+        # the workers inherit the loaded DataStorage
+        return multiprocessing.get_context("fork").Pool(processes)
+    evaluations, time_scale, use_cache, _, memory_map, float32, memory_budget = load_args
+    # spawned workers read what the parent parsed
+    return multiprocessing.get_context("spawn").Pool(
+        processes, load_data, (evaluations, time_scale, use_cache, False,
+                               memory_map, float32, memory_budget))
+
+def run_export(evaluations, time_scale, spec, directory, file_format="png",
+               processes=None, use_cache=True, rebuild_cache=False,
+               memory_map=False, float32=False, memory_budget=None,
+               density_threshold=density.DENSITY_THRESHOLD, density_selected=False):
+    """ Write the figures of spec to directory, returns the number of failed ones. """
+    if file_format not in FORMATS:
+        raise ValueError("Unknown export format {}".format(file_format))
+    load_args = (evaluations, time_scale, use_cache, rebuild_cache, memory_map,
+                 float32, memory_budget)
+    load_data(*load_args)
+    figures = load_spec(spec, DataStorage.get_objective_names())
+    directory.mkdir(parents=True, exist_ok=True)
+    tasks = [(figure, str(directory / get_file_name(figure, i, file_format)),
+              density_threshold, density_selected)
+             for i, figure in enumerate(figures)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    if processes > 1 and not use_cache and not memory_map and \
+       "fork" not in multiprocessing.get_all_start_methods():
+        # without cache, every spawned worker would parse the results again
+        processes = 1
+    if processes > 1:
+        with get_pool(processes, load_args) as pool:
+            return report(pool.imap_unordered(render_task, tasks))
+    return report(map(render_task, tasks))
+
+def report(results):
+    """ Print the paths of the figures as they are written, count the failed ones. """
+    num_failed = 0
+    for path, error in results:
+        if error is None:
+            print(path)
+        else:
+            num_failed += 1
+            print("Failed to export {}:\n{}".format(path, error))
+    return num_failed
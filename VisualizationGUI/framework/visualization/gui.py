@@ -16,34 +16,67 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from framework.data.storage import DataStorage
-from framework.data import parser
-from framework.visualization.GUIhelpers.helpers import (EvaluationParameterSlider,
-                                                        VerticalScrolledFrame, 
-                                                        ValueEntry, 
-                                                        NestedAxisDropdown)
+from framework import trace
+from framework.data.storage import DataStorage, MEMORY_BUDGET
+from framework.data.selection import SelectionEngine
+from framework.data.pareto import ParetoEngine, MINIMIZE, MAXIMIZE
+from framework.data.cube import MarginalCube
+from framework.visualization.spatial import GridIndex
+from framework.visualization import density
+from framework.visualization.renderer import (PlotRenderer2D, PlotRenderer3D,
+                                              bin_layers, get_view, to_float)
+from framework.visualization.worker import BackgroundWorker
+from framework.visualization.startup import WINDOW_SIZE, TITLE
+from framework.visualization.rerun import rerun
+from framework.visualization.launcher import (Launcher, get_default_executable,
+                                              get_command, get_demonstration_args)
+from framework.visualization.scheduler import (RenderScheduler, SELECTION, AXES, 
+                                               COLORS, PARETO, CURRENT, LAYOUT,
+                                               MARGINALS)
+from framework.visualization.GUIhelpers.helpers import (SliderModel, SliderRow,
+                                                        VirtualSliderList,
+                                                        NestedAxisDropdown,
+                                                        LaunchPanel, TraceOverlay)
 
 import tkinter as tk
+from tkinter import ttk
+from tkinter import messagebox
 from matplotlib.backends.backend_tkagg import (
     FigureCanvasTkAgg, NavigationToolbar2Tk)
 from matplotlib.figure import Figure
-from matplotlib.collections import PathCollection
-# This import registers the 3D projection, but is otherwise unused.
-from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 unused import
 
-import subprocess
+import queue
+import threading
+import traceback
+import numpy as np
+
+# milliseconds between two checks for new rows in follow mode
+FOLLOW_INTERVAL = 250
+# selectable number of highlighted non-dominated ranks
+MAX_PARETO_LAYERS = 5
+# pixels the mouse may move between press and release of a click
+CLICK_TOLERANCE = 3
+# number of solutions re-evaluated without asking
+MAX_RERUN_UNASKED = 100
+# milliseconds between two updates of the re-evaluation progress
+RERUN_INTERVAL = 200
 
 """
 GUI application 
 """
 class GUIRoot:
-    def __init__(self, master):
+    def __init__(self, master, density_threshold=density.DENSITY_THRESHOLD,
+                 density_selected=False, executable=None, max_launches=1,
+                 trace_overlay=False):
         """
         MainWindow Config
         """
         self.master = master
-        self.master.geometry("{}x{}".format(1400, 1000))
-        self.master.title("Evaluation Framework Visualization")
+        # 2D views with more points are drawn as density images
+        self.density_threshold = density_threshold
+        self.density_selected = density_selected
+        self.master.geometry("{}x{}".format(*WINDOW_SIZE))
+        self.master.title(TITLE)
         background_col = 'slate gray' #'#4D4D4D' 
         self.master.configure(background=background_col)
         self.center()           
@@ -52,15 +85,30 @@ class GUIRoot:
         Get Data
         """
         self.get_data()
+        # callbacks mark what changed, rendered together once Tk is idle
+        self.scheduler = RenderScheduler(self.master, self.render)
+        # selection, summaries, binning and picking are computed in the 
+        # background, only the worker changes the selection and the cube
+        self.worker = BackgroundWorker(self.master)
+        # demonstrations run next to the GUI, shown once the first is launched
+        self.executable = executable
+        self.launcher = Launcher(self.master, max_launches, self.on_launch_change)
+        self.launch_panel = None
+        # rows are only re-evaluated once they are completely loaded
+        self.stream = None
+        self.follower = None
+        self.rerun_results = None
         self.default = [self.df.columns[0], self.df.columns[1],
                         self.df.columns[1]] # default axis
         self.x_axis = self.df[self.default[0]]
         self.y_axis = self.df[self.default[1]]
         self.z_axis = self.df[self.default[2]]
         self.color_axis = self.df[self.default[2]]
-        self.selected = set(range(0, len(self.x_axis)))
-        self.selected_vals_dict = dict(zip(self.evalparam_names, 
-                                           [self.selected]*len(self.evalparam_names)))
+        self.selection = SelectionEngine(self.df)
+        self.selected = self.selection.get_selected()
+        # selected rows of the plotted points
+        self.selected_mask = self.selection.get_mask().copy()
+        self.cube = MarginalCube(self.df, self.selection)
         self.axis_names_dict = {"x": self.default[0], "y": self.default[1],
                                 "z": self.default[2],
                                 "color": self.default[2]}
@@ -87,6 +135,10 @@ class GUIRoot:
                       command=self.launch_solution, font='Helvetica 12 bold', 
                       bg="white", bd=2)
         b.pack()
+        launches = tk.Button(self.launch_frame, text="Show Launches", 
+                             command=self.show_launch_panel, 
+                             font='Helvetica 10', bg="white", bd=2)
+        launches.pack()
         
         self.check_var = tk.StringVar(value="2D")
         check = tk.Checkbutton(self.launch_frame, text="3D Plot",
@@ -96,10 +148,23 @@ class GUIRoot:
                                command=self.update_plot_shape)
         check.pack()
         
+        """
+        Pareto front of the selected solutions
+        """
+        self.setup_pareto_menu()
+        self.setup_rerun_menu()
+        
         """ 
         Draw Matplotlib Plot
         """
         self.draw_figure()
+        
+        """
+        Breakdown of the last interaction, if traced
+        """
+        if trace_overlay and trace.is_enabled():
+            self.trace_overlay = TraceOverlay(self.top_frame)
+            self.trace_overlay.place(relx=0.5, y=4, anchor=tk.N)
                 
     def setup_window_frames(self):
         tk.Grid.rowconfigure(self.master, 0, weight=1)
@@ -137,7 +202,6 @@ class GUIRoot:
         self.top_frame.update_idletasks() 
         self.bot_frame.update_idletasks() 
         
-        self._after_id = None
         self.top_frame.bind('<Configure>', self.resize_window)
         
         """
@@ -155,15 +219,6 @@ class GUIRoot:
         self.figure_frame3D.grid(row=0, column=0, sticky=tk.W+tk.N+tk.S+tk.E)
         self.figure_frame3D.grid_forget()
         
-        """
-        SLIDER FRAME
-        """
-        self.slider_frame = VerticalScrolledFrame(self.bot_frame, bg="slate gray", 
-                                                  width=self.bot_frame.winfo_width(), 
-                                                  height=self.bot_frame.winfo_height(),
-                                                  bd=2, relief=tk.RIDGE)
-        self.slider_frame.grid(row=0, column=0, sticky=tk.W+tk.N+tk.S+tk.E)
-         
         """
         DROPDOWN FRAMES
         """
@@ -214,16 +269,10 @@ class GUIRoot:
         self.launch_frame.grid(row=0, column=0, sticky=tk.N, 
                                   padx=4, pady=4)
         
+    @trace.traced(interaction=True)
     def resize_window(self, event):
-        self.plot.cla()
-        self.slider_frame.grid_remove()
-        if self._after_id:
-            self.top_frame.after_cancel(self._after_id)
-        self._after_id = self.top_frame.after(200, self.redraw_content)
-        
-    def redraw_content(self):
-        self.update_current_solution()
-        self.slider_frame.grid()
+        # the density images depend on the size of the axes
+        self.scheduler.mark(LAYOUT)
         
     def get_data(self):
         self.df = DataStorage.get_data()
@@ -248,173 +297,479 @@ class GUIRoot:
         self.fig2D = Figure(figsize=(self.figure_frame2D.winfo_width()/100, 
                                      self.figure_frame2D.winfo_height()/100), 
                             dpi=100)
-        self.fig3D = Figure(figsize=(self.figure_frame2D.winfo_width()/100, 
-                                     self.figure_frame2D.winfo_height()/100), 
-                            dpi=100)
-        
         self.canvas2D = FigureCanvasTkAgg(self.fig2D, self.figure_frame2D) 
-        self.canvas3D = FigureCanvasTkAgg(self.fig3D, self.figure_frame3D)
-        
         self.plot2D = self.fig2D.add_subplot(111)
-        self.plot3D = self.fig3D.add_subplot(111, projection='3d')
+        self.renderer2D = PlotRenderer2D(self.fig2D, self.canvas2D, self.plot2D,
+                                         self.density_threshold, 
+                                         self.density_selected, self.worker)
+        # the 3D plot is only built once it is shown
+        self.renderer3D = None
+        # axes and rows the view of the 2D plot was set for
+        self.view_key = None
+        # number of times the points were plotted, for the spatial index
+        self.plot_version = 0
         
-        self.colorbar = None
-        
-        self.current_solution = self.df.iloc[0]
-        # second time necessary, since slicing a single row in pandas corrupts
-        # the datatype, if they are different within the row (ints -> floats)
-        self.current_solution_dt = [self.df[col][0] for col in self.df.columns]
+        # values of the current solution are only read for the columns shown
         self.current_solution_ind = 0
         
-        self.canvas2D.mpl_connect('pick_event', self.onpick)
-        self.canvas3D.mpl_connect('pick_event', self.onpick)
+        self.spatial_index = None
+        self.spatial_key = None
+        self.requested_spatial_key = None
+        self.press_position = None
+        # click waiting for the spatial index
+        self.pending_click = None
+        # coincident rows of the last click and the index of the picked one
+        self.pick_cycle = (np.zeros(0, dtype=np.int64), 0)
+        self.tooltips = {}
+        self.connect_canvas(self.canvas2D)
         
-        self.update_current_solution()
+        self.select_plot()
+        self.scheduler.mark(AXES, CURRENT, MARGINALS)
                 
         self.toolbar2D = NavigationToolbar2Tk(self.canvas2D, 
                                               self.toolbar_frame2D)
         self.toolbar2D.update()
         self.canvas2D.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         
+    def draw_figure3D(self):
+        """ Build the 3D plot, importing the 3D toolkit on first use. """
+        # This import registers the 3D projection, but is otherwise unused.
+        from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 unused import
+        self.fig3D = Figure(figsize=(self.figure_frame2D.winfo_width()/100, 
+                                     self.figure_frame2D.winfo_height()/100), 
+                            dpi=100)
+        self.canvas3D = FigureCanvasTkAgg(self.fig3D, self.figure_frame3D)
+        self.plot3D = self.fig3D.add_subplot(111, projection='3d')
+        self.renderer3D = PlotRenderer3D(self.fig3D, self.canvas3D, self.plot3D)
+        self.connect_canvas(self.canvas3D)
+        
         self.toolbar3D = NavigationToolbar2Tk(self.canvas3D, 
                                               self.toolbar_frame3D)
         self.toolbar3D.update()
         self.canvas3D.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
         
-    def plot_data(self):
-        # colormaps: https://matplotlib.org/examples/color/colormaps_reference.html
-        self.deselected = list(set(self.df.index.values).difference(self.selected))
+    def connect_canvas(self, canvas):
+        canvas.mpl_connect('button_press_event', self.on_press)
+        canvas.mpl_connect('button_release_event', self.on_release)
+        canvas.mpl_connect('motion_notify_event', self.on_motion)
+        self.tooltips[canvas] = tk.Label(canvas.get_tk_widget(), 
+                                         font='Helvetica 10', bg="lightyellow",
+                                         justify=tk.LEFT, bd=1, 
+                                         relief=tk.SOLID)
         
+    def select_plot(self):
         if self.check_var.get() == "3D":
-            self.plot.scatter(self.x_axis[self.deselected], 
-                              self.y_axis[self.deselected],
-                              self.z_axis[self.deselected],
-                              c='grey', s=100, alpha=0.1, picker=1)
-            im = self.plot.scatter(self.x_axis[list(self.selected)], 
-                                   self.y_axis[list(self.selected)], 
-                                   self.z_axis[list(self.selected)], 
-                                    # alpha=1, s=100, picker=1)
-                                    c=self.color_axis[list(self.selected)], 
-                                    cmap="rainbow", alpha=1, s=100, picker=1)
+            if self.renderer3D is None:
+                self.draw_figure3D()
+            self.fig = self.fig3D
+            self.canvas = self.canvas3D
+            self.plot = self.plot3D
+            self.renderer = self.renderer3D
         else:
-            self.plot.scatter(self.x_axis[self.deselected], 
-                              self.y_axis[self.deselected],
-                              c='grey', s=100, alpha=0.1, picker=1)
-            im = self.plot.scatter(self.x_axis[list(self.selected)], 
-                                   self.y_axis[list(self.selected)],
-                                    # alpha=1, s=100, picker=1)
-                                    c=self.color_axis[list(self.selected)], 
-                                    cmap='rainbow', alpha=1, s=100, picker=1)
+            self.fig = self.fig2D
+            self.canvas = self.canvas2D
+            self.plot = self.plot2D
+            self.renderer = self.renderer2D
         
-        self.master.update_idletasks()
+    def render(self, dirty):
+        """ Stages of one update of all parts marked dirty since the last one. """
+        self.select_plot()
+        parts = {SELECTION, AXES, PARETO, COLORS}
+        if self.check_var.get() == "2D":
+            # the density images depend on the size of the axes
+            parts.add(LAYOUT)
+        if dirty & parts:
+            job = self.worker.submit("plot", self.prepare_plot, 
+                                     self.get_plot_request())
+            yield job
+            if job.result is None:
+                return
+            self.plot_data(job.result)
+            yield
+            self.update_current_solution(blit=False)
+            self.renderer.draw()
+            yield
+        elif CURRENT in dirty:
+            self.update_current_solution()
+        if CURRENT in dirty:
+            self.update_solution_labels()
+        if dirty & {SELECTION, AXES, MARGINALS}:
+            names = [row.model.name for row in self.slider_frame.get_visible_rows()]
+            job = self.worker.submit("marginals", self.summarize_marginals,
+                                     self.get_marginal_objective(), names)
+            yield job
+            if job.result is not None:
+                self.update_marginal_plots(job.result)
+        
+    def get_plot_request(self):
+        """ Everything prepare_plot needs from the widgets, read in the Tk thread. """
+        directions = self.get_pareto_directions()
+        # a zoomed view is kept unless the axes or the rows change
+        view_key = (self.axis_names_dict["x"], self.axis_names_dict["y"],
+                    len(self.df.index))
+        return {"is_3D": self.check_var.get() == "3D",
+                "x": self.x_axis, "y": self.y_axis, "z": self.z_axis, 
+                "color": self.color_axis,
+                "objectives": {name: self.df[name] for name in directions},
+                "directions": directions,
+                "num_layers": self.pareto_layers_var.get(),
+                "view_key": view_key,
+                "reset_view": view_key != self.view_key,
+                "limits": (self.plot2D.get_xlim(), self.plot2D.get_ylim()),
+                "shape": self.renderer2D.get_shape()}
+        
+    def prepare_plot(self, job, request):
+        """ Points, Pareto ranks and 2D layers of the selection, in the worker. """
+        frame = dict(request)
+        frame["mask"] = mask = self.selection.get_mask().copy()
+        frame["selected"] = selected = np.flatnonzero(mask)
+        frame["deselected"] = deselected = np.flatnonzero(~mask)
+        axes = ("x", "y", "z", "color") if request["is_3D"] else ("x", "y", "color")
+        for axis in axes:
+            frame[axis] = to_float(request[axis])
+        if not job.is_current():
+            return None
+        
+        frame["pareto"] = []
+        if request["directions"]:
+            frame["pareto"] = self.pareto.get_layers(request["objectives"], mask,
+                                                     request["directions"],
+                                                     request["num_layers"])
+        if request["is_3D"] or not job.is_current():
+            return frame
+        
+        x, y = frame["x"], frame["y"]
+        view = request["limits"]
+        if request["reset_view"]:
+            view = tuple(new or old for new, old in zip(get_view(x, y), view))
+        frame["view"] = view
+        frame["layers"] = bin_layers(x, y, frame["color"], selected, deselected, 
+                                     *view, request["shape"], 
+                                     self.density_threshold, self.density_selected)
+        return frame
+        
+    @trace.traced()
+    def plot_data(self, frame):
+        """ Update the artists of the shown plot to a frame of prepare_plot. """
+        # colormaps: https://matplotlib.org/examples/color/colormaps_reference.html
+        self.selected = frame["selected"]
+        self.deselected = frame["deselected"]
+        self.selected_mask = frame["mask"]
+        self.plot_version += 1
+        
+        if frame["is_3D"]:
+            self.renderer.set_data(frame["x"], frame["y"], frame["z"], 
+                                   frame["color"], self.selected, self.deselected)
+        else:
+            reset_view = frame["reset_view"]
+            self.renderer.set_data(frame["x"], frame["y"], frame["color"], 
+                                   self.selected, self.deselected, 
+                                   frame["view"] if reset_view else None, 
+                                   frame["layers"])
+            if reset_view:
+                self.view_key = frame["view_key"]
+                # home of the toolbar is the new view
+                if hasattr(self, "toolbar2D"):
+                    self.toolbar2D.update()
+            elif frame["limits"] != (self.plot2D.get_xlim(), self.plot2D.get_ylim()):
+                # zoomed while the layers were binned
+                self.renderer.refresh_view()
         """
         labels, legends, ticks
         """
-        if self.colorbar is not None:
-            self.colorbar.remove()
-        self.colorbar = self.fig.colorbar(im, ax=self.plot)
-        self.colorbar.ax.tick_params(labelsize=15)
-        self.colorbar.ax.set_ylabel(self.axis_names_dict["color"], fontsize=15, 
-                                    rotation=270, labelpad=30)
+        self.renderer.set_labels(self.axis_names_dict)
+        self.renderer.set_pareto(frame["pareto"])
+        self.pareto_front = frame["pareto"][0] if frame["pareto"] else self.selected[:0]
         
-        self.plot.set_xlabel(self.axis_names_dict["x"], fontsize=15, labelpad=10)
-        self.plot.set_ylabel(self.axis_names_dict["y"], fontsize=15, labelpad=10)
+    def setup_pareto_menu(self):
+        self.pareto = ParetoEngine()
+        self.pareto_vars = {}
+        self.pareto_layers_var = tk.IntVar(value=1)
+        button = tk.Menubutton(self.launch_frame, text="Pareto Front", 
+                               font="Helvetica 12 bold", bg="white", bd=2,
+                               relief=tk.RAISED)
+        menu = tk.Menu(button, tearoff=0)
+        for name in self.objval_names:
+            var = tk.StringVar(value="ignore")
+            submenu = tk.Menu(menu, tearoff=0)
+            for direction in ("ignore", "minimize", "maximize"):
+                submenu.add_radiobutton(label=direction, value=direction, 
+                                        variable=var, 
+                                        command=lambda: self.scheduler.mark(PARETO))
+            menu.add_cascade(label=name, menu=submenu)
+            self.pareto_vars[name] = var
+        menu.add_separator()
+        layers_menu = tk.Menu(menu, tearoff=0)
+        for num_layers in range(1, MAX_PARETO_LAYERS + 1):
+            layers_menu.add_radiobutton(label=str(num_layers), value=num_layers,
+                                        variable=self.pareto_layers_var,
+                                        command=lambda: self.scheduler.mark(PARETO))
+        menu.add_cascade(label="Rank layers", menu=layers_menu)
+        button.config(menu=menu)
+        button.pack()
         
-        if self.check_var.get() == "3D":
-            self.plot.set_xlabel(self.axis_names_dict["x"], fontsize=15, labelpad=15)
-            self.plot.set_ylabel(self.axis_names_dict["y"], fontsize=15, labelpad=15)
-            self.plot.set_zlabel(self.axis_names_dict["z"], fontsize=15, labelpad=15)
-            xmin = min(self.df[self.axis_names_dict["x"]])
-            xmax = max(self.df[self.axis_names_dict["x"]])
-            ymin = min(self.df[self.axis_names_dict["y"]])
-            ymax = max(self.df[self.axis_names_dict["y"]])
-            zmin = min(self.df[self.axis_names_dict["z"]])
-            zmax = max(self.df[self.axis_names_dict["z"]])
-            self.plot.set_xlim([xmin, xmax])
-            self.plot.set_ylim([ymin, ymax])
-            self.plot.set_zlim([zmin, zmax])
-            
-        self.plot.tick_params(labelsize=15)
-        
-    def onpick(self, event):
-        if isinstance(event.artist, PathCollection):
-            # index of selected point
-            ind = event.ind[0]
-            alpha = event.artist.get_alpha()
-            if (alpha == 1):
-                val = list(self.selected)[ind]
-            else:
-                val = self.deselected[ind]
-            self.current_solution = self.df.loc[val]
-            self.current_solution_dt = [self.df[col][val] for col in self.df.columns]
-            self.current_solution_ind = val
-            self.update_current_solution()
-            
-    def update_current_solution(self):
-        x_ax = self.axis_names_dict["x"]
-        y_ax = self.axis_names_dict["y"]
-        z_ax = self.axis_names_dict["z"]
-        x_val = self.current_solution[x_ax]
-        y_val = self.current_solution[y_ax]
-        z_val = self.current_solution[z_ax]
+    def setup_rerun_menu(self):
+        self.pareto_front = np.zeros(0, dtype=np.int64)
+        button = tk.Menubutton(self.launch_frame, text="Re-evaluate", 
+                               font="Helvetica 12 bold", bg="white", bd=2,
+                               relief=tk.RAISED)
+        menu = tk.Menu(button, tearoff=0)
+        # the framework build would evaluate the whole grid again
+        state = tk.NORMAL if self.executable is not None else tk.DISABLED
+        menu.add_command(label="Selected Solutions", state=state,
+                         command=lambda: self.start_rerun(self.selected))
+        menu.add_command(label="Pareto Front", state=state,
+                         command=lambda: self.start_rerun(self.pareto_front))
+        menu.add_separator()
+        menu.add_command(label="Cancel", command=self.cancel_rerun)
+        button.config(menu=menu)
+        button.pack()
+        self.rerun_label = tk.Label(self.launch_frame, font='Helvetica 10', 
+                                    bg="white")
+        self.rerun_label.pack()
         
-        self.plot2D.cla()
-        self.plot3D.cla()
+    def start_rerun(self, rows):
+        """ Re-evaluate the solutions of rows in a thread of its own. """
+        if self.rerun_results is not None:
+            self.rerun_label.config(text="Re-evaluation in progress")
+            return
+        if self.executable is None:
+            self.rerun_label.config(text="Re-evaluation needs --executable")
+            return
+        if self.follower is not None or \
+           (self.stream is not None and not self.stream.done):
+            self.rerun_label.config(text="Not while results are loaded")
+            return
+        if len(rows) == 0:
+            self.rerun_label.config(text="No solutions to re-evaluate")
+            return
+        if len(rows) > MAX_RERUN_UNASKED and not messagebox.askokcancel(
+                "Re-evaluate", "Re-evaluate {} solutions?".format(len(rows))):
+            return
+        parameter_ids = [DataStorage.get_parameter_id(row) for row in rows]
+        self.rerun_results = queue.Queue()
+        self.rerun_cancelled = threading.Event()
+        self.rerun_progress = [0, len(parameter_ids)]
         
-        if self.check_var.get() == "3D":
-            self.fig = self.fig3D
-            self.canvas = self.canvas3D
-            self.plot = self.plot3D
-        else:
-            self.fig = self.fig2D
-            self.canvas = self.canvas2D
-            self.plot = self.plot2D
-            
-            
+        def run():
+            def on_done(i):
+                self.rerun_progress[0] += 1
+            try:
+                result = rerun(DataStorage.get_evaluation_name(), 
+                               DataStorage.get_useROS_bool(), parameter_ids,
+                               self.executable, cancelled=self.rerun_cancelled, 
+                               on_done=on_done)
+                self.rerun_results.put((result, None))
+            except Exception:
+                self.rerun_results.put((None, traceback.format_exc()))
+        threading.Thread(target=run, daemon=True).start()
+        self.poll_rerun()
+        
+    def cancel_rerun(self):
+        if self.rerun_results is not None:
+            self.rerun_cancelled.set()
+        
+    def poll_rerun(self):
+        try:
+            result, error = self.rerun_results.get_nowait()
+        except queue.Empty:
+            self.rerun_label.config(text="Re-evaluated {}/{} solutions".format(
+                *self.rerun_progress))
+            self.master.after(RERUN_INTERVAL, self.poll_rerun)
+            return
+        self.rerun_results = None
+        if error is not None:
+            print(error)
+            self.rerun_label.config(text="Re-evaluation failed")
+            return
+        rows, failed = result
+        for parameter_id, reason in failed.items():
+            print("Re-evaluating parameterID {} failed: {}".format(parameter_id, 
+                                                                   reason))
+        text = "{} re-evaluated, {} failed".format(len(rows.index), len(failed))
+        if len(rows.index) == 0:
+            self.rerun_label.config(text=text)
+            return
+        # the worker reads the data, so it is updated in between its jobs
+        self.worker.submit("rows", lambda job: DataStorage.update_rows(rows),
+                           callback=lambda updated: self.on_rows_updated(updated, 
+                                                                         text))
+        
+    def on_rows_updated(self, updated, text):
+        if not updated:
+            self.rerun_label.config(text=text + ", restart to load them")
+            return
+        self.rerun_label.config(text=text)
+        self.get_data()
+        self.set_axes_data()
+        self.reset_slider_values()
+        self.rebuild_selection()
+        self.scheduler.mark(SELECTION, CURRENT)
+        
+    def get_pareto_directions(self):
+        directions = {}
+        for name, var in self.pareto_vars.items():
+            if var.get() == "minimize":
+                directions[name] = MINIMIZE
+            elif var.get() == "maximize":
+                directions[name] = MAXIMIZE
+        return directions
+        
+    def get_spatial_index(self):
         """
-        circle current solution in plot
+        Index of the plotted points, None while it is rebuilt in the background
+        after the points, axes or view changed.
         """
-        self.plot_data()
-        if self.check_var.get() == "3D":
-            self.plot.scatter(x_val, y_val, z_val, facecolors='k', edgecolors='k',
-                              linewidth=3, s=150, alpha=1)
+        ax = self.plot
+        is_3D = self.check_var.get() == "3D"
+        key = (is_3D, self.plot_version, tuple(ax.bbox.bounds), 
+               ax.get_xlim(), ax.get_ylim())
+        if is_3D:
+            key += (ax.get_zlim(), ax.get_proj().tobytes())
+        if key == self.spatial_key:
+            return self.spatial_index
+        if key != self.requested_spatial_key:
+            self.requested_spatial_key = key
+            renderer = self.renderer
+            z = renderer.z if is_3D else None
+            projection = ax.get_proj().copy() if is_3D else None
+            x0, y0, width, height = ax.bbox.bounds
+            self.worker.submit("spatial", build_spatial_index, renderer.x, 
+                               renderer.y, z, projection, ax.transData.frozen(),
+                               (x0, y0, x0 + width, y0 + height),
+                               callback=lambda index: self.on_spatial_index(key, index))
+        return None
+        
+    def on_spatial_index(self, key, index):
+        self.spatial_index = index
+        self.spatial_key = key
+        if self.pending_click is not None:
+            event, self.pending_click = self.pending_click, None
+            self.pick_at(event)
+        
+    def get_points_at(self, x, y):
+        """
+        Rows drawn on top of each other nearest to (x, y), selected first, or 
+        None if the spatial index is not ready.
+        """
+        index = self.get_spatial_index()
+        if index is None:
+            return None
+        candidates = index.query(x, y)
+        selected = self.selected_mask[index.rows[candidates]]
+        if selected.any():
+            candidates = candidates[selected]
+        return index.rows[index.get_coincident(candidates)]
+        
+    def is_navigating(self, event):
+        # zooming or panning with the toolbar
+        toolbar = self.toolbar3D if self.check_var.get() == "3D" else self.toolbar2D
+        return bool(toolbar.mode) or event.inaxes is not self.plot
+        
+    def on_press(self, event):
+        self.press_position = (event.x, event.y)
+        
+    def on_release(self, event):
+        if event.button != 1 or self.press_position is None or \
+           self.is_navigating(event):
+            return
+        # rotating the 3D plot is not a click
+        if np.hypot(event.x - self.press_position[0], 
+                    event.y - self.press_position[1]) > CLICK_TOLERANCE:
+            return
+        self.pick_at(event)
+        
+    @trace.traced(interaction=True)
+    def pick_at(self, event):
+        rows = self.get_points_at(event.x, event.y)
+        if rows is None:
+            # picked once the spatial index is rebuilt
+            self.pending_click = event
+            return
+        if len(rows) == 0:
+            return
+        # clicking the same spot again cycles through coincident points
+        previous_rows, previous = self.pick_cycle
+        if np.array_equal(rows, previous_rows):
+            picked = (previous + 1) % len(rows)
         else:
-            self.plot.scatter(x_val, y_val, facecolors='none', edgecolors='k',
-                          linewidth=3, s=150, alpha=1)
+            picked = 0
+        self.pick_cycle = (rows, picked)
+        self.set_current_solution(rows[picked])
+        self.show_tooltip(event, rows, picked)
+        
+    def on_motion(self, event):
+        if event.button is not None or self.is_navigating(event):
+            self.hide_tooltip()
+            return
+        rows = self.get_points_at(event.x, event.y)
+        if rows is None or len(rows) == 0:
+            self.hide_tooltip()
+            return
+        previous_rows, previous = self.pick_cycle
+        picked = previous if np.array_equal(rows, previous_rows) else 0
+        self.show_tooltip(event, rows, picked)
+        
+    def show_tooltip(self, event, rows, picked):
+        row = rows[picked]
+        lines = ["{}: {}".format(param, self.df[param].iloc[row]) 
+                 for param in self.evalparam_names]
+        if len(rows) > 1:
+            lines.append("{}/{} coincident, click to cycle".format(picked + 1, 
+                                                                   len(rows)))
+        tooltip = self.tooltips[self.canvas]
+        tooltip.config(text="\n".join(lines))
+        # Tk measures from the top, matplotlib from the bottom
+        tooltip.place(x=event.x + 15, y=self.fig.bbox.height - event.y + 15)
+        
+    def hide_tooltip(self):
+        for tooltip in self.tooltips.values():
+            tooltip.place_forget()
+            
+    def set_current_solution(self, row):
+        self.current_solution_ind = row
+        self.scheduler.mark(CURRENT)
             
-        self.plot3D.mouse_init()
-        self.canvas.draw()
+    @trace.traced()
+    def update_current_solution(self, blit=True):
+        """ Move the marker of the current solution without drawing the points. """
+        row = self.current_solution_ind
+        x_val, y_val, z_val = (self.df[self.axis_names_dict[axis]].iloc[row]
+                               for axis in ("x", "y", "z"))
+        self.renderer.set_current(x_val, y_val, z_val, blit)
+        
+    @trace.traced()
+    def update_solution_labels(self):
         """
         update slider position and entry value of current solution
         """
-        for param in self.df.columns:
-            slider = self.slider_dict[param]
-            val = self.current_solution[param]
-            pos = slider.position_values[slider.values.index(val)]
-            slider.update_cursor_pos("current_solution", pos)
-            self.currentsolution_dict[param].config(text=val)
+        for model in self.slider_models.values():
+            model.current_row = self.current_solution_ind
+        for row in self.slider_frame.get_visible_rows():
+            row.draw_current()
 
     def launch_solution(self):
+        """ Queue a demonstration of the current solution. """
         evaluation_name = DataStorage.get_evaluation_name()
-        use_ROS = DataStorage.get_useROS_bool()
-        time_scale = DataStorage.get_time_scale()
-        framework_path = parser.get_path_to_objectives(evaluation_name, use_ROS).parents[2]
-        sub_dirs = ["bin", "Release", "netcoreapp3.1"]
-        exe_path = framework_path / sub_dirs[0] / sub_dirs[1] / sub_dirs[2]
-        if (use_ROS):
-            exe_name = "EvaluationFrameworkROS.exe"
-        else:
-            exe_name = "EvaluationFramework.exe"
-        args = str(exe_path / exe_name)
-        """ 
-        send id of currently selected parameter set 
-        (i.e. of current solution)
-        """
-        args += " --demonstration -timeScale {0}".format(time_scale)
-        args += " -evaluationName {0}".format(evaluation_name)
-        args += " -parameterID {0}".format(self.current_solution_ind)
+        executable = self.executable
+        if executable is None:
+            executable = get_default_executable(evaluation_name, 
+                                                DataStorage.get_useROS_bool())
+        # id of the current solution in the grid of evaluation parameters
+        parameter_id = DataStorage.get_parameter_id(self.current_solution_ind)
+        command = get_command(executable, get_demonstration_args(
+            evaluation_name, DataStorage.get_time_scale(), parameter_id))
+        self.show_launch_panel()
+        self.launcher.submit(parameter_id, command)
+        
+    def show_launch_panel(self):
+        if self.launch_panel is None:
+            self.launch_panel = LaunchPanel(self.master, self.launcher)
+        self.launch_panel.deiconify()
         
-        subprocess.run(args, capture_output=False)
+    def on_launch_change(self, run):
+        if self.launch_panel is not None:
+            self.launch_panel.update_run(run)
         
     def setup_dropdown_components(self):
         self.x_Dropdown = NestedAxisDropdown(self.xdropdown_frame, self.df.columns, 
@@ -451,6 +806,7 @@ class GUIRoot:
                                         self.on_dropdown_change(tkvar=self.color_Dropdown.tkvar,
                                                                 axis=self.color_Dropdown.axis))
             
+    @trace.traced(interaction=True)
     def on_dropdown_change(self, *args, tkvar, axis):
             val = self.df[tkvar.get()]
             if axis == "x":
@@ -465,71 +821,106 @@ class GUIRoot:
             elif axis == "color":
                 self.color_axis = val
                 self.axis_names_dict["color"] = tkvar.get()
-            self.plot_data()
-            self.update_current_solution()
+                self.scheduler.mark(COLORS)
+                return
+            self.scheduler.mark(AXES)
         
     def setup_slider_components(self):
-        self.slider_dict = {}
-        self.lowerentry_dict = {}
-        self.upperentry_dict = {}
-        self.currentsolution_dict = {}
-        for i, param in enumerate(self.df.columns):
-            lbl = tk.Label(self.slider_frame.interior, text=param, font='Helvetica 12 bold',
-                           bg="slate gray")
-            lbl.grid(row=i, column=0, padx=10, sticky=tk.W+tk.E)
-            
-            self.slider_dict[param] = EvaluationParameterSlider(self.slider_frame.interior, 
-                                                                self.df, 
-                                                                param,
-                                                                self.on_slider_change)
-            self.lowerentry_dict[param] = ValueEntry(self.slider_frame.interior,
-                                                     self.on_entry_change, 
-                                                     "center", "lower", i, 1,
-                                                     param)
-            self.slider_dict[param].grid(row=i, column = 2, padx=10, pady=10)
-            self.upperentry_dict[param] = ValueEntry(self.slider_frame.interior,
-                                                     self.on_entry_change,
-                                                     "center", "upper", i, 3,
-                                                     param)
-            lbl = tk.Label(self.slider_frame.interior,
-                           text=self.slider_dict[param].values[0], 
-                           font='Helvetica 12 bold',
-                           fg="red", bg="white")
-            lbl.grid(row=i, column=4, padx=10, sticky=tk.W+tk.E)
-            self.currentsolution_dict[param] = lbl
-            
-            self.lowerentry_dict[param].set_default(self.slider_dict[param].tkvar_values_dict["cursor_l"])
-            self.upperentry_dict[param].set_default(self.slider_dict[param].tkvar_values_dict["cursor_u"])
-            
-    def on_slider_change(self, *args):
-        tkvar = args[0]
-        param = None
-        for slider in self.slider_dict.values():
-            for var in slider.tkvar_dict.values():
-                if str(var) == tkvar:
-                    param = slider.evalparam
-                    break
-        
-        borders = list(self.slider_dict[param].tkvar_values_dict.values())
-        lower_ind = self.slider_dict[param].values.index(borders[0]) 
-        upper_ind = self.slider_dict[param].values.index(borders[-1])
-        if (lower_ind < upper_ind):
-            values = self.slider_dict[param].values[lower_ind:upper_ind+1]
-        else:
-            values = self.slider_dict[param].values[upper_ind:lower_ind+1]
+        """
+        SLIDER FRAME, only the sliders in view have widgets
+        """
+        self.slider_models = {}
+        for param in self.df.columns:
+            has_marginal = param in self.evalparam_names and bool(self.objval_names)
+            self.slider_models[param] = SliderModel(param, 
+                                                    lambda param=param: self.df[param],
+                                                    has_marginal)
+        self.marginal_names = [param for param, model in self.slider_models.items()
+                               if model.has_marginal]
+        label_width = max(len(param) for param in self.df.columns)
+        self.slider_frame = VirtualSliderList(self.bot_frame, 
+                                              list(self.slider_models.values()),
+                                              lambda master, index: 
+                                                  SliderRow(master, index, 
+                                                            self.on_slider_change,
+                                                            self.on_slider_drag,
+                                                            self.on_entry_change,
+                                                            label_width),
+                                              refresh_callback=lambda:
+                                                  self.scheduler.mark(MARGINALS),
+                                              bg="slate gray", 
+                                              width=self.bot_frame.winfo_width(), 
+                                              height=self.bot_frame.winfo_height(),
+                                              bd=2, relief=tk.RIDGE)
+        self.slider_frame.grid(row=0, column=0, sticky=tk.W+tk.N+tk.S+tk.E)
             
-        self.lowerentry_dict[param].update(min(values))
-        self.upperentry_dict[param].update(max(values))
+    @trace.traced(interaction=True)
+    def on_slider_change(self, param):
+        lower_ind, upper_ind = self.slider_models[param].get_indices()
+        self.submit_range(param, lower_ind, upper_ind, SELECTION)
+        
+    @trace.traced(interaction=True)
+    def on_slider_drag(self, param):
+        """ Keep the marginal plots live while a cursor is dragged. """
+        lower_ind, upper_ind = self.slider_models[param].get_indices()
+        self.submit_range(param, lower_ind, upper_ind, MARGINALS)
+        
+    def submit_range(self, param, lower_ind, upper_ind, part):
+        """ Filter a parameter in the background, then render part. """
+        # a newer range of the parameter supersedes this one
+        self.worker.submit(("range", param), self.set_range, param, lower_ind,
+                           upper_ind, callback=lambda _: self.scheduler.mark(part))
+        
+    def set_range(self, job, param, lower_ind, upper_ind):
+        # slider indices are levels of the selection index
+        self.cube.update(*self.selection.set_range(param, lower_ind, upper_ind))
+        
+    def get_marginal_objective(self):
+        """ Objective summarized beside the sliders, the one on the y-axis. """
+        if self.axis_names_dict["y"] in self.objval_names:
+            return self.axis_names_dict["y"]
+        if not self.objval_names:
+            return None
+        return self.objval_names[0]
+        
+    def summarize_marginals(self, job, objective, names):
+        """
+        Summaries of the objective per parameter level and the histograms of
+        the selected rows of the sliders in view, in the worker. The cube
+        only builds the summaries of these sliders.
+        """
+        summaries = {}
+        for param in names:
+            if objective is None or param not in self.marginal_names:
+                continue
+            if not job.is_current():
+                return None
+            summaries[param] = self.cube.get_summary(param, objective)
+        mask = self.selection.get_mask()
+        histograms = {}
+        for name in names:
+            if not job.is_current():
+                return None
+            index = self.selection.get_index(name)
+            histograms[name] = np.bincount(index.get_codes()[mask], 
+                                           minlength=index.num_levels)
+        return summaries, histograms
         
-        selection = set(self.df[param][self.df[param].isin(values)].index)
-        self.selected_vals_dict[param] = selection
-        self.selected = set.intersection(*self.selected_vals_dict.values())
-        self.plot_data()
-        self.update_current_solution()
+    @trace.traced()
+    def update_marginal_plots(self, result):
+        summaries, histograms = result
+        for param, (_, mean, minimum, maximum) in summaries.items():
+            self.slider_models[param].marginal = (mean, minimum, maximum)
+        for name, histogram in histograms.items():
+            self.slider_models[name].histogram = histogram
+        for row in self.slider_frame.get_visible_rows():
+            row.draw_marginal()
+            row.slider.draw_histogram()
         
+    @trace.traced(interaction=True)
     def on_entry_change(self, *args, entry, tkvar, location, param):
         value = 0
-        slider = self.slider_dict[param]
+        model = self.slider_models[param]
         if (location == "lower"):
             cursor = "cursor_l"
         elif (location == "upper"):
@@ -538,17 +929,132 @@ class GUIRoot:
         try:
             value = float(entry.tkvar.get())
         except ValueError:
-            self.lowerentry_dict[param].update(slider.tkvar_values_dict[cursor])
+            self.slider_frame.update_model(model)
             return
         
         # get possible value closest to entered value
-        closest = min(list(slider.values), 
-                      key=lambda x:abs(x-value))
-        slider.tkvar_values_dict[cursor] = closest
-        slider.tkvar_dict[cursor].set(closest)
-        new_pos = slider.position_values[slider.values.index(closest)]
-        slider.update_cursor_pos(cursor, new_pos)
+        model.set_cursor(cursor, model.get_closest_index(value))
+        self.slider_frame.update_model(model)
+        self.on_slider_change(param)
+        
+    def follow_stream(self, stream):
+        """ Add the remaining chunks of a ChunkStream while the GUI is running. """
+        self.stream = stream
+        self.progress_var = tk.DoubleVar(value=100*stream.get_progress())
+        self.progress_bar = ttk.Progressbar(self.launch_frame, length=200,
+                                            maximum=100, mode="determinate",
+                                            variable=self.progress_var)
+        self.progress_bar.pack()
+        self.progress_label = tk.Label(self.launch_frame, font='Helvetica 10',
+                                       bg="white")
+        self.progress_label.pack()
+        self.update_progress()
+        self.master.after(50, self.poll_stream)
+        
+    def poll_stream(self):
+        try:
+            chunks = self.stream.get_chunks()
+        except Exception:
+            traceback.print_exc()
+            self.progress_label.config(text="Loading failed after {} variants".format(
+                len(self.df.index)))
+            return
+        
+        if chunks:
+            DataStorage.append_data(chunks)
+            self.extend_data()
+        self.update_progress()
+        
+        if self.stream.done:
+            DataStorage.finish_stream()
+            self.get_data()
+            self.set_axes_data()
+            self.reset_slider_values()
+            self.rebuild_selection()
+            self.progress_bar.pack_forget()
+            self.progress_label.pack_forget()
+        else:
+            self.master.after(50, self.poll_stream)
+            
+    def update_progress(self):
+        self.progress_var.set(100*self.stream.get_progress())
+        self.progress_label.config(text="{} variants loaded".format(
+            len(DataStorage.get_data().index)))
         
+    def follow_results(self, follower):
+        """ Add rows appended to Results.txt while the evaluation is running. """
+        self.follower = follower
+        self.progress_label = tk.Label(self.launch_frame, font='Helvetica 10',
+                                       bg="white")
+        self.progress_label.pack()
+        self.update_follow_label()
+        self.master.after(FOLLOW_INTERVAL, self.poll_results)
+        
+    def poll_results(self):
+        try:
+            chunks = self.follower.poll()
+        except Exception:
+            traceback.print_exc()
+            self.progress_label.config(text="Following failed after {} variants".format(
+                len(self.df.index)))
+            return
+        
+        if chunks:
+            DataStorage.append_data(chunks)
+            self.extend_data()
+        if self.follower.restarted:
+            self.progress_label.config(text="Results.txt was replaced, restart to load it")
+            return
+        self.update_follow_label()
+        self.master.after(FOLLOW_INTERVAL, self.poll_results)
+        
+    def update_follow_label(self):
+        self.progress_label.config(text="{} variants loaded, following results".format(
+            len(DataStorage.get_data().index)))
+        
+    def extend_data(self):
+        """ Show rows added to the DataStorage after the GUI was built. """
+        num_old = len(self.df.index)
+        self.get_data()
+        new_rows = self.df.index[num_old:]
+        if len(new_rows) == 0:
+            return
+        
+        self.set_axes_data()
+        self.reset_slider_values()
+        self.rebuild_selection()
+        self.scheduler.mark(SELECTION, CURRENT)
+        
+    def reset_slider_values(self):
+        """ Values of the sliders including new rows, found once shown. """
+        for model in self.slider_models.values():
+            model.reset_values()
+        self.slider_frame.refresh()
+        
+    def rebuild_selection(self):
+        """ Apply the current slider ranges to a new selection of all rows. """
+        ranges = dict((param, model.get_indices()) 
+                      for param, model in self.slider_models.items()
+                      if model.is_filtered())
+        self.worker.submit("rebuild", self.build_selection, self.df, ranges,
+                           callback=lambda _: self.scheduler.mark(SELECTION))
+        
+    def build_selection(self, job, df, ranges):
+        selection = SelectionEngine(df)
+        for param, (lower_ind, upper_ind) in ranges.items():
+            selection.set_range(param, lower_ind, upper_ind)
+        cube = MarginalCube(df, selection)
+        self.selection, self.cube = selection, cube
+        # cached fronts of the same selection are stale once values changed
+        self.pareto = ParetoEngine()
+        
+    def set_axes_data(self):
+        self.x_axis = self.df[self.axis_names_dict["x"]]
+        self.y_axis = self.df[self.axis_names_dict["y"]]
+        self.z_axis = self.df[self.axis_names_dict["z"]]
+        self.color_axis = self.df[self.axis_names_dict["color"]]
+        
+    @trace.traced(interaction=True)
     def update_plot_shape(self):
         if self.check_var.get() == "2D":
             self.figure_frame3D.grid_forget()
@@ -570,14 +1076,70 @@ class GUIRoot:
             self.zdropdown_frame.grid(row=0, column=0, sticky=tk.S, 
                                       padx=4, pady=4)
         
-        self.update_current_solution()
+        self.scheduler.mark(AXES, CURRENT)
         
         
-def run_gui(evaluation_name, use_ROS, time_scale):
-    # fill data
-    DataStorage.fill_data_storage(evaluation_name, use_ROS, time_scale)
+def build_spatial_index(job, x, y, z, projection, transform, bounds):
+    """ GridIndex of points at display positions, z and projection in 3D. """
+    if z is not None:
+        from mpl_toolkits.mplot3d import proj3d
+        x, y, _ = proj3d.proj_transform(x, y, z, projection)
+    positions = transform.transform(np.column_stack([x, y]))
+    return GridIndex(positions, np.arange(len(x)), bounds)
+        
+def load_data_storage(evaluation_name, use_ROS, time_scale, use_cache=True, 
+                      rebuild_cache=False, memory_map=False, chunk_size=None,
+                      float32=False, follow=False, evaluations=None, 
+                      memory_budget=None):
+    """
+    Fill the DataStorage, only the first chunk if streaming. Returns the
+    ChunkStream and the ResultsFollower adding the remaining rows, if any.
+    """
+    if memory_budget is None:
+        memory_budget = MEMORY_BUDGET
+    stream = None
+    follower = None
+    if evaluations is not None and len(evaluations) > 1:
+        DataStorage.fill_comparison_storage(evaluations, time_scale, use_cache,
+                                            rebuild_cache, float32, memory_budget)
+    elif follow:
+        follower = DataStorage.follow_data_storage(evaluation_name, use_ROS,
+                                                   time_scale)
+    elif chunk_size is not None and not memory_map:
+        stream = DataStorage.stream_data_storage(evaluation_name, use_ROS, 
+                                                 time_scale, use_cache, 
+                                                 rebuild_cache, chunk_size,
+                                                 float32, memory_budget)
+    else:
+        DataStorage.fill_data_storage(evaluation_name, use_ROS, time_scale,
+                                      use_cache, rebuild_cache, memory_map,
+                                      float32, memory_budget)
+    return stream, follower
+    
+def start_gui(root, stream=None, follower=None, 
+              density_threshold=density.DENSITY_THRESHOLD, density_selected=False,
+              executable=None, max_launches=1, trace_overlay=False):
+    """ Build the GUI in the Tk root once the DataStorage is filled. """
+    gui = GUIRoot(root, density_threshold, density_selected, executable, 
+                  max_launches, trace_overlay)
+    if stream is not None:
+        gui.follow_stream(stream)
+    if follower is not None:
+        gui.follow_results(follower)
+    return gui
     
+def run_gui(evaluation_name, use_ROS, time_scale, use_cache=True, 
+            rebuild_cache=False, memory_map=False, chunk_size=None,
+            float32=False, follow=False, evaluations=None, 
+            memory_budget=None, density_threshold=density.DENSITY_THRESHOLD,
+            density_selected=False, executable=None, max_launches=1,
+            trace_overlay=False):
+    stream, follower = load_data_storage(evaluation_name, use_ROS, time_scale,
+                                         use_cache, rebuild_cache, memory_map,
+                                         chunk_size, float32, follow, 
+                                         evaluations, memory_budget)
     root = tk.Tk()
-    gui = GUIRoot(root)
+    start_gui(root, stream, follower, density_threshold, density_selected,
+              executable, max_launches, trace_overlay)
     # start main GUI loop
     root.mainloop()
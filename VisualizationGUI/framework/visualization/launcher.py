@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Queue of demonstration runs of the evaluation framework
+
+Launching a solution queues a run of the framework executable with
+--demonstration -parameterID. At most max_running runs are executed at once,
+the others wait in submission order. The output of every run is read by a
+thread of its own and handed to the Tk thread, which polls for it with after
+like the BackgroundWorker, so the GUI keeps reacting while runs are going on.
+Runs can be cancelled (terminated, killed if they do not exit in time) or
+killed right away. The executable is pluggable: a Python script is run with
+the current interpreter, e.g. the stand-in tools/fake_framework.py on Linux.
+"""
+
+from framework.data import parser
+
+import sys
+import time
+import queue
+import threading
+import subprocess
+import collections
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+# milliseconds between two checks for output and exited runs
+POLL_INTERVAL = 100
+# seconds a cancelled run may take to exit before it is killed
+KILL_TIMEOUT = 5
+# lines of output kept per run
+MAX_OUTPUT_LINES = 1000
+
+def get_default_executable(evaluation_name, use_ROS):
+    """ Build of the evaluation framework next to the evaluations. """
+    framework_path = parser.get_path_to_objectives(evaluation_name, use_ROS).parents[2]
+    exe_path = framework_path / "bin" / "Release" / "netcoreapp3.1"
+    if use_ROS:
+        return exe_path / "EvaluationFrameworkROS.exe"
+    return exe_path / "EvaluationFramework.exe"
+
+def get_command(executable, args):
+    """
+    Command line of an executable, Python scripts run by this interpreter.
+    The executable may also be a list, e.g. a script with options of its own.
+    """
+    if isinstance(executable, (list, tuple)):
+        return list(executable) + args
+    if str(executable).endswith(".py"):
+        return [sys.executable, str(executable)] + args
+    return [str(executable)] + args
+
+def get_demonstration_args(evaluation_name, time_scale, parameter_id):
+    return ["--demonstration", "-timeScale", str(time_scale),
+            "-evaluationName", evaluation_name, "-parameterID", str(parameter_id)]
+
+class Run:
+    def __init__(self, number, parameter_id, command):
+        self.number = number
+        self.parameter_id = parameter_id
+        self.command = command
+        self.state = QUEUED
+        self.process = None
+        self.return_code = None
+        self.output = collections.deque(maxlen=MAX_OUTPUT_LINES)
+        self.cancelled = False
+        # set once the reader thread forwarded the last line of output
+        self.output_closed = False
+        # time.monotonic() after which a cancelled run is killed
+        self.kill_time = None
+        
+    def is_active(self):
+        return self.state in (QUEUED, RUNNING)
+        
+    def get_status(self):
+        status = "#{} parameterID {}: {}".format(self.number, self.parameter_id, 
+                                                 self.state)
+        if self.state == FAILED and self.return_code is not None:
+            status += " (exit code {})".format(self.return_code)
+        return status
+
+class Launcher:
+    def __init__(self, widget, max_running=1, on_change=None, 
+                 poll_interval=POLL_INTERVAL):
+        """ on_change is called with a run in the Tk thread whenever it changed. """
+        self.widget = widget
+        self.max_running = max(1, max_running)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.runs = []
+        self.queued = collections.deque()
+        self.running = []
+        # lines of output of all runs
+        self.output = queue.Queue()
+        self.poll_id = None
+        
+    def submit(self, parameter_id, command):
+        run = Run(len(self.runs) + 1, parameter_id, command)
+        self.runs.append(run)
+        self.queued.append(run)
+        self.start_queued()
+        self.notify(run)
+        self.schedule()
+        return run
+        
+    def start_queued(self):
+        while self.queued and len(self.running) < self.max_running:
+            run = self.queued.popleft()
+            try:
+                run.process = subprocess.Popen(run.command, stdout=subprocess.PIPE,
+                                               stderr=subprocess.STDOUT,
+                                               stdin=subprocess.DEVNULL,
+                                               universal_newlines=True, 
+                                               errors="replace", bufsize=1)
+            except OSError as error:
+                run.state = FAILED
+                run.output.append("Could not start {}: {}".format(run.command[0], 
+                                                                  error))
+                self.notify(run)
+                continue
+            run.state = RUNNING
+            self.running.append(run)
+            threading.Thread(target=self.read_output, args=(run,), 
+                             daemon=True).start()
+            self.notify(run)
+            
+    def read_output(self, run):
+        """ Forward the output of a run line by line, in its own thread. """
+        # lines arriving after the run exited are still added to its output,
+        # None marks the end of it
+        try:
+            for line in run.process.stdout:
+                self.output.put((run, line.rstrip("\n")))
+            run.process.stdout.close()
+        finally:
+            self.output.put((run, None))
+        
+    def cancel(self, run):
+        """ Drop a queued run, or ask a running one to exit. """
+        if run.state == QUEUED:
+            self.queued.remove(run)
+            run.state = CANCELLED
+            self.notify(run)
+        elif run.state == RUNNING and not run.cancelled:
+            run.cancelled = True
+            run.kill_time = time.monotonic() + KILL_TIMEOUT
+            run.process.terminate()
+            
+    def kill(self, run):
+        if run.state == QUEUED:
+            self.cancel(run)
+        elif run.state == RUNNING:
+            run.cancelled = True
+            run.process.kill()
+            
+    def schedule(self):
+        if self.poll_id is None and (self.running or self.queued):
+            self.poll_id = self.widget.after(self.poll_interval, self.poll)
+            
+    def poll(self):
+        self.poll_id = None
+        changed = set()
+        while True:
+            try:
+                run, line = self.output.get_nowait()
+            except queue.Empty:
+                break
+            if line is None:
+                run.output_closed = True
+            else:
+                run.output.append(line)
+            changed.add(run)
+        for run in list(self.running):
+            # a run is only finished with all of its output read
+            if run.process.poll() is not None and run.output_closed:
+                self.finish(run)
+                changed.add(run)
+            elif run.kill_time is not None and time.monotonic() > run.kill_time:
+                run.kill_time = None
+                run.process.kill()
+        self.start_queued()
+        for run in sorted(changed, key=lambda run: run.number):
+            self.notify(run)
+        self.schedule()
+        
+    def finish(self, run):
+        self.running.remove(run)
+        run.return_code = run.process.returncode
+        if run.cancelled:
+            run.state = CANCELLED
+        elif run.return_code == 0:
+            run.state = FINISHED
+        else:
+            run.state = FAILED
+            
+    def notify(self, run):
+        if self.on_change is not None:
+            self.on_change(run)
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Artists of the 2D and 3D plot
+
+The 2D plot keeps its artists for the lifetime of the GUI and only updates
+their offsets, colors and color limits. The current solution is an animated
+artist: after every full draw the figure is cached, and moving the marker
+only restores the cache and draws the marker on top of it (blitting).
+After zooming, the points in view are binned again by a BackgroundWorker, if
+given, and the layers are applied once they are ready.
+3D scatters have no public way to update their offsets, so the 3D plot is
+built again on changes of the data, but not on picks.
+"""
+
+from framework import trace
+from framework.visualization import density
+
+import numpy as np
+
+# margin around the data like the default of matplotlib
+MARGIN = 0.05
+
+def to_float(column):
+    """ Values of a column as floats, also of dictionary-encoded ones. """
+    return np.asarray(column.to_numpy(), dtype=np.float64)
+
+def get_limits(values):
+    """ Limits of the finite values with a margin, None if there are none. """
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return None
+    low, high = finite.min(), finite.max()
+    margin = MARGIN*(high - low) or 0.5
+    return low - margin, high + margin
+
+def get_offsets(x, y, rows):
+    return np.column_stack([x[rows], y[rows]])
+
+def get_view(x, y):
+    """ Limits (xlim, ylim) showing all points. """
+    return get_limits(x), get_limits(y)
+
+class Layers:
+    """ Rows drawn as markers and images of the binned rows of a 2D view. """
+    def __init__(self, deselected_rows, deselected_counts, selected_rows,
+                 selected_means, extent, color_limits):
+        self.deselected_rows = deselected_rows
+        self.deselected_counts = deselected_counts
+        self.selected_rows = selected_rows
+        self.selected_means = selected_means
+        self.extent = extent
+        self.color_limits = color_limits
+
+def bin_layers(x, y, color, selected, deselected, xlim, ylim, shape,
+               density_threshold=density.DENSITY_THRESHOLD, density_selected=False):
+    """
+    Layers of the points in view, binned if there are more than
+    density_threshold points in total and in view.
+    """
+    use_density = len(x) > density_threshold
+    extent = sorted(xlim) + sorted(ylim)
+    finite = color[selected]
+    finite = finite[np.isfinite(finite)]
+    color_limits = (finite.min(), finite.max()) if len(finite) else None
+
+    deselected_counts = None
+    if use_density:
+        deselected = deselected[density.get_in_view(x[deselected], y[deselected],
+                                                    xlim, ylim)]
+        if len(deselected) > density_threshold:
+            deselected_counts = density.get_counts(x[deselected], y[deselected],
+                                                   xlim, ylim, shape)
+            deselected = deselected[:0]
+
+    selected_means = None
+    if use_density:
+        selected = selected[density.get_in_view(x[selected], y[selected],
+                                                xlim, ylim)]
+        if density_selected and len(selected) > density_threshold:
+            # mean color value of the points in a bin
+            selected_means = density.get_means(x[selected], y[selected],
+                                               color[selected], xlim, ylim, shape)
+            selected = selected[:0]
+    return Layers(deselected, deselected_counts, selected, selected_means,
+                  extent, color_limits)
+
+class PlotRenderer2D:
+    def __init__(self, fig, canvas, ax, density_threshold=density.DENSITY_THRESHOLD,
+                 density_selected=False, worker=None):
+        self.fig = fig
+        self.canvas = canvas
+        self.ax = ax
+        # views with more points are drawn as density images
+        self.density_threshold = density_threshold
+        self.density_selected = density_selected
+        # BackgroundWorker binning the points after zooming, if any
+        self.worker = worker
+
+        self.deselected_markers = ax.scatter([], [], c='grey', s=100, alpha=0.1)
+        self.deselected_image = ax.imshow(np.zeros((1, 1)), cmap='Greys',
+                                          alpha=0.3, origin='lower',
+                                          aspect='auto', interpolation='nearest',
+                                          visible=False)
+        self.selected_markers = ax.scatter([], [], c=[], cmap='rainbow', alpha=1,
+                                           s=100)
+        self.selected_image = ax.imshow(np.zeros((1, 1)), cmap='rainbow',
+                                        norm=self.selected_markers.norm,
+                                        origin='lower', aspect='auto',
+                                        interpolation='nearest', visible=False)
+        self.pareto_markers = []
+        self.current_marker = ax.scatter([], [], facecolors='none',
+                                         edgecolors='k', linewidth=3, s=150,
+                                         alpha=1, animated=True)
+        self.colorbar = fig.colorbar(self.selected_markers, ax=ax)
+        self.colorbar.ax.tick_params(labelsize=15)
+        ax.tick_params(labelsize=15)
+
+        self.x = self.y = self.color = np.zeros(0)
+        self.selected = self.deselected = np.zeros(0, dtype=np.int64)
+        self.background = None
+        canvas.mpl_connect('draw_event', self.on_draw)
+        # zooming and panning bins the points in view again, once per change
+        self.view_timer = canvas.new_timer(interval=0)
+        self.view_timer.single_shot = True
+        self.view_timer.add_callback(self.refresh_view)
+        self.view_pending = False
+        ax.callbacks.connect('xlim_changed', self.on_view_change)
+        ax.callbacks.connect('ylim_changed', self.on_view_change)
+
+    def set_data(self, x, y, color, selected, deselected, view=None, layers=None):
+        """
+        Show new points, in the view (xlim, ylim) if given. layers of the
+        points can be binned in advance with bin_layers.
+        """
+        self.x, self.y, self.color = x, y, color
+        self.selected, self.deselected = selected, deselected
+        if view is not None:
+            # the layers are updated below anyway
+            self.view_pending = True
+            for limits, set_lim in zip(view, (self.ax.set_xlim, self.ax.set_ylim)):
+                if limits is not None:
+                    set_lim(*limits)
+            self.view_pending = False
+        self.apply_layers(layers or self.bin_view())
+
+    def set_labels(self, axis_names):
+        self.colorbar.ax.set_ylabel(axis_names["color"], fontsize=15,
+                                    rotation=270, labelpad=30)
+        self.ax.set_xlabel(axis_names["x"], fontsize=15, labelpad=10)
+        self.ax.set_ylabel(axis_names["y"], fontsize=15, labelpad=10)
+
+    def get_shape(self):
+        return density.get_shape(self.ax.bbox.width, self.ax.bbox.height)
+
+    def bin_view(self, color=None, view=None):
+        """ Layers of the current points in a view, by default the shown one. """
+        xlim, ylim = view or (self.ax.get_xlim(), self.ax.get_ylim())
+        return bin_layers(self.x, self.y, self.color if color is None else color,
+                          self.selected, self.deselected, xlim, ylim,
+                          self.get_shape(), self.density_threshold,
+                          self.density_selected)
+
+    def update_layers(self):
+        self.apply_layers(self.bin_view())
+
+    def apply_layers(self, layers):
+        """ Markers of the points, or images of their bins if there are too many. """
+        x, y = self.x, self.y
+        if layers.color_limits is not None:
+            self.selected_markers.set_clim(*layers.color_limits)
+        if layers.deselected_counts is not None:
+            self.deselected_image.set_data(layers.deselected_counts)
+            self.deselected_image.set_extent(layers.extent)
+            self.deselected_image.set_clim(0, np.nanmax(layers.deselected_counts))
+        self.deselected_image.set_visible(layers.deselected_counts is not None)
+        self.deselected_markers.set_offsets(get_offsets(x, y, layers.deselected_rows))
+
+        if layers.selected_means is not None:
+            self.selected_image.set_data(layers.selected_means)
+            self.selected_image.set_extent(layers.extent)
+        self.selected_image.set_visible(layers.selected_means is not None)
+        self.selected_markers.set_offsets(get_offsets(x, y, layers.selected_rows))
+        self.selected_markers.set_array(self.color[layers.selected_rows])
+
+    def set_pareto(self, layers):
+        """ Circle the rows of the non-dominated ranks, later ranks fainter. """
+        for rank, rows in enumerate(layers):
+            if rank == len(self.pareto_markers):
+                self.pareto_markers.append(self.ax.scatter([], [], facecolors='none',
+                                                           edgecolors='k',
+                                                           linewidth=2, s=130,
+                                                           alpha=1/(rank + 1)))
+            self.pareto_markers[rank].set_offsets(get_offsets(self.x, self.y, rows))
+        for markers in self.pareto_markers[len(layers):]:
+            markers.set_offsets(np.zeros((0, 2)))
+
+    def set_current(self, x, y, z=None, blit=True):
+        self.current_marker.set_offsets([[x, y]])
+        if blit:
+            self.blit()
+
+    @trace.traced()
+    def draw(self):
+        self.canvas.draw()
+
+    def on_draw(self, event):
+        # saving to a vector format draws with a canvas of its own
+        if event.canvas is not self.canvas:
+            return
+        # cache the figure without the current solution for blitting
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax.draw_artist(self.current_marker)
+
+    @trace.traced()
+    def blit(self):
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.current_marker)
+        self.canvas.blit(self.fig.bbox)
+
+    def on_view_change(self, ax):
+        if len(self.x) > self.density_threshold and not self.view_pending:
+            self.view_pending = True
+            self.view_timer.start()
+
+    def refresh_view(self):
+        self.view_pending = False
+        if self.worker is None:
+            self.update_layers()
+            self.canvas.draw_idle()
+            return
+        view = (self.ax.get_xlim(), self.ax.get_ylim())
+        points = (self.x, self.y, self.color, self.selected, self.deselected)
+        shape = self.get_shape()
+        self.worker.submit("view", lambda job: bin_layers(*points, *view, shape,
+                                                          self.density_threshold,
+                                                          self.density_selected),
+                           callback=lambda layers: self.on_view_binned(points, layers))
+
+    def on_view_binned(self, points, layers):
+        # the points may have changed in the meantime
+        if points[0] is self.x and points[2] is self.color and \
+           points[3] is self.selected:
+            self.apply_layers(layers)
+            self.canvas.draw_idle()
+
+class PlotRenderer3D:
+    def __init__(self, fig, canvas, ax):
+        self.fig = fig
+        self.canvas = canvas
+        self.ax = ax
+        self.colorbar = None
+        self.current_marker = None
+        self.x = self.y = self.z = np.zeros(0)
+
+    def set_data(self, x, y, z, color, selected, deselected):
+        self.x, self.y, self.z = x, y, z
+        self.color = color
+        self.selected, self.deselected = selected, deselected
+        self.ax.cla()
+        self.current_marker = None
+        self.ax.scatter(x[deselected], y[deselected], z[deselected], c='grey',
+                        s=100, alpha=0.1)
+        im = self.ax.scatter(x[selected], y[selected], z[selected],
+                             c=color[selected], cmap="rainbow", alpha=1, s=100)
+        if self.colorbar is None:
+            self.colorbar = self.fig.colorbar(im, ax=self.ax)
+            self.colorbar.ax.tick_params(labelsize=15)
+        else:
+            self.colorbar.update_normal(im)
+        for values, set_lim in ((x, self.ax.set_xlim), (y, self.ax.set_ylim),
+                                (z, self.ax.set_zlim)):
+            finite = values[np.isfinite(values)]
+            if len(finite):
+                set_lim([finite.min(), finite.max()])
+        self.ax.tick_params(labelsize=15)
+        self.ax.mouse_init()
+
+    def set_labels(self, axis_names):
+        self.colorbar.ax.set_ylabel(axis_names["color"], fontsize=15,
+                                    rotation=270, labelpad=30)
+        self.ax.set_xlabel(axis_names["x"], fontsize=15, labelpad=15)
+        self.ax.set_ylabel(axis_names["y"], fontsize=15, labelpad=15)
+        self.ax.set_zlabel(axis_names["z"], fontsize=15, labelpad=15)
+
+    def set_pareto(self, layers):
+        for rank, rows in enumerate(layers):
+            self.ax.scatter(self.x[rows], self.y[rows], self.z[rows],
+                            facecolors='none', edgecolors='k', linewidth=2,
+                            s=130, alpha=1/(rank + 1))
+
+    def set_current(self, x, y, z=None, blit=True):
+        if self.current_marker is not None:
+            self.current_marker.remove()
+        self.current_marker = self.ax.scatter(x, y, z, facecolors='k',
+                                              edgecolors='k', linewidth=3,
+                                              s=150, alpha=1)
+        if blit:
+            self.canvas.draw_idle()
+
+    @trace.traced()
+    def draw(self):
+        self.canvas.draw()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Re-evaluation of selected solutions
+
+Instead of the whole grid, an executable is run for a few
+parameterIDs only, e.g. the selected solutions or the Pareto front. Every
+run gets the command line
+    -evaluationName NAME -parameterID ID -resultsFile PATH
+and writes the header and the row of its solution to PATH in the format of
+Results.txt. The framework build itself has no such mode (without
+--demonstration it evaluates the whole grid again and rewrites Results.txt),
+so the executable has to be given explicitly, e.g. a wrapper around a single
+simulation. Like TaskExtensions.StartAndWaitAllThrottled, at most
+max_running processes run at once. The rows of the finished runs are kept
+in the overlay next to Results.txt (see framework.data.overlay), whose
+objective values replace those of Results.txt whenever it is loaded.
+"""
+
+from framework.data import parser
+from framework.data import overlay
+from framework.visualization.launcher import get_command
+
+import os
+import time
+import tempfile
+import subprocess
+import concurrent.futures
+import pandas as pd
+from pathlib import Path
+
+# seconds between two checks whether a run was cancelled
+CANCEL_INTERVAL = 0.2
+# characters of the output of a failed run that are reported
+MAX_REPORTED_OUTPUT = 2000
+
+def parse_ids(text):
+    """ Sorted parameterIDs of a list like "3,17,40-45". """
+    ids = set()
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = (int(bound) for bound in part.split("-"))
+            ids.update(range(first, last + 1))
+        else:
+            ids.add(int(part))
+    return sorted(ids)
+
+def get_rerun_args(evaluation_name, parameter_id, results_file):
+    return ["-evaluationName", evaluation_name, "-parameterID", str(parameter_id),
+            "-resultsFile", str(results_file)]
+
+def run_command(command, timeout=None, cancelled=None):
+    """
+    Return code and output of a command, the return code is None if it
+    was cancelled (before or while running) or timed out.
+    """
+    if cancelled is not None and cancelled.is_set():
+        return None, "cancelled"
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, 
+                               stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                               universal_newlines=True, errors="replace")
+    start = time.monotonic()
+    output = ""
+    while True:
+        try:
+            output, _ = process.communicate(timeout=CANCEL_INTERVAL)
+            return process.returncode, output
+        except subprocess.TimeoutExpired:
+            pass
+        if cancelled is not None and cancelled.is_set():
+            reason = "cancelled"
+        elif timeout is not None and time.monotonic() - start > timeout:
+            reason = "timed out after {} s".format(timeout)
+        else:
+            continue
+        process.kill()
+        output, _ = process.communicate()
+        return None, "{}\n{}".format(output, reason)
+
+def run_throttled(commands, max_running, timeout=None, cancelled=None, 
+                  on_done=None):
+    """
+    Run all commands with at most max_running at once. Returns their return
+    codes and outputs in order; on_done is called with the position of every
+    finished command as soon as it finished.
+    """
+    results = [None]*len(commands)
+    with concurrent.futures.ThreadPoolExecutor(max(1, max_running)) as pool:
+        futures = dict((pool.submit(run_command, command, timeout, cancelled), i)
+                       for i, command in enumerate(commands))
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except OSError as error:
+                results[i] = (None, "Could not start {}: {}".format(commands[i][0], 
+                                                                   error))
+            if on_done is not None:
+                on_done(i)
+    return results
+
+def read_row(results_file, header):
+    """ Line of the solution in a results file written by a run. """
+    with results_file.open("rb") as results:
+        if results.readline().rstrip(b"\r\n") != header:
+            raise ValueError("The columns of {} differ from Results.txt".format(
+                results_file.name))
+        line = results.readline()
+    if b"|" not in line:
+        raise ValueError("{} holds no solution".format(results_file.name))
+    return line.rstrip(b"\r\n")
+
+def rerun(evaluation_name, use_ROS, parameter_ids, executable, 
+          max_running=None, timeout=None, cancelled=None, on_done=None):
+    """
+    Evaluate the solutions of parameter_ids again and add their rows to the
+    overlay of Results.txt. Returns their objective columns indexed by
+    parameterID and {parameterID: reason} of failed runs.
+    """
+    objectives_file = parser.get_path_to_objectives(evaluation_name, 
+                                                    use_ROS) / "Results.txt"
+    if executable is None:
+        raise ValueError("Re-evaluation needs an executable supporting "
+                         "-resultsFile, the framework build evaluates the whole grid")
+    if max_running is None:
+        max_running = os.cpu_count() or 1
+    with objectives_file.open("rb") as results:
+        header = results.readline().rstrip(b"\r\n")
+    
+    with tempfile.TemporaryDirectory(prefix="rerun") as directory:
+        results_files = [os.path.join(directory, "Results{}.txt".format(i))
+                         for i in parameter_ids]
+        commands = [get_command(executable, get_rerun_args(evaluation_name, i, path))
+                    for i, path in zip(parameter_ids, results_files)]
+        outcomes = run_throttled(commands, max_running, timeout, cancelled, on_done)
+        
+        lines = {}
+        failed = {}
+        for i, path, (return_code, output) in zip(parameter_ids, results_files, 
+                                                  outcomes):
+            if return_code != 0:
+                reason = "exit code {}".format(return_code) \
+                         if return_code is not None else "not finished"
+                failed[i] = "{}\n{}".format(reason, output[-MAX_REPORTED_OUTPUT:])
+                continue
+            try:
+                lines[i] = read_row(Path(path), header)
+            except (OSError, ValueError) as error:
+                failed[i] = str(error)
+    if not lines:
+        return pd.DataFrame(), failed
+    
+    overlay.write_lines(objectives_file, lines)
+    return overlay.parse_rows(objectives_file, lines), failed
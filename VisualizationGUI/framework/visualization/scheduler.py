@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Coalescing render scheduler
+
+GUI callbacks only mark parts of the state as dirty. Once Tk is idle, all
+marks so far are rendered together. A render is a generator whose stages are
+run in separate idle callbacks, so Tk handles the events arriving meanwhile;
+if they mark anything dirty, the remaining stages are stale and the render
+starts over with all marks. A stage may also yield a job of a
+BackgroundWorker, then the render continues once the job is done.
+"""
+
+import traceback
+
+# parts of the state a callback can mark dirty
+SELECTION = "selection"
+AXES = "axes"
+COLORS = "colors"
+PARETO = "pareto"
+CURRENT = "current solution"
+LAYOUT = "layout"
+MARGINALS = "marginals"
+
+class RenderScheduler:
+    def __init__(self, widget, render):
+        """
+        render is called with the set of dirty parts and returns a generator,
+        yielding between its stages.
+        """
+        self.widget = widget
+        self.render = render
+        self.dirty = set()
+        # parts of the render in progress and its remaining stages
+        self.rendering = set()
+        self.stages = None
+        self.after_id = None
+        # job of the background worker the render waits for
+        self.waiting = None
+
+    def mark(self, *parts):
+        self.dirty.update(parts)
+        self.schedule()
+
+    def schedule(self):
+        if self.after_id is None:
+            self.after_id = self.widget.after_idle(self.run)
+
+    def run(self):
+        self.after_id = None
+        if self.stages is not None and self.dirty:
+            # events arrived mid-render, so its remaining stages are stale
+            self.dirty |= self.rendering
+            self.stages.close()
+            self.stages = None
+            if self.waiting is not None:
+                self.waiting.cancel()
+                self.waiting = None
+        if self.waiting is not None:
+            if not self.waiting.done:
+                return
+            self.waiting = None
+        if self.stages is None:
+            if not self.dirty:
+                return
+            self.rendering, self.dirty = self.dirty, set()
+            self.stages = self.render(self.rendering)
+        try:
+            stage = next(self.stages)
+        except StopIteration:
+            self.stages = None
+            self.rendering = set()
+            if self.dirty:
+                self.schedule()
+            return
+        except Exception:
+            traceback.print_exc()
+            self.stages = None
+            self.rendering = set()
+            return
+        if stage is not None:
+            self.waiting = stage
+            stage.add_done_callback(self.on_job_done)
+        else:
+            self.schedule()
+            
+    def on_job_done(self, job):
+        if job is self.waiting:
+            self.schedule()
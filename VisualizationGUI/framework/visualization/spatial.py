@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Spatial index of the plotted points in display coordinates (pixels)
+
+The visible points are bucketed into square cells of the pick radius, stored
+contiguously per cell like the posting lists of the selection index. A query
+only looks at the 3x3 cells around the mouse, found by binary search over the
+sorted cell keys.
+"""
+
+import numpy as np
+
+# pixels between the mouse and a point to pick or hover it
+PICK_RADIUS = 6
+# pixels between points drawn on top of each other
+COINCIDENT_DISTANCE = 1
+
+class GridIndex:
+    def __init__(self, positions, rows, bounds, cell_size=PICK_RADIUS):
+        """
+        positions are the display coordinates of the plotted rows, points
+        outside bounds (x0, y0, x1, y1), e.g. the axes, cannot be picked.
+        """
+        x0, y0, x1, y1 = bounds
+        positions = np.asarray(positions, dtype=np.float64)
+        visible = np.isfinite(positions).all(axis=1) & \
+                  (positions[:, 0] >= x0) & (positions[:, 0] <= x1) & \
+                  (positions[:, 1] >= y0) & (positions[:, 1] <= y1)
+        self.positions = positions[visible]
+        self.rows = np.asarray(rows)[visible]
+        self.origin = np.array([x0, y0])
+        self.cell_size = cell_size
+        self.num_cells_y = int((y1 - y0)//cell_size) + 3
+        keys = self.get_keys(self.positions)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys, self.offsets = np.unique(keys[self.order], return_index=True)
+        self.offsets = np.append(self.offsets, len(self.order))
+
+    def get_keys(self, positions):
+        # one cell of margin around the bounds for the 3x3 neighbourhood
+        cells = ((positions - self.origin)//self.cell_size).astype(np.int64) + 1
+        return cells[:, 0]*self.num_cells_y + cells[:, 1]
+
+    def query(self, x, y, radius=PICK_RADIUS):
+        """
+        Positions (into rows) of the points within radius of (x, y), nearest
+        first.
+        """
+        center = self.get_keys(np.array([[x, y]], dtype=np.float64))[0]
+        reach = int(np.ceil(radius/self.cell_size))
+        neighbours = [center + i*self.num_cells_y + j
+                      for i in range(-reach, reach + 1)
+                      for j in range(-reach, reach + 1)]
+        slots = np.searchsorted(self.keys, neighbours)
+        candidates = [self.order[self.offsets[slot]:self.offsets[slot+1]]
+                      for slot, key in zip(slots, neighbours)
+                      if slot < len(self.keys) and self.keys[slot] == key]
+        if not candidates:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.concatenate(candidates)
+        distances = np.hypot(*(self.positions[candidates] - (x, y)).T)
+        within = distances <= radius
+        candidates, distances = candidates[within], distances[within]
+        return candidates[np.argsort(distances, kind="stable")]
+
+    def get_coincident(self, candidates):
+        """ The first of the candidates and all drawn on top of each other. """
+        if len(candidates) == 0:
+            return candidates
+        distances = np.hypot(*(self.positions[candidates] -
+                               self.positions[candidates[0]]).T)
+        return candidates[distances <= COINCIDENT_DISTANCE]
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Fast startup of the GUI
+
+Only tkinter is imported before the window opens. pandas, matplotlib and the
+GUI modules are imported by a background thread, which then fills the
+DataStorage, while the window shows a loading view. Once the data is there,
+the GUI is built in the Tk thread. A StartupProfile times these stages up to
+the first draw of the plot.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+import time
+import queue
+import threading
+import traceback
+
+WINDOW_SIZE = (1400, 1000)
+TITLE = "Evaluation Framework Visualization"
+# milliseconds between two checks whether the data is loaded
+POLL_INTERVAL = 50
+
+class StartupProfile:
+    """ Seconds spent in the stages of the startup, in order. """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.stages = []
+        
+    def mark(self, stage):
+        """ End the stage running since the previous mark. """
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+        
+    def report(self):
+        width = max(len(stage) for stage, _ in self.stages)
+        print("Startup profile:")
+        for stage, seconds in self.stages:
+            print("  {:<{}} {:7.3f} s".format(stage, width, seconds))
+        print("  {:<{}} {:7.3f} s".format("total", width, self.last - self.start))
+        
+class LoadingView(tk.Frame):
+    """ Progress shown in the window while the data is loaded. """
+    def __init__(self, master, text, **kwargs):
+        tk.Frame.__init__(self, master, bg="white", **kwargs)
+        self.start = time.perf_counter()
+        self.label = tk.Label(self, text=text, font='Helvetica 16 bold', 
+                              bg="white")
+        self.label.pack(pady=10)
+        self.progress_bar = ttk.Progressbar(self, length=300, 
+                                            mode="indeterminate")
+        self.progress_bar.pack()
+        self.time_label = tk.Label(self, font='Helvetica 10', bg="white")
+        self.time_label.pack(pady=5)
+        self.progress_bar.start(20)
+        self.update_time()
+        
+    def update_time(self):
+        self.time_label.config(text="{:.0f} s".format(time.perf_counter() - self.start))
+        self.after_id = self.after(500, self.update_time)
+        
+    def show_error(self, text):
+        self.after_cancel(self.after_id)
+        self.progress_bar.stop()
+        self.progress_bar.pack_forget()
+        self.label.config(text=text, fg="red")
+        
+    def destroy(self):
+        self.after_cancel(self.after_id)
+        tk.Frame.destroy(self)
+
+def load_in_background(results, specs, use_ROS, time_scale, use_cache, 
+                       rebuild_cache, memory_map, chunk_size, float32, follow, 
+                       memory_budget, profile):
+    """ Import the GUI and fill the DataStorage, in the background thread. """
+    try:
+        from framework.data.compare import parse_evaluation_spec
+        from framework.visualization import gui
+        profile.mark("imports")
+        evaluations = [parse_evaluation_spec(spec, use_ROS) for spec in specs]
+        evaluation_name, use_ROS = evaluations[0]
+        stream, follower = gui.load_data_storage(evaluation_name, use_ROS, 
+                                                 time_scale, use_cache, 
+                                                 rebuild_cache, memory_map, 
+                                                 chunk_size, float32, follow, 
+                                                 evaluations, memory_budget)
+        profile.mark("data")
+        results.put((gui, stream, follower, None))
+    except Exception:
+        results.put((None, None, None, traceback.format_exc()))
+        
+def open_gui(specs, use_ROS, time_scale, use_cache=True, rebuild_cache=False,
+             memory_map=False, chunk_size=None, float32=False, follow=False,
+             memory_budget=None, density_threshold=None, density_selected=False,
+             executable=None, max_launches=1, profile=None, print_profile=False,
+             trace_overlay=False):
+    """
+    run_gui with the window opened first. Evaluations are given as specs like
+    "name" or "ROS:name", since parsing them imports pandas.
+    """
+    if profile is None:
+        profile = StartupProfile()
+    root = tk.Tk()
+    root.geometry("{}x{}".format(*WINDOW_SIZE))
+    root.title(TITLE)
+    root.configure(background="white")
+    view = LoadingView(root, "Loading {} ...".format(", ".join(specs)))
+    view.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+    root.update()
+    profile.mark("window")
+    
+    results = queue.Queue()
+    threading.Thread(target=load_in_background, name="DataLoader", 
+                     daemon=True,
+                     args=(results, specs, use_ROS, time_scale, use_cache, 
+                           rebuild_cache, memory_map, chunk_size, float32, 
+                           follow, memory_budget, profile)).start()
+    
+    def poll():
+        try:
+            gui, stream, follower, error = results.get_nowait()
+        except queue.Empty:
+            root.after(POLL_INTERVAL, poll)
+            return
+        if error is not None:
+            print(error)
+            view.show_error("Loading failed, see the console")
+            return
+        view.destroy()
+        threshold = density_threshold
+        if threshold is None:
+            threshold = gui.density.DENSITY_THRESHOLD
+        app = gui.start_gui(root, stream, follower, threshold, density_selected,
+                            executable, max_launches, trace_overlay)
+        profile.mark("GUI")
+        
+        def on_draw(event):
+            # the canvas is also drawn empty before the points are plotted
+            if app.plot_version == 0:
+                return
+            app.canvas2D.mpl_disconnect(connection)
+            profile.mark("first draw")
+            if print_profile:
+                profile.report()
+        connection = app.canvas2D.mpl_connect("draw_event", on_draw)
+    
+    root.after(POLL_INTERVAL, poll)
+    root.mainloop()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Background worker for the expensive data stages of the GUI
+
+Jobs run one after another in a single thread, so jobs changing the state of
+the selection are applied in order. Every job belongs to a channel and gets
+the next generation number of it: a newer job of the same channel supersedes
+the older ones, which are skipped if they did not start yet and can check
+job.is_current() to stop early. Results are handed to the Tk thread, which
+polls for them with after, and only callbacks of current jobs are called.
+"""
+
+from framework import trace
+
+import queue
+import threading
+import traceback
+
+# milliseconds between two checks for finished jobs
+POLL_INTERVAL = 10
+
+def get_span_name(job):
+    # lambdas are named after their channel
+    if job.function.__name__ == "<lambda>":
+        channel = job.channel[0] if isinstance(job.channel, tuple) else job.channel
+        return "worker.{}".format(channel)
+    return trace.get_name(job.function)
+
+class Job:
+    def __init__(self, worker, channel, generation, function, args, callback):
+        self.worker = worker
+        self.channel = channel
+        self.generation = generation
+        self.function = function
+        self.args = args
+        self.callback = callback
+        self.result = None
+        self.done = False
+        self.cancelled = False
+        self.done_callbacks = []
+
+    def is_current(self):
+        return not self.cancelled and \
+               self.worker.generations.get(self.channel) == self.generation
+
+    def cancel(self):
+        self.cancelled = True
+
+    def add_done_callback(self, callback):
+        """ Called in the Tk thread once the job finished or was skipped. """
+        if self.done:
+            callback(self)
+        else:
+            self.done_callbacks.append(callback)
+
+class BackgroundWorker:
+    def __init__(self, widget, poll_interval=POLL_INTERVAL):
+        self.widget = widget
+        self.poll_interval = poll_interval
+        self.generations = {}
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.num_pending = 0
+        self.poll_id = None
+        self.thread = threading.Thread(target=self.run, name="BackgroundWorker",
+                                       daemon=True)
+        self.thread.start()
+
+    def submit(self, channel, function, *args, callback=None):
+        """
+        Run function(job, *args) in the background and call callback with its
+        result in the Tk thread, unless a newer job of the channel superseded it.
+        """
+        generation = self.generations.get(channel, 0) + 1
+        self.generations[channel] = generation
+        job = Job(self, channel, generation, function, args, callback)
+        self.num_pending += 1
+        self.requests.put(job)
+        if self.poll_id is None:
+            self.poll_id = self.widget.after(self.poll_interval, self.poll)
+        return job
+
+    def run(self):
+        while True:
+            job = self.requests.get()
+            if job.is_current():
+                try:
+                    with trace.span(get_span_name(job)):
+                        job.result = job.function(job, *job.args)
+                except Exception:
+                    traceback.print_exc()
+                    job.cancel()
+            self.results.put(job)
+
+    def poll(self):
+        self.poll_id = None
+        while True:
+            try:
+                job = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.num_pending -= 1
+            job.done = True
+            if job.callback is not None and job.is_current():
+                job.callback(job.result)
+            for callback in job.done_callbacks:
+                callback(job)
+        if self.num_pending > 0:
+            self.poll_id = self.widget.after(self.poll_interval, self.poll)
@@ -16,20 +16,139 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import sys
 import argparse
-from framework.visualization.gui import run_gui
+from pathlib import Path
+# pandas and matplotlib are only imported once the window is open
+from framework.visualization.startup import StartupProfile, open_gui
+from framework.visualization.options import FORMATS, OBJECTIVE_PAIRS
+from framework import trace
 
 def get_input_args():
     parser = argparse.ArgumentParser()
     
-    parser.add_argument('evaluationName',
-                        help = 'Name of evaluation to visualize')
+    parser.add_argument('evaluationName', nargs = '+',
+                        help = 'Name of evaluation to visualize, several names '
+                               'are compared side by side (prefix ROS: for ROS evaluations)')
     parser.add_argument('--useROS', action='store_true', default = False, 
                         help = 'use ROS alongside Unity')
     parser.add_argument('--timeScale', type = float, default = 1, 
                         help = 'Unity time scale for simulation speed')
-    return parser.parse_args()
+    parser.add_argument('--noCache', action='store_true', default = False,
+                        help = 'neither read nor write the binary cache of the results')
+    parser.add_argument('--rebuildCache', action='store_true', default = False,
+                        help = 'parse the results again and rebuild the binary cache')
+    parser.add_argument('--memoryMap', action='store_true', default = False,
+                        help = 'browse the results from memory-mapped column files')
+    parser.add_argument('--stream', action='store_true', default = False,
+                        help = 'show the first rows while the remaining ones are loaded')
+    parser.add_argument('--chunkSize', type = int, default = 100000,
+                        help = 'number of rows loaded at once when streaming')
+    parser.add_argument('--float32', action='store_true', default = False,
+                        help = 'store objective values with single precision')
+    parser.add_argument('--follow', action='store_true', default = False,
+                        help = 'keep adding rows appended to the results of a running evaluation')
+    parser.add_argument('--memoryBudget', type = float, default = 512,
+                        help = 'megabytes of array and derived columns kept in memory')
+    parser.add_argument('--densityThreshold', type = int, default = 100000,
+                        help = 'number of points in view above which the 2D plot shows their density')
+    parser.add_argument('--densitySelected', action='store_true', default = False,
+                        help = 'also show the density of the selected points')
+    parser.add_argument('--export', default = None,
+                        help = 'write the figures of a JSON spec without opening the GUI, '
+                               'or "{}" for all pairs of objectives'.format(OBJECTIVE_PAIRS))
+    parser.add_argument('--exportDir', type = Path, default = Path('export'),
+                        help = 'folder of the exported figures')
+    parser.add_argument('--exportFormat', choices = FORMATS, default = 'png',
+                        help = 'file format of the exported figures')
+    parser.add_argument('--processes', type = int, default = None,
+                        help = 'number of processes rendering the exported figures or '
+                               're-evaluating solutions (default: number of CPUs)')
+    parser.add_argument('--rerun', default = None,
+                        help = 'parameterIDs like "3,17,40-45" to evaluate again without '
+                               'opening the GUI with --executable, their objective values '
+                               'replace the old ones')
+    parser.add_argument('--rerunTimeout', type = float, default = None,
+                        help = 'seconds after which a re-evaluation is killed')
+    parser.add_argument('--executable', type = Path, default = None,
+                        help = 'framework executable launching solutions, e.g. the stand-in '
+                               'tools/fake_framework.py (default: the build next to the evaluations)')
+    parser.add_argument('--maxLaunches', type = int, default = 1,
+                        help = 'number of launched solutions running at once, the others are queued')
+    parser.add_argument('--profileStartup', action='store_true', default = False,
+                        help = 'print the time spent importing, loading and drawing until the first plot')
+    parser.add_argument('--trace', type = Path, nargs = '?', default = None,
+                        const = Path('trace.json'),
+                        help = 'time parsing, callbacks and render stages and write them as '
+                               'Chrome trace (default: trace.json) on exit')
+    parser.add_argument('--traceOverlay', action='store_true', default = False,
+                        help = 'trace and show the time spent on the last interaction above the plot')
+    args = parser.parse_args()
+    if args.noCache and args.rebuildCache:
+        parser.error('--noCache and --rebuildCache cannot be combined')
+    # flags of the GUI, neither exporting nor re-evaluating opens it
+    gui_flags = [flag for flag, used in (('--follow', args.follow), ('--stream', args.stream),
+                                         ('--maxLaunches', args.maxLaunches != 1),
+                                         ('--profileStartup', args.profileStartup),
+                                         ('--traceOverlay', args.traceOverlay)) if used]
+    if args.export is not None:
+        if args.rerun is not None:
+            parser.error('--export and --rerun cannot be combined')
+        if args.executable is not None:
+            gui_flags.append('--executable')
+        if gui_flags:
+            parser.error('{} cannot be used with --export'.format(gui_flags[0]))
+    if args.rerun is not None and gui_flags:
+        parser.error('{} cannot be used with --rerun'.format(gui_flags[0]))
+    if args.rerun is not None and len(args.evaluationName) > 1:
+        parser.error('--rerun re-evaluates solutions of a single evaluation')
+    if args.rerun is not None and args.executable is None:
+        parser.error('--rerun needs --executable, the framework build cannot '
+                     're-evaluate single solutions')
+    # the data is loaded in only one of these ways
+    modes = [flag for flag, used in (('--follow', args.follow), ('--stream', args.stream),
+                                     ('--memoryMap', args.memoryMap)) if used]
+    if len(modes) > 1:
+        parser.error('{} cannot be combined'.format(' and '.join(modes)))
+    if modes and len(args.evaluationName) > 1:
+        parser.error('{} cannot be used when comparing evaluations'.format(modes[0]))
+    return args
 
 if __name__ == '__main__':
+    profile = StartupProfile()
     in_args = get_input_args()
-    run_gui(in_args.evaluationName, in_args.useROS, in_args.timeScale)
\ No newline at end of file
+    profile.mark("arguments")
+    if in_args.trace is not None or in_args.traceOverlay:
+        trace.enable(in_args.trace)
+    if in_args.export is not None:
+        from framework.visualization.export import run_export
+        from framework.data.compare import parse_evaluation_spec
+        evaluations = [parse_evaluation_spec(spec, in_args.useROS) 
+                       for spec in in_args.evaluationName]
+        num_failed = run_export(evaluations, in_args.timeScale, in_args.export,
+                                in_args.exportDir, in_args.exportFormat,
+                                in_args.processes, not in_args.noCache, 
+                                in_args.rebuildCache, in_args.memoryMap, 
+                                in_args.float32, int(in_args.memoryBudget*2**20),
+                                in_args.densityThreshold, in_args.densitySelected)
+        sys.exit(1 if num_failed else 0)
+    if in_args.rerun is not None:
+        from framework.visualization.rerun import rerun, parse_ids
+        from framework.data.compare import parse_evaluation_spec
+        evaluation_name, use_ROS = parse_evaluation_spec(in_args.evaluationName[0], 
+                                                         in_args.useROS)
+        rows, failed = rerun(evaluation_name, use_ROS, parse_ids(in_args.rerun),
+                             in_args.executable, in_args.processes, 
+                             in_args.rerunTimeout)
+        print("{} solutions re-evaluated".format(len(rows.index)))
+        for parameter_id, reason in failed.items():
+            print("Re-evaluating parameterID {} failed: {}".format(parameter_id, 
+                                                                   reason))
+        sys.exit(1 if failed else 0)
+    open_gui(in_args.evaluationName, in_args.useROS, in_args.timeScale,
+             not in_args.noCache, in_args.rebuildCache, in_args.memoryMap,
+             in_args.chunkSize if in_args.stream else None, in_args.float32,
+             in_args.follow, int(in_args.memoryBudget*2**20),
+             in_args.densityThreshold, in_args.densitySelected, 
+             in_args.executable, in_args.maxLaunches, profile, 
+             in_args.profileStartup, in_args.traceOverlay)
\ No newline at end of file
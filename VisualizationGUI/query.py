@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import sys
+import argparse
+from pathlib import Path
+from framework.data.storage import EvaluationStore
+from framework.data.compare import parse_evaluation_spec
+from framework.data import query
+
+def get_arg_parser():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('evaluationName', nargs = '+',
+                        help = 'Name of evaluation to query, several names '
+                               'are joined like in point_cloud.py')
+    parser.add_argument('--useROS', action='store_true', default = False,
+                        help = 'use ROS alongside Unity')
+    parser.add_argument('--where', action='append', default = [],
+                        help = 'predicate like "Time [s] <= 10", may be repeated')
+    parser.add_argument('--column', action='append', default = None,
+                        help = 'column to export, may be repeated (default: all)')
+    parser.add_argument('--sortBy', action='append', default = [],
+                        help = 'column to sort by, may be repeated')
+    parser.add_argument('--descending', action='store_true', default = False,
+                        help = 'sort in descending order')
+    parser.add_argument('--limit', type = int, default = None,
+                        help = 'maximum number of rows')
+    parser.add_argument('--ids', action='store_true', default = False,
+                        help = 'only print the parameterIDs of the rows')
+    parser.add_argument('--output', type = Path, default = None,
+                        help = 'export to a .csv or .parquet file instead of printing')
+    parser.add_argument('--noCache', action='store_true', default = False,
+                        help = 'neither read nor write the binary cache of the results')
+    parser.add_argument('--memoryMap', action='store_true', default = False,
+                        help = 'query the memory-mapped column files')
+    return parser
+
+def parse_predicates(parser, texts):
+    predicates = []
+    for text in texts:
+        try:
+            predicates.append(query.parse_predicate(text))
+        except ValueError as e:
+            parser.error("--where: invalid predicate {!r} ({})".format(text, e))
+    return predicates
+
+def check_columns(parser, columns, predicates, in_args):
+    """ Report names of columns missing in the loaded results as usage error. """
+    for option, names in (("--where", [predicate.name for predicate in predicates]),
+                          ("--sortBy", in_args.sortBy),
+                          ("--column", in_args.column or [])):
+        for name in names:
+            if name not in columns:
+                parser.error("{}: unknown column {!r}, choose from {}".format(
+                    option, name, ", ".join(columns)))
+
+def export(frame, output):
+    if output.suffix == ".parquet":
+        try:
+            frame.to_parquet(str(output))
+        except ImportError as e:
+            # pyarrow or fastparquet are optional
+            sys.exit(str(e))
+    else:
+        frame.to_csv(str(output))
+
+if __name__ == '__main__':
+    arg_parser = get_arg_parser()
+    in_args = arg_parser.parse_args()
+    predicates = parse_predicates(arg_parser, in_args.where)
+    evaluations = [parse_evaluation_spec(spec, in_args.useROS)
+                   for spec in in_args.evaluationName]
+    store = EvaluationStore(evaluations[0][0], evaluations[0][1], 1)
+    if len(evaluations) > 1:
+        store.load_comparison(evaluations, not in_args.noCache)
+    else:
+        store.load(not in_args.noCache, memory_map=in_args.memoryMap)
+    data = store.get_data()
+    check_columns(arg_parser, list(data.columns), predicates, in_args)
+
+    rows = query.run_query(data, predicates, in_args.sortBy,
+                           in_args.descending, in_args.limit)
+    if in_args.ids:
+        ids = query.get_parameter_ids(rows, store.parameter_ids)
+        sys.stdout.write("\n".join(str(i) for i in ids.tolist()) + "\n")
+    else:
+        frame = query.get_frame(data, rows, in_args.column, store.parameter_ids)
+        if in_args.output is None:
+            frame.to_csv(sys.stdout)
+        else:
+            export(frame, in_args.output)
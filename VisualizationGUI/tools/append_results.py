@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Simulates a running evaluation by appending synthetic rows to its
+Results.txt at a given rate, e.g. `python tools/append_results.py Demo
+--rate 50000` next to `python point_cloud.py Demo --follow`. Existing results
+are only replaced with --overwrite. With --measure, the rows are written to a
+temporary file and followed in the same process instead, and the lag is
+reported.
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+import itertools
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from framework.data import parser  # noqa: E402
+from framework.data.follow import ResultsFollower  # noqa: E402
+import synthetic_results  # noqa: E402
+
+def append_rows(results_file, num_rows, rate, batch_size, progress):
+    lines = synthetic_results.rows(num_rows)
+    start = time.perf_counter()
+    with results_file.open("w", encoding="utf-8") as results:
+        results.write(synthetic_results.header_line())
+        results.flush()
+        while progress["written"] < num_rows:
+            batch = list(itertools.islice(lines, batch_size))
+            results.writelines(batch)
+            results.flush()
+            progress["written"] += len(batch)
+            # keep the requested number of rows per second
+            delay = start + progress["written"]/rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    progress["done"] = True
+
+def measure(results_file, num_rows, interval, progress):
+    follower = ResultsFollower(results_file)
+    max_lag = 0
+    poll_times = []
+    while follower.num_rows < num_rows:
+        time.sleep(interval)
+        start = time.perf_counter()
+        chunks = follower.poll()
+        poll_times.append(time.perf_counter() - start)
+        max_lag = max(max_lag, progress["written"] - follower.num_rows)
+        if (progress["done"] and not chunks) or follower.restarted:
+            break
+    print("followed {} of {} rows in {} polls".format(follower.num_rows, num_rows,
+                                                      len(poll_times)))
+    print("poll time: mean {:.1f} ms, max {:.1f} ms".format(
+        1000*sum(poll_times)/len(poll_times), 1000*max(poll_times)))
+    print("max lag: {} rows".format(max_lag))
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('evaluationName', nargs='?', default=None,
+                            help='name of the evaluation whose results are written')
+    arg_parser.add_argument('--useROS', action='store_true', default=False)
+    arg_parser.add_argument('--rows', type=int, default=1000000,
+                            help='total number of rows to append')
+    arg_parser.add_argument('--rate', type=float, default=20000,
+                            help='rows appended per second')
+    arg_parser.add_argument('--measure', action='store_true', default=False,
+                            help='follow the results of a temporary file in this process '
+                                 'and report the lag')
+    arg_parser.add_argument('--overwrite', action='store_true', default=False,
+                            help='replace the existing results of the evaluation')
+    arg_parser.add_argument('--interval', type=float, default=0.25,
+                            help='seconds between two polls when measuring')
+    args = arg_parser.parse_args()
+
+    batch_size = max(1, int(args.rate/20))
+    progress = {"written": 0, "done": False}
+    if args.measure:
+        # the results of an evaluation are never touched by a measurement
+        with tempfile.TemporaryDirectory() as tmp:
+            results_file = Path(tmp) / "Results.txt"
+            writer = threading.Thread(target=append_rows, daemon=True,
+                                      args=(results_file, args.rows, args.rate,
+                                            batch_size, progress))
+            writer.start()
+            measure(results_file, args.rows, args.interval, progress)
+            writer.join()
+        return
+
+    if args.evaluationName is None:
+        arg_parser.error("evaluationName is required unless measuring")
+    results_file = parser.get_path_to_objectives(args.evaluationName,
+                                                 args.useROS) / "Results.txt"
+    if results_file.exists() and not args.overwrite:
+        arg_parser.error("{} exists, pass --overwrite to replace it".format(results_file))
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    append_rows(results_file, args.rows, args.rate, batch_size, progress)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+"""
+Times Pareto rank layers of random objective values, some missing like failed
+executions, and checks them against the quadratic definition of dominance,
+e.g. `python tools/benchmark_pareto.py 10000 100000`
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from framework.data import pareto  # noqa: E402
+from benchmark_parser import best_of  # noqa: E402
+
+# share of rows with a missing objective value
+NAN_SHARE = 0.05
+# rows above which the quadratic check is skipped
+MAX_CHECKED_ROWS = 20000
+
+# values and number of layers of corner cases, with the expected layers
+CORNER_CASES = [
+    # the second rank is only the row of a failed execution
+    ([[1, 2, 3], [2, 1, 3], [np.nan, 1, 1]], 3, [[0, 1]]),
+    ([[1, 2], [2, 1], [np.nan, 1]], 3, [[0, 1]]),
+    # only failed executions
+    ([[np.nan, 1, 1], [1, np.nan, 1]], 2, []),
+    ([[np.nan, 1], [1, np.nan]], 2, []),
+    (np.zeros((0, 3)), 1, []),
+]
+
+def get_layers_quadratic(values, num_layers):
+    remaining = np.flatnonzero(~np.isnan(values).any(axis=1))
+    layers = []
+    while len(remaining) and len(layers) < num_layers:
+        dominated = pareto.dominated_by(values[remaining], values[remaining])
+        layers.append(remaining[~dominated])
+        remaining = remaining[dominated]
+    return layers
+
+def get_values(num_rows, num_objectives, rng):
+    values = rng.random((num_rows, num_objectives))
+    # coarse values, so that rows tie
+    values[:, 0] = np.round(values[:, 0], 2)
+    values[rng.random(num_rows) < NAN_SHARE, rng.integers(num_objectives)] = np.nan
+    return values
+
+def check_layers(layers, expected):
+    assert len(layers) == len(expected), (layers, expected)
+    for layer, expected_layer in zip(layers, expected):
+        assert np.array_equal(np.sort(layer), np.sort(expected_layer)), \
+            (layer, expected_layer)
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('rows', type=int, nargs='+',
+                            help='number of random rows')
+    arg_parser.add_argument('--layers', type=int, default=3)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    for values, num_layers, expected in CORNER_CASES:
+        values = np.asarray(values, dtype=np.float64)
+        check_layers(pareto.get_layers(values, num_layers), expected)
+
+    rng = np.random.default_rng(0)
+    print("{:>10} {:>11} {:>12} {:>12}".format("rows", "objectives", "front size", 
+                                               "layers [ms]"))
+    for num_rows in args.rows:
+        for num_objectives in (2, 3, 5):
+            values = get_values(num_rows, num_objectives, rng)
+            layers_time, layers = best_of(
+                lambda: pareto.get_layers(values, args.layers), args.repeat)
+            if num_rows <= MAX_CHECKED_ROWS:
+                check_layers(layers, get_layers_quadratic(values, args.layers))
+            print("{:>10} {:>11} {:>12} {:>12.1f}".format(
+                num_rows, num_objectives, len(layers[0]) if layers else 0, 
+                1000*layers_time))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Compares the Results.txt parser against the former regex based implementation
+on synthetic evaluations, e.g. `python tools/benchmark_parser.py 10000 100000`.
+With --grid, the evaluations are complete parameter grids, and loading them
+from EvaluationParameterSet.json (grid.parse_file) is compared against the
+parser instead.
+"""
+
+import sys
+import csv
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from framework.data import parser, grid  # noqa: E402
+import synthetic_results  # noqa: E402
+
+def legacy_parse_file(objectives_file):
+    # former implementation of parser.parse_data, kept as reference
+    with objectives_file.open(encoding="utf-8") as csv_file: 
+        csv_reader = csv.reader(csv_file, delimiter='|')
+        columns = next(csv_reader)
+        evaluation_parameter_names = columns[0].split(";")
+        objective_value_names = columns[1].split(";")
+    
+    data = pd.read_csv(objectives_file, sep="[;|]", engine='python',
+                       encoding="utf-8")
+    
+    array_names = []
+    for names in (evaluation_parameter_names, objective_value_names):
+        names_to_remove = []
+        for name in list(names):
+            if type(data[name].iloc[0]) != str:
+                continue
+            temp = pd.DataFrame([[float(idx) for idx in p.split(",")] 
+                                 for p in data[name]])
+            param, unit = name.split(" ")
+            columns = [param+str(i+1)+" "+unit for i in range(0, len(temp.columns))]
+            temp.columns = columns
+            names.extend(columns)
+            loc = data.columns.get_loc(name)
+            for i, col in enumerate(columns):
+                data.insert(loc+i, col, temp[col]) 
+            del data[name]
+            names_to_remove.append(name)
+        names[:] = [name for name in names if name not in names_to_remove]
+        array_names.extend(names_to_remove)
+    
+    return array_names, data.round(8)
+
+def best_of(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('rows', type=int, nargs='+',
+                            help='number of variants of the synthetic evaluations')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--skipLegacy', action='store_true', default=False,
+                            help='only time the current parser')
+    arg_parser.add_argument('--grid', action='store_true', default=False,
+                            help='compare the grid loader against the parser, on the '
+                                 'complete grid with at least the given number of rows')
+    args = arg_parser.parse_args()
+    if args.grid:
+        benchmark_grid(args.rows, args.repeat)
+        return
+    
+    print("{:>10} {:>12} {:>12} {:>9}".format("rows", "legacy [s]", 
+                                                "parser [s]", "speedup"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_rows in args.rows:
+            # the legacy parser cannot handle failed executions
+            results_file = synthetic_results.write_results(
+                Path(tmp) / "Results.txt", num_rows, failure_rate=0)
+            
+            new_time, (_, _, array_names, data) = best_of(
+                lambda: parser.parse_file(results_file), args.repeat)
+            if args.skipLegacy:
+                print("{:>10} {:>12} {:>12.3f} {:>9}".format(num_rows, "-", 
+                                                            new_time, "-"))
+                continue
+            
+            old_time, (old_array_names, old_data) = best_of(
+                lambda: legacy_parse_file(results_file), args.repeat)
+            assert array_names == old_array_names
+            assert list(data.columns) == list(old_data.columns)
+            assert np.allclose(data.to_numpy(dtype=float), 
+                               old_data.to_numpy(dtype=float), equal_nan=True)
+            print("{:>10} {:>12.3f} {:>12.3f} {:>8.1f}x".format(
+                num_rows, old_time, new_time, old_time/new_time))
+
+def benchmark_grid(row_counts, repeat):
+    print("{:>10} {:>12} {:>12} {:>9}".format("rows", "parser [s]", 
+                                                "grid [s]", "speedup"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_rows in row_counts:
+            levels = 2
+            while synthetic_results.get_grid_size(levels) < num_rows:
+                levels += 1
+            results_file = synthetic_results.write_grid_results(
+                Path(tmp) / str(levels) / "Results" / "Results.txt", levels)
+            
+            parser_time, (_, data_names, array_names, data) = best_of(
+                lambda: parser.parse_file(results_file), repeat)
+            grid_time, (_, grid_data_names, grid_array_names, grid_data) = best_of(
+                lambda: grid.parse_file(results_file), repeat)
+            # the grid loader falls back to the parser if the grid does not match
+            with results_file.open("rb") as results:
+                results.readline()
+                assert grid.matches_rows(grid.load_parameter_grid(results_file), 
+                                         results.read())
+            assert grid_array_names == array_names
+            assert [list(names) for names in grid_data_names] == \
+                   [list(names) for names in data_names]
+            assert list(grid_data.columns) == list(data.columns)
+            assert np.allclose(grid_data.to_numpy(dtype=float), 
+                               data.to_numpy(dtype=float), equal_nan=True)
+            print("{:>10} {:>12.3f} {:>12.3f} {:>8.1f}x".format(
+                len(data.index), parser_time, grid_time, parser_time/grid_time))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Times headless queries on synthetic evaluations and checks them against
+plain pandas boolean indexing, e.g. `python tools/benchmark_query.py 1000000`
+"""
+
+import sys
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from framework.data import parser, compact, query  # noqa: E402
+import synthetic_results  # noqa: E402
+from benchmark_parser import best_of  # noqa: E402
+
+QUERIES = [
+    ("one parameter", ["Speed [m/s] <= 2"], []),
+    ("parameters and objectives", ["Speed [m/s] >= 1", "Active [] == True",
+                                   "Time [s] < 50", "Deviation2 [m] > 0.5"], []),
+    ("sorted top 100", ["Mass [kg] != 10", "Energy [J] < 80"], ["Time [s]"]),
+]
+
+def pandas_query(data, predicates, sort_by, limit):
+    mask = np.ones(len(data.index), dtype=bool)
+    for predicate in predicates:
+        mask &= query.OPERATORS[predicate.op](data[predicate.name], 
+                                              predicate.value).to_numpy()
+    selected = data[mask]
+    if sort_by:
+        selected = selected.sort_values(sort_by, kind="stable")
+    return selected.index.to_numpy()[:limit]
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('rows', type=int, nargs='+',
+                            help='number of variants of the synthetic evaluations')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    print("{:>10} {:>28} {:>10} {:>12} {:>12}".format("rows", "query", "matches", 
+                                                     "pandas [ms]", "query [ms]"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_rows in args.rows:
+            results_file = synthetic_results.write_results(
+                Path(tmp) / "Results.txt", num_rows)
+            _, data_names, _, data = parser.parse_file(results_file)
+            encoded = compact.compact_frame(data, data_names[0], data_names[1])
+            for title, texts, sort_by in QUERIES:
+                predicates = [query.parse_predicate(text) for text in texts]
+                limit = 100 if sort_by else None
+                pandas_time, expected = best_of(
+                    lambda: pandas_query(data, predicates, sort_by, limit), 
+                    args.repeat)
+                query_time, rows = best_of(
+                    lambda: query.run_query(encoded, predicates, sort_by, 
+                                            limit=limit), args.repeat)
+                assert np.array_equal(rows, expected)
+                print("{:>10} {:>28} {:>10} {:>12.1f} {:>12.1f}".format(
+                    num_rows, title, len(rows), 1000*pandas_time, 1000*query_time))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Stand-in for the evaluation framework executable, e.g. on Linux where the
+Unity build cannot run. It accepts the command line of the framework and
+prints a few lines over some seconds instead of showing a simulation:
+`python point_cloud.py Demo --executable tools/fake_framework.py`.
+With -parameterID and -resultsFile, it re-evaluates a solution like
+framework/visualization/rerun.py expects: the row of the parameterID in
+Results.txt is written to the results file with random objective values.
+"""
+
+import sys
+import time
+import random
+import argparse
+import itertools
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from framework.data import parser  # noqa: E402
+
+def write_row(evaluation_name, parameter_id, results_file):
+    objectives_file = parser.get_path_to_objectives(evaluation_name, False) / "Results.txt"
+    with objectives_file.open(encoding="utf-8") as results:
+        header = results.readline()
+        line = next(itertools.islice(results, parameter_id, None), None)
+        if line is None:
+            print("There is no parameterID {}".format(parameter_id))
+            sys.exit(-1)
+        # arrays keep their number of elements, taken from the first rows
+        widths = {}
+        for other in itertools.chain([line], itertools.islice(results, 1000)):
+            for i, field in enumerate(other.rstrip("\n").split("|")[1].split(";")):
+                if field != "NaN":
+                    widths.setdefault(i, field.count(",") + 1)
+    params, objectives = line.rstrip("\n").split("|")
+    values = random.Random(parameter_id)
+    objectives = [",".join("{:g}".format(100*values.random()) 
+                           for _ in range(widths.get(i, 1)))
+                  for i in range(len(objectives.split(";")))]
+    with open(results_file, "w", encoding="utf-8") as results:
+        results.write(header)
+        results.write(params + "|" + ";".join(objectives) + "\n")
+
+def main():
+    arg_parser = argparse.ArgumentParser(prefix_chars='-')
+    arg_parser.add_argument('-evaluationName', required=True)
+    arg_parser.add_argument('--demonstration', action='store_true', default=False)
+    arg_parser.add_argument('-timeScale', type=float, default=None)
+    arg_parser.add_argument('-parameterID', type=int, default=None)
+    arg_parser.add_argument('-resultsFile', default=None)
+    arg_parser.add_argument('--seconds', type=float, default=5,
+                            help='duration of a demonstration or re-evaluation')
+    arg_parser.add_argument('--failID', type=int, default=None,
+                            help='parameterID whose execution fails')
+    args = arg_parser.parse_args()
+    if args.demonstration and (args.timeScale is None or args.parameterID is None):
+        print("--demonstration needs -timeScale and -parameterID")
+        sys.exit(-1)
+    if args.resultsFile is not None and args.parameterID is None:
+        print("-resultsFile needs -parameterID")
+        sys.exit(-1)
+
+    print("Creating SimulationInstanceHandlers...", flush=True)
+    steps = 10
+    for step in range(steps):
+        time.sleep(args.seconds/steps)
+        print("{} parameterID {}: simulated {:.0f}%".format(
+            args.evaluationName, args.parameterID, 100*(step + 1)/steps), flush=True)
+    if args.parameterID is not None and args.parameterID == args.failID:
+        print("Execution 0 canceled!", flush=True)
+        sys.exit(1)
+    if args.resultsFile is not None:
+        write_row(args.evaluationName, args.parameterID, args.resultsFile)
+    print("Execution 0 finished successfully!", flush=True)
+
+if __name__ == '__main__':
+    main()
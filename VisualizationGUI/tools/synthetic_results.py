@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+© Siemens AG, 2020
+Author: Michael Dyck (m.dyck@gmx.net)
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+<http://www.apache.org/licenses/LICENSE-2.0>.
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+"""
+Writes synthetic Results.txt files in the format of the Evaluation Framework
+(parameters and objectives separated by "|", values by ";" and array elements
+by ",") for benchmarks and local test harnesses.
+"""
+
+import json
+import itertools
+import numpy as np
+
+PARAMETER_HEADER = ["Speed [m/s]", "Mass [kg]", "Active []", "Pos [m]"]
+OBJECTIVE_HEADER = ["Time [s]", "Energy [J]", "Deviation [m]"]
+
+def header_line():
+    return ";".join(PARAMETER_HEADER) + "|" + ";".join(OBJECTIVE_HEADER) + "\n"
+
+def get_levels(num_rows):
+    return max(2, int(round((num_rows/2.0)**(1.0/3))) + 1)
+
+def get_grid_size(levels):
+    """ Number of rows of the complete grid of parameter_grid. """
+    return 4*levels**3
+
+def parameter_grid(num_rows, levels=None):
+    # mixed radix grid with the last parameter varying fastest, just like
+    # the cartesian product computed by the Evaluation Framework
+    if levels is None:
+        levels = get_levels(num_rows)
+    speeds = ["{:g}".format(0.5 + 0.25*i) for i in range(levels)]
+    masses = [str(10 + 5*i) for i in range(levels)]
+    actives = ["True", "False"]
+    # steps exact in single precision, so the ranges of the Evaluation
+    # Framework write the same strings
+    positions = ["{:g},{:g}".format(0.5*i, 0.25*j) for i in range(levels)
+                 for j in range(2)]
+    grid = itertools.product(speeds, masses, actives, positions)
+    return list(itertools.islice(grid, num_rows))
+
+def rows(num_rows, seed=0, first_row=0, failure_rate=0.01, levels=None):
+    random = np.random.RandomState(seed)
+    for i, params in enumerate(parameter_grid(first_row + num_rows, 
+                                              levels)[first_row:]):
+        if random.rand() < failure_rate:
+            # failed executions are written as NaN objective values
+            objectives = ["NaN", "NaN", "NaN"]
+        else:
+            objectives = ["{:g}".format(v) for v in random.rand(2)*100]
+            objectives.append(",".join("{:g}".format(v) 
+                                       for v in random.rand(3)))
+        yield ";".join(params) + "|" + ";".join(objectives) + "\n"
+
+def write_results(path, num_rows, seed=0, failure_rate=0.01, levels=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as results:
+        results.write(header_line())
+        results.writelines(rows(num_rows, seed, failure_rate=failure_rate, 
+                                levels=levels))
+    return path
+
+def write_grid_results(path, levels, seed=0, failure_rate=0.01):
+    """
+    Results.txt of the complete grid with the given number of levels, and
+    the EvaluationParameterSet.json describing it in ParameterFiles next to
+    the Results folder, like the Evaluation Framework writes them.
+    """
+    write_parameter_set(path.parents[1] / "ParameterFiles" / 
+                        "EvaluationParameterSet.json", levels)
+    return write_results(path, get_grid_size(levels), seed, failure_rate, levels)
+
+def write_parameter_set(path, levels):
+    """
+    EvaluationParameterSet.json describing the complete grid of
+    parameter_grid, which has get_grid_size(levels) rows.
+    """
+    def parameter(name, unit, type_string, settings, size=1):
+        return {"selectedVariable": name, "selectedVariableUnit": unit,
+                "selectedVariableTypeString": type_string,
+                "selectedVariableSize": size, "variableSettings": settings}
+    parameters = [
+        parameter("Speed", "m/s", "System.Single", [0.5, 0.5 + 0.25*(levels-1), 0.25]),
+        parameter("Mass", "kg", "System.Int32", [10, 10 + 5*(levels-1), 5]),
+        parameter("Active", "", "System.Boolean", [0, 1, 1]),
+        parameter("Pos", "m", "System.Single[]", [[0, 0.5*(levels-1), 0.5],
+                                                  [0, 0.25, 0.25]], size=2)]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as param_file:
+        json.dump(parameters, param_file, indent=2)
+    return path